@@ -0,0 +1,88 @@
+import numpy as np
+
+# Puntajes del alineamiento local (Smith-Waterman)
+MATCH = 2.0       # misma palabra
+PHONETIC = 1.0    # mismo soundex (Vosk oyó algo parecido)
+MISMATCH = -1.0
+GAP = 1.0         # palabra insertada por Vosk u omitida por el cantante
+SKIP = 0.5        # por palabra saltada ANTES de empezar a alinear (lejos del cursor)
+MIN_WORDS = 3     # una palabra suelta nunca da confianza completa
+
+
+class BandedAligner:
+    """
+    Alinea la ventana de palabras reconocidas contra una banda de posiciones
+    del slide con programación dinámica vectorizada en NumPy.
+
+    Tolera palabras que Vosk se come o inventa, y no avanza con coincidencias
+    sueltas de prefijo como el matcher voraz. Devuelve la posición final y una
+    confianza en [0, 1].
+    """
+
+    def __init__(self, song_plan, band=12, behind=2):
+        self.band = band
+        self.behind = behind
+        self.fuzzy = song_plan.fuzzy
+        self.vocab = song_plan.vocab
+        self.phonetics = song_plan.phonetics
+        # Vistas int32 sin copia sobre el buffer único de la canción
+        word_ids = np.frombuffer(song_plan.word_ids, dtype=np.int32)
+        phonetic_ids = np.frombuffer(song_plan.phonetic_ids, dtype=np.int32)
+        self._slides = {}
+        for number, plan in song_plan.slides.items():
+            end = plan.start + len(plan)
+            self._slides[number] = (word_ids[plan.start:end], phonetic_ids[plan.start:end])
+
+    def align(self, slide, recognized_words, start):
+        """
+        recognized_words: ventana reciente (en orden) de palabras normalizadas.
+        start: current_word_index del tracker.
+        Devuelve (posición siguiente a la última palabra alineada, confianza)
+        o None si no hay nada que alinear.
+        """
+        arrays = self._slides.get(slide)
+        if arrays is None or not recognized_words:
+            return None
+        word_keys, phonetic_keys = arrays
+
+        # La banda arranca lo bastante atrás para que las palabras ya consumidas
+        # de la ventana se alineen en su lugar real (y no en una repetición)
+        lo = max(0, start - max(self.behind, len(recognized_words)))
+        hi = min(len(word_keys), start + self.band)
+        if hi <= lo:
+            return None
+
+        cols_w = word_keys[lo:hi]
+        cols_p = phonetic_keys[lo:hi]
+        # Palabras fuera de la letra → UNKNOWN (-1), nunca iguala a un id
+        rec_w = np.array([self.vocab.get(w) for w in recognized_words], dtype=np.int32)
+        rec_p = np.array([self.phonetics.get(self.fuzzy.soundex(w)) for w in recognized_words], dtype=np.int32)
+
+        # Matriz de sustitución (filas = reconocidas, columnas = banda del slide)
+        scores = np.where(
+            rec_w[:, None] == cols_w[None, :], MATCH,
+            np.where(rec_p[:, None] == cols_p[None, :], PHONETIC, MISMATCH),
+        )
+
+        width = hi - lo
+        ramp = GAP * np.arange(width)
+        # Empezar a alinear lejos del cursor cuesta SKIP por palabra saltada
+        # (en Smith-Waterman puro el piso es 0 en todas las columnas)
+        floor = -SKIP * np.clip(np.arange(width + 1) - (start - lo), 0, None)
+        prev = floor.copy()
+        row = prev[1:]
+        for i in range(len(recognized_words)):
+            diag = prev[:-1] + scores[i]      # reconocida i ↔ palabra j
+            up = prev[1:] - GAP               # palabra inventada por Vosk
+            best = np.maximum(np.maximum(diag, up), floor[:-1])
+            # palabra del slide omitida: max(best[k] - GAP*(j-k)) con un acumulado
+            row = np.maximum.accumulate(best + ramp) - ramp
+            prev[1:] = row
+
+        # El alineamiento debe terminar en la ÚLTIMA palabra reconocida
+        end = int(np.argmax(row))
+        score = float(row[end])
+        if score <= 0.0:
+            return None
+        confidence = min(1.0, score / (MATCH * max(MIN_WORDS, len(recognized_words))))
+        return lo + end + 1, confidence
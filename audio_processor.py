@@ -34,21 +34,6 @@ class AudioProcessor:
         
         print("🎤 Procesador de Audio Inicializado")
     
-    def _optimized_voice_activity_detection(self, audio_data):
-        """Detección de voz más agresiva para buen micrófono"""
-        volume_norm = np.linalg.norm(audio_data) * (1.0 / self.chunk_size)
-        
-        # ✅ UMBRAL MÁS BAJO (micrófono bueno = menos ruido)
-        if volume_norm > self.noise_threshold:
-            # ✅ ANÁLISIS ESPECTRAL para mejor detección
-            frequencies = np.fft.fft(audio_data)
-            dominant_freq = np.argmax(np.abs(frequencies))
-            
-            # La voz humana generalmente está entre 85-255 Hz
-            if 85 <= dominant_freq <= 255:
-                return True
-        
-        return False
     def start_listening(self):
         """Inicia la escucha del micrófono"""
         try:
@@ -0,0 +1,219 @@
+"""
+Fuentes de audio con la misma interfaz que el callback de sounddevice.
+
+Una fuente llama a callback(indata, frames, time_info, status) con bloques
+int16 de forma (frames, canales), así CaptureCallback, el Pipeline DSP,
+Vosk y el tracker no saben si el audio viene del micrófono o de un archivo.
+
+  - MicrophoneSource: sd.InputStream (el micrófono de siempre)
+  - WavFileSource: grabación WAV PCM 16 bits mapeada en memoria (sin leerla
+    entera), a ritmo real (micrófono virtual, pruebas de resistencia) o tan
+    rápido como dé la CPU (evaluación por lotes; throttle frena a la fuente
+    cuando el consumidor se atrasa, nada se descarta)
+
+    python balanced_main.py --song letra.json --wav servicio.wav [--fast] [--decisions decisiones.jsonl]
+"""
+import json
+import mmap
+import struct
+import threading
+import time
+
+import numpy as np
+
+
+class AudioSource:
+    """Interfaz: start(callback) empieza a entregar bloques, stop() los corta"""
+
+    sample_rate = 16000
+    block_size = 320
+
+    def start(self, callback, throttle=None):
+        raise NotImplementedError
+
+    def stop(self):
+        pass
+
+    @property
+    def finished(self):
+        """True cuando la fuente no va a entregar más audio (fin del archivo)"""
+        return False
+
+
+class MicrophoneSource(AudioSource):
+    """Micrófono por sounddevice (int16 mono)"""
+
+    def __init__(self, sample_rate, block_size):
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.stream = None
+
+    def start(self, callback, throttle=None):
+        import sounddevice as sd
+        self.stream = sd.InputStream(
+            samplerate=self.sample_rate,
+            blocksize=self.block_size,
+            dtype='int16',
+            channels=1,
+            callback=callback
+        )
+        self.stream.start()
+        return self
+
+    def stop(self):
+        if self.stream is not None:
+            self.stream.stop()
+            self.stream.close()
+            self.stream = None
+
+
+def map_wav(path):
+    """
+    Mapea un WAV PCM de 16 bits: devuelve (mmap, muestras int16 (frames, canales), tasa).
+    Las muestras son una vista sobre el mmap (el SO pagina el archivo a demanda).
+    """
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if mapped[:4] != b'RIFF' or mapped[8:12] != b'WAVE':
+        mapped.close()
+        raise ValueError(f"{path} no es un WAV (RIFF/WAVE)")
+
+    fmt = None
+    offset = 12
+    while offset + 8 <= len(mapped):
+        chunk_id, size = struct.unpack_from('<4sI', mapped, offset)
+        body = offset + 8
+        if chunk_id == b'fmt ':
+            fmt = struct.unpack_from('<HHIIHH', mapped, body)
+        elif chunk_id == b'data':
+            if fmt is None:
+                break
+            audio_format, channels, rate, _, _, bits = fmt
+            if audio_format not in (1, 0xFFFE) or bits != 16:
+                mapped.close()
+                raise ValueError(f"{path}: solo PCM de 16 bits (formato {audio_format}, {bits} bits)")
+            size = min(size, len(mapped) - body)
+            frames = size // (2 * channels)
+            samples = np.frombuffer(mapped, dtype='<i2', count=frames * channels, offset=body)
+            return mapped, samples.reshape(frames, channels), rate
+        offset = body + size + (size & 1)
+    mapped.close()
+    raise ValueError(f"{path}: falta el chunk fmt o data")
+
+
+class WavFileSource(AudioSource):
+    """
+    Grabación WAV como micrófono. realtime=True entrega un bloque cada
+    block_size / sample_rate segundos; realtime=False no espera entre bloques,
+    pero mientras throttle() devuelva True (cola del consumidor llena) espera.
+    position_seconds = segundos de audio entregados hasta ahora.
+    """
+
+    def __init__(self, path, block_ms=20, realtime=True, loop=False):
+        self.path = path
+        self._mapped, self.samples, self.sample_rate = map_wav(path)
+        self.block_size = max(1, self.sample_rate * block_ms // 1000)
+        self.realtime = realtime
+        self.loop = loop
+        self.duration = len(self.samples) / self.sample_rate
+        self.frames_sent = 0
+        self.started_at = None
+        self.stalls = 0             # veces que throttle frenó a la fuente
+        self._done = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def position_seconds(self):
+        return self.frames_sent / self.sample_rate
+
+    @property
+    def finished(self):
+        return self._done.is_set()
+
+    def start(self, callback, throttle=None):
+        self._thread = threading.Thread(target=self._run, args=(callback, throttle), name="wav-source", daemon=True)
+        self.started_at = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def _run(self, callback, throttle):
+        samples = self.samples
+        block = self.block_size
+        period = block / self.sample_rate
+        next_at = time.perf_counter()
+        offset = 0
+        try:
+            while not self._stop.is_set():
+                if offset >= len(samples):
+                    if not self.loop:
+                        break
+                    offset = 0
+                chunk = samples[offset:offset + block]
+                if throttle is not None and not self.realtime:
+                    while throttle() and not self._stop.is_set():
+                        self.stalls += 1
+                        time.sleep(0.001)
+                callback(chunk, len(chunk), None, None)
+                offset += len(chunk)
+                self.frames_sent += len(chunk)
+                if self.realtime:
+                    next_at += period
+                    delay = next_at - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+        finally:
+            self._done.set()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(1.0)
+
+    def close(self):
+        self.stop()
+        self.samples = None
+        try:
+            self._mapped.close()
+        except BufferError:
+            pass    # todavía hay vistas vivas (slots de la cola): el GC lo cierra
+
+
+class DecisionTrace:
+    """
+    Decisiones de slide de una repetición, en JSON Lines: cada comando que
+    ejecuta la presentación (FakePresentation.subscribe) con el tiempo de reloj
+    desde el inicio y los segundos de audio entregados hasta ese momento.
+
+    {"t": 12.41, "audio_s": 12.52, "command": "next", "slide": 3}
+    """
+
+    def __init__(self, path, source, presentation):
+        self.path = path
+        self.source = source
+        self.count = 0
+        self._file = open(path, 'w', encoding='utf-8')
+        self._lock = threading.Lock()
+        presentation.subscribe(self._record)
+
+    def _record(self, command, slide):
+        started = self.source.started_at
+        entry = {
+            't': round(time.perf_counter() - started, 3) if started is not None else 0.0,
+            'audio_s': round(self.source.position_seconds, 3),
+            'command': command,
+            'slide': slide,
+        }
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(json.dumps(entry, separators=(',', ':')) + "\n")
+            self._file.flush()
+            self.count += 1
+
+    def close(self):
+        with self._lock:
+            self._file.close()
@@ -1,106 +1,144 @@
-import pyaudio
 import vosk
 import json
 import argparse
-import win32com.client
-import pythoncom
 import time
 import os
 import glob
 import signal
 import sys
+import queue
 from lyric_tracker import LyricTracker, load_lyrics_data
-import pyautogui
+from hypothesis_diff import HypothesisDiff
+from recognizer_pool import RecognizerPool, lean_recognizer
+from grammar import SlideGrammar
+from startup import StartupTasks, load_model, probe_audio_input
+from resampler import negotiate_capture_rate
+from capture import CaptureCallback
+from ring_buffer import AudioRing, WaveformFeeder, drain_queue, frame_aligned_bytes
+from housekeeping import Housekeeping
+from dsp_pipeline import Pipeline
+from recognition_worker import RecognitionWorker
+from latency_trace import LatencyTracer
+from metrics import REGISTRY, MetricsExporter
+from event_log import get_log, setup_logging, shutdown_logging
+from slide_controller import SlideController, PowerPointWatcher, FakePresentation
+from audio_source import MicrophoneSource, WavFileSource, DecisionTrace
+from session_recorder import SessionRecorder
+from clock import SourceClock
 import tkinter as tk
 from threading import Thread
 import keyboard 
-from scipy.signal import resample_poly
-import numpy as np
 _system_running = True
+log = get_log("main")
 
 class PowerPointSync:
-    def __init__(self, tracker):
+    """
+    Sigue los cambios de slide hechos a mano en PowerPoint. El slide lo lee
+    PowerPointWatcher en su propio hilo: acá solo se compara su snapshot.
+    """
+
+    def __init__(self, tracker, watcher, recorder=None):
         self.tracker = tracker
-        self.app = None
-        self.presentation = None
+        self.watcher = watcher
+        self.recorder = recorder
         self.last_known_slide = None
-        self.is_connected = False
-        self._connect()
+        self._last_change_time = float('-inf')    # en el reloj del tracker
         self.coro_repetitions = 0
+        self._version = 0
+        self._failed_commands = queue.SimpleQueue()     # los llena el hilo de slides
+        self._connect()
+
+    @property
+    def is_connected(self):
+        snapshot = self.watcher.snapshot
+        return snapshot.slide is not None and not snapshot.consecutive_failures
 
     def _connect(self):
-        try:
-            pythoncom.CoInitialize()
-            self.app = win32com.client.Dispatch("PowerPoint.Application")
-            time.sleep(0.5)
-            self.presentation = self.app.ActivePresentation
-            self.is_connected = True
-            
-            try:
-                current = self.presentation.SlideShowWindow.View.Slide.SlideIndex
-                self.last_known_slide = current
-                print(f"✅ PowerPoint en slide: {current}, Tracker en: {self.tracker.current_slide}")
-            except:
-                print("✅ Sincronización con PowerPoint activada (no en modo presentación)")
-                
-        except Exception as e:
-            print(f"⚠️ No se pudo conectar a PowerPoint: {e}")
-            self.is_connected = False
+        snapshot = self.watcher.wait_ready(1.0)
+        if snapshot.slide is not None:
+            self.last_known_slide = snapshot.slide
+            self._version = snapshot.version
+            print(f"✅ PowerPoint en slide: {snapshot.slide}, Tracker en: {self.tracker.current_slide}")
+        elif snapshot.failures:
+            print("⚠️ No se pudo conectar a PowerPoint (se sigue intentando en segundo plano)")
+        else:
+            print("✅ Sincronización con PowerPoint activada (no en modo presentación)")
+
+    def expect(self, slide):
+        """El sistema mismo movió PowerPoint a slide: ese cambio no es manual (no recargar el tracker)"""
+        self.last_known_slide = slide
+        self._last_change_time = self.tracker.clock.now()
+
+    def command_failed(self, slide):
+        """
+        Hilo de slides: un comando del sistema no llegó a PowerPoint (ni COM ni
+        teclas) y el tracker ya se había movido. slide = dónde estaba antes.
+        El resync lo hace el loop principal en la próxima check_current_slide().
+        """
+        self._failed_commands.put(slide)
+
+    def _resync_failed(self):
+        """El tracker vuelve al slide que de verdad muestra PowerPoint"""
+        slide = self._failed_commands.get_nowait()     # el primero que falló: de ahí no se movió
+        while not self._failed_commands.empty():
+            self._failed_commands.get_nowait()
+        snapshot = self.watcher.snapshot
+        if snapshot.slide is not None:
+            slide = snapshot.slide
+            self._version = snapshot.version
+        self.last_known_slide = slide
+        if slide == self.tracker.current_slide or not self.tracker.has_slide(slide):
+            return
+        log.warning("comando_fallido", "⚠️ El comando no llegó a PowerPoint → Tracker vuelve al slide {slide}",
+                    slide=slide)
+        self.tracker.sync_to(slide)
+        if self.recorder is not None:
+            self.recorder.record("sync", source="resync", slide=slide)
 
     def check_current_slide(self):
-        if not self.is_connected:
+        if not self._failed_commands.empty():
+            self._resync_failed()
+        snapshot = self.watcher.snapshot
+        # Sin cambio de slide desde la última vez (o sin PowerPoint): nada que hacer
+        if snapshot.version == self._version or snapshot.slide is None:
             return
-            
-        try:
-            try:
-                current = self.presentation.SlideShowWindow.View.Slide.SlideIndex
-            except:
-                try:
-                    current = self.app.ActiveWindow.Selection.SlideRange.SlideIndex
-                except:
-                    return
-
-            if self.last_known_slide is None:
-                self.last_known_slide = current
-                return
-
-            if current != self.last_known_slide:
-                if time.time() - getattr(self, '_last_change_time', 0) < 0.6:
-                    return
-
-                print(f"PowerPoint cambió → Slide {current}")
+        current = snapshot.slide
 
-                slide_key = f"slide_{current}"
-                if slide_key not in self.tracker.lyrics_data:
-                    print(f"⚠️ Slide {current} no existe en la canción → Manteniendo tracker en último slide válido")
-                    # NO actualizamos el tracker → se queda en el último slide válido
-                    self.last_known_slide = current
-                    return  # El tracker NO se mueve, PowerPoint puede estar donde quiera
+        if self.last_known_slide is None:
+            self.last_known_slide = current
+            self._version = snapshot.version
+            return
 
-                # ORDEN CRÍTICO: recargar → limpiar preloaded → volver a precargar
-                self.tracker.current_slide = current
-                self.tracker.current_word_index = 0
-                self.tracker.last_progress_time = time.time()
-                self.tracker.last_strong_word_time = time.time()
-                self.tracker.preloaded_slides.pop(current, None)
+        if current != self.last_known_slide:
+            if self.tracker.clock.now() - self._last_change_time < 0.6:
+                return  # se vuelve a mirar en la próxima vuelta
 
+            log.info("powerpoint_cambio", "PowerPoint cambió → Slide {slide}", slide=current)
+            self._version = snapshot.version
 
-                
-                self.tracker.force_reload_current_slide()           # ← 1. recarga limpia
-                self.tracker.preloaded_slides.pop(current, None)   # ← 2. elimina versión vieja
-                self.tracker._preload_slides_ahead(3)                # ← 3. precarga nuevos
-                
-                self.tracker.current_slide_metadata = self.tracker.get_current_slide_metadata()
-                
-                direccion = "Retroceso" if current < self.last_known_slide else "Avance"
-                print(f"{direccion} detectado → Slide {current} recargado 100% limpio")
-                
+            if not self.tracker.has_slide(current):
+                log.warning("slide_inexistente",
+                            "⚠️ Slide {slide} no existe en la canción → Manteniendo tracker en último slide válido",
+                            slide=current)
+                # NO actualizamos el tracker → se queda en el último slide válido
                 self.last_known_slide = current
-                self._last_change_time = time.time()
-                print(f"Sincronizado → Slide {current}")
+                return  # El tracker NO se mueve, PowerPoint puede estar donde quiera
+
+            # El plan del slide ya está compilado: solo se cambia el índice
+            self.tracker.sync_to(current)
+            if self.recorder is not None:
+                self.recorder.record("sync", source="powerpoint", slide=current)
+            
+            direccion = "Retroceso" if current < self.last_known_slide else "Avance"
+            log.info("powerpoint_sync", "{direction} detectado → Slide {slide} recargado 100% limpio",
+                     direction=direccion, slide=current)
+            
+            self.last_known_slide = current
+            self._last_change_time = self.tracker.clock.now()
+            log.debug("sincronizado", "Sincronizado → Slide {slide}", slide=current)
+        else:
+            self._version = snapshot.version
 
-        except Exception as e:
-            pass
 def signal_handler(sig, frame):
     global _system_running
     print('\n🎯 RECIBIDA SEÑAL DE INTERRUPCIÓN - Cerrando limpiamente...')
@@ -120,7 +158,7 @@ class Overlay:
 
     def update_overlay(self):
         slide = self.tracker.current_slide
-        total = len(self.tracker.lyrics_data)
+        total = len(self.tracker.song_plan)
         words = self.tracker.get_current_slide_text()
         progress = (self.tracker.current_word_index / len(words) * 100) if words else 0
         text = f"Slide {slide}/{total} | {self.tracker.current_word_index}/{len(words)} | {progress:.0f}%"
@@ -130,69 +168,181 @@ class Overlay:
     def run(self):
         self.root.mainloop()
 
+def create_tracker(lyrics_data, clock=None):
+    """LyricTracker arrancando en el primer slide disponible del JSON (clock: ver clock.py)"""
+    print("🔄 Inicializando LyricTracker...")
+
+    available_slides = []
+    for key in lyrics_data.keys():
+        if key.startswith("slide_"):
+            try:
+                num = int(key.replace("slide_", ""))
+                available_slides.append(num)
+            except ValueError:
+                continue
+
+    if available_slides:
+        first_available_slide = min(available_slides)
+        print(f"📊 Slides disponibles en JSON: {sorted(available_slides)}")
+        print(f"🎯 Configurando slide inicial del tracker: {first_available_slide}")
+        return LyricTracker(lyrics_data, start_slide=first_available_slide, clock=clock)
+
+    print("⚠️ No se encontraron slides, usando slide 1 por defecto")
+    return LyricTracker(lyrics_data, start_slide=1, clock=clock)
+
+
+def probe_powerpoint():
+    """Levanta el servidor COM de PowerPoint y devuelve el slide actual de la presentación"""
+    import pythoncom
+    import win32com.client
+    pythoncom.CoInitialize()
+    app = win32com.client.Dispatch("PowerPoint.Application")
+    return app.ActivePresentation.SlideShowWindow.View.Slide.SlideIndex
+
+
 class BalancedAudioProcessor:
-    def __init__(self, model_path, lyrics_data):
+    def __init__(self, model_path, lyrics_data, model=None, tracker=None, worker=None,
+                 source=None, decisions_path=None, song_path=None):
+        """
+        model / tracker ya construidos en paralelo por el arranque (si no, se crean aquí).
+        worker = RecognitionWorker ya listo → modo multiproceso (Vosk en otro proceso).
+        source = WavFileSource → repetición de una grabación: slides en una presentación
+        falsa y, con decisions_path, cada decisión a un JSONL (DecisionTrace).
+        song_path = archivo de la letra, para el encabezado de la grabación de la sesión.
+        """
         global _system_running
         _system_running = True
         
         signal.signal(signal.SIGINT, signal_handler)
         self.overlay = None
         self.overlay_thread = None
-        self.model = vosk.Model(model_path)
-        self.recognizer = vosk.KaldiRecognizer(self.model, 16000)
-        self.recognizer.SetWords(False)
-        self.recognizer.SetPartialWords(False)
-        
-        print("🔄 Inicializando LyricTracker...")
+        self.worker = worker
+        self.source = source
+        self.replay = isinstance(source, WavFileSource)
+        self.model = None
+        if worker is None:
+            self.model = model if model is not None else vosk.Model(model_path)
+        # Solo las palabras nuevas de cada parcial llegan al tracker
+        self.hypothesis = HypothesisDiff()
         
-        available_slides = []
-        for key in lyrics_data.keys():
-            if key.startswith("slide_"):
-                try:
-                    num = int(key.replace("slide_", ""))
-                    available_slides.append(num)
-                except ValueError:
-                    continue
-        
-        if available_slides:
-            first_available_slide = min(available_slides)
-            print(f"📊 Slides disponibles en JSON: {sorted(available_slides)}")
-            print(f"🎯 Configurando slide inicial del tracker: {first_available_slide}")
-            
-            self.tracker = LyricTracker(lyrics_data, start_slide=first_available_slide)
-        else:
-            print("⚠️ No se encontraron slides, usando slide 1 por defecto")
-            self.tracker = LyricTracker(lyrics_data, start_slide=1)
-        
-        print("🔄 Inicializando PowerPointSync...")
-        self.ppt_sync = PowerPointSync(self.tracker)
-        
-        print(f"🎯 ESTADO FINAL - Tracker slide: {self.tracker.current_slide}, PowerPointSync slide: {self.ppt_sync.last_known_slide}")
+        # Repetición: el tracker mide el tiempo en segundos de audio (--fast no acorta el anti-stuck)
+        if tracker is None:
+            tracker = create_tracker(lyrics_data, SourceClock(source) if self.replay else None)
+        self.tracker = tracker
         
         self.is_listening = True
         self.manual_control_active = False
         self.song_finished = False
         self.config = self._load_config()
+
+        # Grabación de la sesión (session_recorder.py): se repite con replay_transcript.py
+        self.recorder = SessionRecorder.from_config(
+            self.config.get("recording", {}),
+            header={"song": song_path, "slide": self.tracker.current_slide},
+            clock=self.tracker.clock,
+        )
+        if self.recorder is not None:
+            self.recorder.start()
+        self._speech = True
         
-        self.chunk_size = self.config["audio"]["chunk_size"]
-        self.processing_interval = self.config["audio"]["processing_interval"]
-        self.sleep_time = self.config["audio"]["sleep_time"]
-
-        self.performance_metrics = {
-            'total_processing_time': 0,
-            'audio_captures': 0,
-            'slide_changes': 0,
-            'last_slide_change_time': None,
-            'slide_times': [],
-            'processing_times': []
-        }
+        # Modo gramática: Vosk decodifica solo con las palabras del slide actual + los siguientes
+        self.slide_grammar = None
+        if self.config.get("recognition", {}).get("grammar", False):
+            ahead = self.config.get("phase_2_1_extreme", {}).get("preload_slides_ahead", 3)
+            self.slide_grammar = SlideGrammar(self.tracker.lyrics_data, ahead=ahead)
+            print(f"📝 Modo gramática: slide actual + {ahead} siguientes")
+
+        # Sin sleep-polling: el loop se bloquea en la cola de audio (idle_timeout como máximo)
+        self.idle_timeout = self.config["audio"].get("idle_timeout", 0.5)
+        self.poll_interval = self.config["powerpoint"].get("poll_interval", 0.25)
+        # Lote de audio por llamada a AcceptWaveform (ver bench_batching.py)
+        self.batch_ms = self.config["audio"].get("batch_ms", 60)
+
+        if worker is None:
+            # Pool con un recognizer de repuesto ya listo: los cambios de slide no construyen nada
+            self.recognizer_pool = RecognizerPool(self.model, 16000, configure=lean_recognizer)
+            self.audio_ring = AudioRing(frame_aligned_bytes(2000))
+            self.feeder = WaveformFeeder()
+        else:
+            # El pool y el recognizer viven en el proceso de reconocimiento; el audio va por memoria compartida
+            self.recognizer_pool = None
+            self.audio_ring = worker.ring
+            worker.configure(self.batch_ms)
+            print(f"🧵 Modo multiproceso: Vosk en el proceso {worker.process.pid} "
+                  f"(modelo cargado en {worker.ready_seconds:.1f}s)")
+        self.recognizer = None
+        self._swap_recognizer()
+
+        # Cadena DSP (ganancia, denoise, resample, VAD): se arma en start_listening con la tasa negociada
+        self.pipeline = None
+
+        # Latencia micrófono → slide por etapa
+        self.tracer = LatencyTracer()
+
+        # Comandos a PowerPoint en su propio hilo (backend COM/teclas/fake según config.json)
+        self.decision_trace = None
+        if self.replay:
+            ppt = self.config.get("powerpoint", {})
+            last_slide = max(self.tracker.song_plan.slides)
+            presentation = FakePresentation(last_slide + 1, start=self.tracker.current_slide,
+                                            latency=ppt.get("fake_latency_ms", 0) / 1000)
+            self.slides = SlideController(presentation).start()
+            if decisions_path:
+                self.decision_trace = DecisionTrace(decisions_path, source, presentation)
+        else:
+            self.slides = SlideController.from_config(self.config).start()
+
+        # Slide actual de PowerPoint leído en otro hilo (el loop solo compara un snapshot)
+        print("🔄 Inicializando PowerPointSync...")
+        self.ppt_watcher = PowerPointWatcher.for_controller(self.slides, self.config).start()
+        self.ppt_sync = PowerPointSync(self.tracker, self.ppt_watcher, self.recorder)
+        print(f"🎯 ESTADO FINAL - Tracker slide: {self.tracker.current_slide}, PowerPointSync slide: {self.ppt_sync.last_known_slide}")
+
+        # Métricas de memoria fija (metrics.py), exportables en vivo (sección "metrics" de config.json)
+        self.metrics = REGISTRY
+        self.audio_blocks = self.metrics.counter("audio_blocks_total", "Bloques recibidos de la captura")
+        self.slide_changes = self.metrics.counter("slide_changes_total", "Cambios de slide hechos por el sistema")
+        self.decoded_bytes = self.metrics.counter("decoded_bytes_total", "Bytes de audio que entraron a Vosk")
+        self.decode_seconds = self.metrics.counter("decode_seconds_total", "Tiempo en AcceptWaveform + PartialResult")
+        self.batch_seconds = self.metrics.histogram("batch_processing_seconds", "Lote completo: Vosk + tracker + slide")
+        self.slide_intervals = self.metrics.histogram("slide_interval_seconds", "Tiempo entre cambios de slide",
+                                                      max_value=3600.0)
+        self.last_slide_change_time = None
+        self.metrics.collector(self._collect_metrics)
+        self.metrics_exporter = MetricsExporter.from_config(self.config.get("metrics", {}))
+        self.listening_since = None
+        # Resúmenes que se arman al cerrar (capture, dsp, vad, pool, latencia)
+        self.performance_metrics = {}
 
         print("⚡ Procesador de Audio OPTIMIZADO con controles manuales")
-        print(f"🎯 Configuración: chunk_size={self.chunk_size}, interval={self.processing_interval}")
+        print(f"🎯 Configuración: lote={self.batch_ms} ms ({frame_aligned_bytes(self.batch_ms)} bytes)")
         
-        print("F8 = Forzar siguiente slide | F9 = Reinicio total")
-        keyboard.add_hotkey('f8', lambda: self.force_next_slide())
-        keyboard.add_hotkey('f9', lambda: self.tracker.resetear_a_inicio())
+        if not self.replay:
+            print("F8 = Forzar siguiente slide | F9 = Reinicio total")
+            keyboard.add_hotkey('f8', lambda: self.force_next_slide())
+            keyboard.add_hotkey('f9', lambda: self.reset_to_start())
+
+    def _swap_recognizer(self):
+        """
+        Recognizer limpio para el slide actual (O(1) desde el pool).
+        En modo gramática deja preparando el repuesto con la ventana del slide siguiente.
+        """
+        grammar = next_grammar = None
+        if self.slide_grammar is not None:
+            current = self.tracker.current_slide
+            grammar = self.slide_grammar.grammar_for(current)
+            next_grammar = self.slide_grammar.grammar_for(current + 1)
+            self._grammar_window = self.slide_grammar.window(current)
+
+        self._record("reset")
+        if self.worker is not None:
+            self.worker.reset(grammar, next_grammar)
+            return
+
+        self.recognizer = self.recognizer_pool.acquire(self.recognizer, grammar)
+        if next_grammar is not None:
+            self.recognizer_pool.set_grammar(next_grammar)
+        self.hypothesis.reset()
 
     def _load_config(self):
         try:
@@ -206,70 +356,172 @@ class BalancedAudioProcessor:
                 "audio": {
                     "sample_rate": 16000,
                     "channels": 1,
-                    #"chunk_size": 512,
-                    #"processing_interval": 0.05,
-                    #"sleep_time": 0.01
-                    "chunk_size": 256,
-                    "processing_interval": 0.2, 
-                    "sleep_time": 0.005
+                    "batch_ms": 60,
+                    "idle_timeout": 0.5
                 },
                 "powerpoint": {
                     "advance_key": "pagedown",
-                    "back_key": "pageup"
+                    "back_key": "pageup",
+                    "poll_interval": 0.25
                 }
             }
     
+    def _record(self, event, **fields):
+        """Evento para la grabación de la sesión (solo encola)"""
+        if self.recorder is not None:
+            self.recorder.record(event, **fields)
+
+    def _collect_metrics(self):
+        """Estado que ya vive en otros objetos; se lee solo al exportar"""
+        values = {'ring_overflow_bytes': self.audio_ring.overflow_bytes}
+        capture = getattr(self, 'capture', None)
+        if capture is not None:
+            for key in ('blocks', 'dropped', 'overruns', 'status_flags', 'max_ms'):
+                values[f'capture_{key}'] = capture.stats[key]
+        if self.pipeline is not None:
+            for stage in self.pipeline.stages:
+                values[f'dsp_{stage.name}_ms_total'] = stage.stats['total_ms']
+            if self.pipeline.vad is not None:
+                gate = self.pipeline.vad.gate
+                values['vad_frames'] = gate.stats['frames']
+                values['vad_openings'] = gate.stats['openings']
+                values['vad_skipped_fraction'] = gate.skipped_fraction
+        if self.recognizer_pool is not None:
+            for key in ('swaps', 'misses', 'reset_failures', 'max_swap_ms'):
+                values[f'recognizer_pool_{key}'] = self.recognizer_pool.stats[key]
+        return values
+
+    def _ingest(self, item):
+        """Bloque crudo de la captura → pipeline DSP → ring (en el hilo del loop)"""
+        block, captured_at, callback_at = item
+        start = time.perf_counter()
+        output = self.pipeline.process(block)
+        self.audio_ring.write(output)
+        now = time.perf_counter()
+
+        tracer = self.tracer
+        if captured_at < callback_at:
+            tracer.record("adc", callback_at - captured_at)
+        tracer.record("cola", start - callback_at)
+        tracer.record("dsp", now - start)
+        if len(output):
+            tracer.mark_output(self.audio_ring.written, captured_at, now)
+
+        vad = self.pipeline.vad
+        if vad is None:
+            return
+        if vad.active:
+            if not self._speech:
+                self._speech = True
+                self._record("vad", speech=True)
+            self.tracker.resume_timers()
+        elif self.pipeline.closed:
+            # Terminó la frase: se decodifica lo que quedó, se vacía Vosk y se congelan los timers anti-stuck
+            self._flush_recognizer()
+            self._speech = False
+            self._record("vad", speech=False)
+            self.tracker.pause_timers()
+
+    def _flush_recognizer(self):
+        """Decodifica lo que quedó en el ring y vacía Vosk (fin de frase o fin de la grabación)"""
+        if self.worker is not None:
+            self.worker.flush()
+        else:
+            self._decode_ring(flush=True)
+            self._handle_final(self.recognizer.FinalResult())
+
+    def _finish_source(self):
+        """La grabación terminó: lo último a Vosk, resultados y comandos pendientes, y fin del loop"""
+        self._flush_recognizer()
+        if self.worker is not None:
+            while self.worker.wait(1.0):
+                self._handle_worker_results()
+        self.slides.wait_idle(2.0)
+        elapsed = time.perf_counter() - self.source.started_at
+        audio = self.source.position_seconds
+        print(f"📼 Fin de {self.source.path}: {audio:.1f}s de audio en {elapsed:.1f}s "
+              f"({audio / elapsed if elapsed else 0:.1f}× tiempo real)")
+
+    def _decode_ring(self, flush=False):
+        """Alimenta a Vosk en lotes completos de batch_ms (con flush, también el resto)"""
+        ring = self.audio_ring
+        batch_bytes = self._batch_bytes
+        while _system_running and (ring.available >= batch_bytes or (flush and ring.available)):
+            batch_start = ring.position
+            batch = ring.read(min(batch_bytes, ring.available))
+            self.tracer.batch(batch_start, ring.position)
+            process_start = time.perf_counter()
+
+            # Resultado completo
+            self.decoded_bytes.inc(len(batch))
+            decode_start = time.perf_counter()
+            is_final = self.feeder.accept(self.recognizer, batch)
+            decode_time = time.perf_counter() - decode_start
+            if is_final:
+                self._handle_final(self.recognizer.Result())
+
+            # Resultados parciales (la magia del adelanto)
+            if _system_running:
+                decode_start = time.perf_counter()
+                partial = json.loads(self.recognizer.PartialResult())
+                decode_time += time.perf_counter() - decode_start
+                self.tracer.record("vosk", decode_time)
+                self.decode_seconds.inc(decode_time)
+                partial_text = partial.get('partial', '').strip()
+                new_words = self.hypothesis.feed_partial(partial_text)
+                if new_words is not None:
+                    self._record("partial", text=partial_text)
+                # None = la parcial no cambió → no hay nada que procesar
+                if partial_text and new_words is not None:
+                    self._process_text_for_advance(partial_text, new_words, is_partial=True)
+
+            self.batch_seconds.record(time.perf_counter() - process_start)
+
+    def _handle_worker_results(self):
+        """Modo multiproceso: resultados que ya devolvió el proceso de reconocimiento → tracker"""
+        for kind, text, new_words, position in self.worker.results():
+            self._record(kind, text=text)
+            # En este modo "vosk" = desde que el bloque entró al ring compartido hasta que volvió el resultado
+            if self.tracer.batch(0, position, record_wait=False):
+                self.tracer.record("vosk", time.perf_counter() - self.tracer.current_queued_at)
+            if kind == "final":
+                log.info("texto", "{text}", text=text)
+                self._process_text_for_advance(text, new_words)
+            else:
+                self._process_text_for_advance(text, new_words, is_partial=True)
+
     def _main_loop_with_denoising(self):
         global _system_running
-        last_processing_time = 0
-        audio_buffer = b""
-        buffer_size = 1
+        self._batch_bytes = frame_aligned_bytes(self.batch_ms)
+
+        # Tareas periódicas con su propio reloj (antes: en cada vuelta del loop)
+        self.housekeeping = Housekeeping()
+        if hasattr(self, 'ppt_sync'):
+            # Solo compara el snapshot del watcher (sin COM): puede mirarse seguido
+            self.housekeeping.every(min(self.poll_interval, 0.05), self.ppt_sync.check_current_slide, "powerpoint")
 
         while _system_running and self.is_listening:
             try:
-                current_time = time.time()
+                # Modo gramática: si el slide salió de la ventana (F9, comandos, GotoSlide) se cambia
+                if self.slide_grammar and self.tracker.current_slide not in self._grammar_window:
+                    self._swap_recognizer()
+
+                # Bloquearse hasta que llegue audio o toque una tarea periódica
+                next_task = self.housekeeping.run_due()
+                timeout = self.idle_timeout if next_task is None else min(self.idle_timeout, next_task)
+                # Cada bloque pasa por el pipeline DSP y lo que sale (voz a 16 kHz) va al ring
+                self.audio_blocks.inc(drain_queue(self.audio_queue, self._ingest, timeout))
+
+                # Alimentar a Vosk en lotes completos de batch_ms (alineados a frames de 10 ms)
+                if self.worker is None:
+                    self._decode_ring()
+                else:
+                    self._handle_worker_results()
 
-                # Vaciar la cola lo más rápido posible
-                try:
-                    while not self.audio_queue.empty():
-                        data = self.audio_queue.get_nowait()
-                        audio_buffer += data
-                        self.performance_metrics['audio_captures'] += 1
-                except:
-                    pass
-
-                # Procesar cuando tengamos suficiente audio
-                if (len(audio_buffer) >= self.chunk_size * buffer_size or
-                    current_time - last_processing_time >= self.processing_interval):
-
-                    process_start = time.time()
-
-                    # Resultado completo
-                    if _system_running and self.recognizer.AcceptWaveform(audio_buffer):
-                        result = json.loads(self.recognizer.Result())
-                        text = result.get('text', '').strip()
-                        if text:
-                            print(f"{text}")
-                            self._process_text_for_advance(text)
-
-                    # Resultados parciales (la magia del adelanto)
-                    if _system_running:
-                        partial = json.loads(self.recognizer.PartialResult())
-                        partial_text = partial.get('partial', '').strip()
-                        if partial_text: 
-                            self._process_text_for_advance(partial_text, is_partial=True)
-
-                    audio_buffer = b""
-                    last_processing_time = current_time
-
-                    process_time = time.time() - process_start
-                    self.performance_metrics['processing_times'].append(process_time)
-
-                # Sincronización con PowerPoint
-                if hasattr(self, 'ppt_sync'):
-                    self.ppt_sync.check_current_slide()
-
-                time.sleep(self.sleep_time)
+                # Repetición de una grabación: la fuente terminó y la cola quedó vacía
+                if self.source.finished and self.audio_queue.empty():
+                    self._finish_source()
+                    break
 
             except KeyboardInterrupt:
                 print("\nINTERRUPCIÓN - Cerrando...")
@@ -287,129 +539,122 @@ class BalancedAudioProcessor:
 
 
     def start_listening(self):
-        import sounddevice as sd
-        import webrtcvad
-        import numpy as np
-        import queue
-        from scipy.signal import wiener, resample_poly
-
         print("🔥 Iniciando captura con REDUCCIÓN DE RUIDO WEBRTC + WIENER (¡Más estable que rnnoise!)")
 
         # Cola para audio limpio
         self.audio_queue = queue.Queue(maxsize=100)
         
-        # Inicializar VAD (Voice Activity Detection) de WebRTC
-        self.vad = webrtcvad.Vad(2)  # Nivel agresivo: 3 = detecta solo voz clara
-        
-        # Frame size para VAD (10ms a 48kHz = 480 samples)
+        if self.source is not None:
+            # Grabación: la tasa es la del archivo (el Pipeline resamplea a 16 kHz)
+            self.sample_rate = self.source.sample_rate
+        # Si el micrófono captura nativo a 16 kHz no hace falta resamplear
+        # (salvo con RNNoise en la cadena: solo trabaja a 48 kHz)
+        elif (self.config["audio"].get("prefer_native_rate", True) and
+              "denoise" not in self.config.get("dsp", {}).get("stages", [])):
+            self.sample_rate = negotiate_capture_rate(16000, 48000)
+        else:
+            self.sample_rate = 48000
+
+        # Cadena DSP configurable ("dsp" en config.json), corre en el hilo del loop
+        self.pipeline = Pipeline.from_config(self.config, self.sample_rate)
+        print(f"🎚️ Captura a {self.sample_rate} Hz → DSP: {' → '.join(self.pipeline.names)} → Vosk 16 kHz")
+
+        # Frame size para VAD (10ms a la tasa de captura)
         self.frame_duration = 10  # ms
-        self.sample_rate = 48000
         self.frame_size = int(self.sample_rate * self.frame_duration / 1000)
+        block_size = self.frame_size * 2  # 20ms chunks (múltiplo de 10ms para VAD)
+        if self.source is None:
+            self.source = MicrophoneSource(self.sample_rate, block_size)
+        else:
+            block_size = self.source.block_size
 
-        def resample_audio(audio_np, orig_sr=48000, target_sr=16000):
-            if orig_sr == target_sr:
-                return audio_np
-            ratio = target_sr / orig_sr
-            n_samples = int(len(audio_np) * ratio + 0.5)
-            if n_samples == 0:
-                return audio_np
-            return resample_poly(audio_np.astype(float), n_samples, 1)
-
-        def audio_callback(indata, frames, time_info, status):
-            if status:
-                return
-            
-            # 1. Audio crudo a float32
-            audio_float = indata[:, 0].astype(np.float32) / 32768.0  # [-1, 1]
-            
-            # 2. Normalización de volumen (evita clipping cuando sube de tono)
-            max_val = np.max(np.abs(audio_float))
-            if max_val > 0.01:  # solo si hay señal
-                audio_float = audio_float / max_val * 0.9  # gain suave
-            
-            # 3. Resample perfecto 48kHz → 16kHz con scipy (calidad profesional)
-            audio_16k = resample_poly(audio_float, 16000, 48000)
-            
-            # 4. Convertir a int16 y bytes
-            audio_int16 = (audio_16k * 32767).astype(np.int16)
-            audio_bytes = audio_int16.tobytes()
-            
-            try:
-                self.audio_queue.put_nowait(audio_bytes)
-            except queue.Full:
-                pass
-
-        # Stream a 48kHz (mejor para VAD/Wiener)
-        self.stream = sd.InputStream(
-            samplerate=48000,
-            blocksize=960,  # 20ms chunks (múltiplo de 10ms para VAD)
-            dtype='int16',
-            channels=1,
-            callback=audio_callback
-        )
-        self.stream.start()
+        # Callback mínimo: copia a un slot preasignado y encola (deadline y bloques perdidos medidos)
+        self.capture = CaptureCallback(self.audio_queue, self.sample_rate, block_size)
+
+        # Micrófono a la tasa negociada, o la grabación (a ritmo real o sin esperas:
+        # en ese modo la fuente espera mientras el loop tenga bloques sin procesar)
+        self.source.start(self.capture, throttle=lambda: self.audio_queue.qsize() >= 2)
+        self.listening_since = time.perf_counter()
+        # Desde acá los mensajes del camino caliente los escribe un hilo de fondo
+        self.logging = setup_logging(self.config.get("logging"))
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.start()
+            print(f"📈 Métricas en vivo: {self.metrics_exporter.path} (cada {self.metrics_exporter.interval:.0f}s)")
 
         print("🎤 REDUCCIÓN DE RUIDO ACTIVA - ¡Solo voz clara, adiós batería y eco!")
         print("   (Prueba: pon música fuerte y habla → solo te oye a ti)")
         print("Presiona Ctrl+C para detener")
 
-        self._main_loop_with_denoising()
-
-    def _process_text_for_advance(self, text, is_partial=False):
-        """Procesa texto (completo o parcial) y decide si avanzar slide"""
+        try:
+            self._main_loop_with_denoising()
+        finally:
+            self.stop_listening()
+
+    def _handle_final(self, result_json):
+        """Resultado completo de Vosk → tracker (solo las palabras que no llegaron por parciales)"""
+        text = json.loads(result_json).get('text', '').strip()
+        new_words = self.hypothesis.feed_final(text)
+        self._record("final", text=text)
+        if text:
+            log.info("texto", "{text}", text=text)
+            self._process_text_for_advance(text, new_words)
+
+    def _process_text_for_advance(self, text, new_words, is_partial=False):
+        """
+        Procesa texto (completo o parcial) y decide si avanzar slide.
+        text = hipótesis completa (para comandos de voz),
+        new_words = solo las palabras que el tracker todavía no vio.
+        """
         if not _system_running:
             return
 
         # Comandos de voz primero
-        if self._process_commands_and_tracking(text):
+        if self._process_commands_and_tracking(text, new_words):
             return
 
-        # Procesar con el tracker
-        result = self.tracker.process_recognized_text(text)
+        if not new_words:
+            return
+
+        # Procesar con el tracker SOLO lo nuevo
+        tracker_start = time.perf_counter()
+        result = self.tracker.process_recognized_text(' '.join(new_words))
+        self.tracer.record("tracker", time.perf_counter() - tracker_start)
+        self._record("tracker", result=result, slide=self.tracker.current_slide,
+                     index=self.tracker.current_word_index)
         
         if result == "CHANGE_SLIDE":
-            tag = " (PARCIAL)" if is_partial else ""
-            print(f"🚨 ¡CAMBIO DE SLIDE!{tag}")
+            log.info("cambio_slide", "🚨 ¡CAMBIO DE SLIDE!{tag}", tag=" (PARCIAL)" if is_partial else "",
+                     slide=self.tracker.current_slide)
+            self.tracer.decided()
             self._change_slide()
+        elif result == "GOTO_SLIDE":
+            self.tracer.decided()
+            self._relocate_slide(self.tracker.last_relocation)
+        self.tracer.forget_decision()
 
-
-    def stop_listening(self):
-        global _system_running
-        _system_running = False
-        self.is_listening = False
-
-        print("🛑 Cerrando recursos de audio...")
-        try:
-            if hasattr(self, 'stream'):
-                self.stream.stop()
-                self.stream.close()
-            if hasattr(self, 'vad'):
-                del self.vad  # Limpia VAD
-        except:
-            pass
-
-        self._print_performance_summary()
-        print("Sistema detenido correctamente")
-
-
-
-        
-    def _process_commands_and_tracking(self, text):
+    def _process_commands_and_tracking(self, text, new_words):
         if not hasattr(self, '_last_command_time'):
-            self._last_command_time = 0
-            
-        current_time = time.time()
+            self._last_command_time = float('-inf')
+
+        current_time = self.tracker.clock.now()
         
         if current_time - self._last_command_time < 2.0:
             return False
             
         if self._check_special_commands(text):
+            self._record("voice", text=text, slide=self.tracker.current_slide)
             self._last_command_time = current_time
             return True
         
-        if self._detect_early_transition(text):
-            print("🎯 Detección temprana ACTIVADA!")
+        if new_words and self._detect_early_transition(' '.join(new_words)):
+            log.info("deteccion_temprana", "🎯 Detección temprana ACTIVADA!")
+            slide = self.tracker.current_slide
+            self._record("early", slide=slide)
+            self.tracer.decided()
             self._change_slide()
+            self.tracer.forget_decision()
+            if self.tracker.current_slide != slide:
+                self._record("sync", source="early", slide=self.tracker.current_slide)
             self._last_command_time = current_time
             return True
             
@@ -423,24 +668,24 @@ class BalancedAudioProcessor:
             return False
 
         if any(cmd in text_lower for cmd in ["repetir", "otra vez", "repite"]):
-            print("🔄 Comando: REPETIR")
+            log.info("comando", "🔄 Comando: REPETIR", command="repetir")
             self._go_back_slide()
             return True
 
         elif any(cmd in text_lower for cmd in ["atrás", "volver", "anterior", "retrocede"]):
-            print("🔙 Comando: VOLVER")
+            log.info("comando", "🔙 Comando: VOLVER", command="volver")
             self._go_back_slide()
             return True
 
         elif any(cmd in text_lower for cmd in ["empezar", "inicio", "principio", "slide 1", "primero"]):
-            print("🏁 Comando: INICIO")
+            log.info("comando", "🏁 Comando: INICIO", command="inicio")
             self._go_to_slide(1)
             return True
 
         elif "slide" in text_lower:
             slide_num = self._extract_slide_number(text_lower)
             if slide_num and 1 <= slide_num <= 5:
-                print(f"🎯 Comando: IR AL SLIDE {slide_num}")
+                log.info("comando", "🎯 Comando: IR AL SLIDE {slide}", command="ir_al_slide", slide=slide_num)
                 self._go_to_slide(slide_num)
                 return True
 
@@ -454,18 +699,17 @@ class BalancedAudioProcessor:
         if self.tracker.is_current_slide_duplicated():
             return False
 
-        current_slide_words = self.tracker.get_current_slide_text()
-        if not current_slide_words:
+        plan = self.tracker.plan
+        if not plan.words:
             return False
                 
-        progress_ratio = self.tracker.current_word_index / len(current_slide_words)
-        if progress_ratio >= 0.75:
+        if self.tracker.current_word_index >= plan.early_transition_at:
             text_words = text.lower().split()
-            slide_final_words = current_slide_words[-2:]  # más estable que 4
+            slide_final_words = plan.tail_words  # últimas 2 palabras, precalculadas
                 
             for word in text_words:
                 if word in slide_final_words:
-                    print(f"🎯 Palabra final detectada: '{word}'")
+                    log.debug("palabra_final", "🎯 Palabra final detectada: '{word}'", word=word)
                     return True
                         
         return False
@@ -476,26 +720,38 @@ class BalancedAudioProcessor:
         numbers = re.findall(r'\d+', text)
         return int(numbers[0]) if numbers else None
 
+    def _slide_commanded(self, decision, slide_before):
+        """
+        Callback del SlideController (corre en su hilo): latencia del comando y
+        mic→slide; si falló, el tracker (que ya avanzó) se resincroniza desde el loop
+        """
+        def done(seconds, ok):
+            if ok:
+                self.tracer.commanded(seconds, decision)
+            else:
+                self.ppt_sync.command_failed(slide_before)
+        return done
+
     def _change_slide(self):
         if self.manual_control_active:
             return
         try:
             self.manual_control_active = True
-            pythoncom.CoInitialize()
-            app = win32com.client.Dispatch("PowerPoint.Application")
-            view = app.ActivePresentation.SlideShowWindow.View
-            
             next_slide_num = self.tracker.current_slide + 1
-            next_key = f"slide_{next_slide_num}"
-            if next_key not in self.tracker.lyrics_data:
+            if not self.tracker.has_slide(next_slide_num):
                 if not self.song_finished:
-                    print("¡CANCIÓN TERMINADA! Gracias Jesús")
+                    log.info("cancion_terminada", "¡CANCIÓN TERMINADA! Gracias Jesús")
                     self.song_finished = True
                     self._go_to_black_slide()
                 return  # ¡No avanzar nunca más!
 
-            view.Next()
-            print("SLIDE AVANZADO CON COM → 100% garantizado")
+            # El comando lo ejecuta el hilo de slides (COM con respaldo de teclas): el loop no espera a PowerPoint
+            done = self._slide_commanded(self.tracer.take_decision(), self.tracker.current_slide)
+            if not self.slides.next(on_done=done):
+                self.ppt_sync.command_failed(self.tracker.current_slide)     # cola llena: no se va a ejecutar
+            self.ppt_sync.expect(next_slide_num)
+            self._record("command", command="next", slide=next_slide_num)
+            log.info("slide_avanzado", "SLIDE AVANZADO → comando enviado ({backend})", backend=self.slides.backend.name)
 
             # Actualizamos el tracker (esto recarga el slide limpio)
             self.tracker.next_slide()
@@ -509,85 +765,67 @@ class BalancedAudioProcessor:
                     cleared_chunks += 1
                 except queue.Empty:
                     break
+            self.audio_ring.clear()
             if cleared_chunks > 0:
-                print(f"BUFFER AUDIO LIMPIADO → {cleared_chunks} chunks residuales descartados")
+                log.debug("buffer_limpiado", "BUFFER AUDIO LIMPIADO → {chunks} chunks residuales descartados",
+                          chunks=cleared_chunks)
 
             # 2. Reiniciamos completamente el recognizer de Vosk para limpiar su estado interno
             #    (Vosk guarda contexto de ~0.5s para mejorar precisión, pero eso causa "mezcla")
-            self.recognizer = vosk.KaldiRecognizer(self.model, 16000)
-            self.recognizer.SetWords(False)
-            self.recognizer.SetPartialWords(False)
-            print("VOSK REINICIADO → Estado interno limpio, listo para nuevo slide")
+            #    El pool entrega el repuesto ya limpio en O(1) y recicla el usado en segundo plano
+            self._swap_recognizer()
+            if self.worker is None:
+                log.debug("vosk_reiniciado", "VOSK REINICIADO → Estado interno limpio ({ms:.2f} ms)",
+                          ms=self.recognizer_pool.stats['last_swap_ms'])
+            else:
+                log.debug("vosk_reiniciado", "VOSK REINICIADO → pedido al proceso de reconocimiento")
             # ============================================================================
 
-            self.performance_metrics['slide_changes'] += 1
-            self.performance_metrics['last_slide_change_time'] = time.time()
-
-        except Exception as e:
-            # === Backup con tecla si COM falla ===
-            try:
-                next_slide_num = self.tracker.current_slide + 1
-                next_key = f"slide_{next_slide_num}"
-                if next_key in self.tracker.lyrics_data:
-                    pyautogui.press('right')
-                    pyautogui.press('right')
-                    self.tracker.next_slide()
-                    print("Backup: avanzado con tecla right")
-
-                    # === APLICAMOS LA MISMA LIMPIEZA EN EL BACKUP ===
-                    cleared_chunks = 0
-                    while not self.audio_queue.empty():
-                        try:
-                            self.audio_queue.get_nowait()
-                            cleared_chunks += 1
-                        except queue.Empty:
-                            break
-                    if cleared_chunks > 0:
-                        print(f"BUFFER AUDIO LIMPIADO (backup) → {cleared_chunks} chunks descartados")
-
-                    self.recognizer = vosk.KaldiRecognizer(self.model, 16000)
-                    self.recognizer.SetWords(False)
-                    self.recognizer.SetPartialWords(False)
-                    print("VOSK REINICIADO (backup)")
-                    # ===============================================
+            self.slide_changes.inc()
+            now = self.tracker.clock.now()
+            if self.last_slide_change_time is not None:
+                self.slide_intervals.record(now - self.last_slide_change_time)
+            self.last_slide_change_time = now
+        finally:
+            self.manual_control_active = False
 
-                else:
-                    if not self.song_finished:
-                        print("¡CANCIÓN TERMINADA! Gracias Jesús")
-                        self.song_finished = True
-                        self._go_to_black_slide()
-            except Exception as backup_e:
-                print(f"No se pudo avanzar (ni COM ni backup): {backup_e}")
+    def _relocate_slide(self, decision):
+        """Salta directo (GotoSlide) al slide donde el índice de n-gramas ubicó al cantante"""
+        if self.manual_control_active or decision is None:
+            return
+        try:
+            self.manual_control_active = True
+            done = self._slide_commanded(self.tracer.take_decision(), self.tracker.current_slide)
+            if not self.slides.goto(decision.slide, on_done=done):
+                self.ppt_sync.command_failed(self.tracker.current_slide)
+            self._record("command", command="goto", slide=decision.slide, position=decision.position)
+            log.info("reubicado", "🧭 REUBICADO → Slide {slide}", slide=decision.slide)
+
+            self.tracker.jump_to(decision.slide, decision.position)
+            self.song_finished = False
+            self.ppt_sync.expect(decision.slide)
+            self.slide_changes.inc()
         finally:
             self.manual_control_active = False
 
     def _go_to_black_slide(self):
-        """Va al slide negro final (o crea uno si no existe)"""
-        try:
-            pythoncom.CoInitialize()
-            app = win32com.client.Dispatch("PowerPoint.Application")
-            pres = app.ActivePresentation
-            total_slides = pres.Slides.Count
-            
-            # Si tienes un slide negro al final (ej. slide 10), ve ahí:
-            black_slide_index = total_slides  # o pon 10, 20, etc.
-            pres.SlideShowWindow.View.GotoSlide(black_slide_index)
-            print("FONDO NEGRO activado")
-        except:
-            # Si no hay slide negro, al menos sale del último
-            try:
-                pyautogui.press('b')  # Tecla B = pantalla negra en PowerPoint
-                print("Pantalla negra activada (tecla B)")
-            except:
-                pass
+        """Va al slide negro final (el último de la presentación; con teclas, B = pantalla negra)"""
+        self.slides.black()
+        self._record("command", command="black")
+        log.info("fondo_negro", "FONDO NEGRO activado")
+
     def _go_back_slide(self):
         if self.manual_control_active or not self.tracker:
             return
         try:
             self.manual_control_active = True
-            self.tracker.previous_slide()        # ← Usa el nuevo método
-            pyautogui.press('left')              # o 'pageup' según tu config
-            print(f"RETROCESO MANUAL → Slide {self.tracker.current_slide}")
+            moved = self.tracker.previous_slide()        # ← Usa el nuevo método
+            self.slides.previous()
+            self.ppt_sync.expect(self.tracker.current_slide)
+            self._record("command", command="previous", slide=self.tracker.current_slide)
+            if moved:
+                self._record("sync", source="voice", command="previous", slide=self.tracker.current_slide)
+            log.info("retroceso", "RETROCESO MANUAL → Slide {slide}", slide=self.tracker.current_slide)
         finally:
             self.manual_control_active = False
 
@@ -595,29 +833,30 @@ class BalancedAudioProcessor:
         """F8 → Avanza manualmente (tú controlas)"""
         if not self.tracker:
             return
-        print("AVANCE MANUAL (F8) → Forzando siguiente slide")
+        log.info("avance_manual", "AVANCE MANUAL (F8) → Forzando siguiente slide")
         self.tracker.next_slide()         
         self._change_slide()               
+        self._record("sync", source="f8", slide=self.tracker.current_slide)
+
+    def reset_to_start(self):
+        """F9 → el tracker vuelve al inicio de la canción"""
+        self.tracker.resetear_a_inicio()
+        self._record("sync", source="f9", slide=self.tracker.current_slide)
+
     def _go_to_slide(self, slide_number):
         if not self.tracker:
             return
-            
-        try:
-            current = self.tracker.current_slide
-            if slide_number != current:
-                steps = abs(slide_number - current)
-                key = 'left' if slide_number < current else 'right'
-
-                for _ in range(steps):
-                    pyautogui.press(key)
-                    time.sleep(0.1)
 
-                self.tracker.current_slide = slide_number
-                self.tracker.current_word_index = 0
-                print(f"🎯 Yendo al Slide {slide_number}")
-
-        except Exception as e:
-            print(f"❌ Error yendo al slide: {e}")
+        current = self.tracker.current_slide
+        if slide_number != current:
+            # GotoSlide directo (antes: una tecla + 100 ms por cada slide de distancia)
+            self.slides.goto(slide_number)
+            self.ppt_sync.expect(slide_number)
+            self._record("command", command="goto", slide=slide_number)
+            self.tracker.current_slide = slide_number
+            self.tracker.current_word_index = 0
+            self._record("sync", source="voice", command="goto", slide=slide_number)
+            log.info("ir_al_slide", "🎯 Yendo al Slide {slide}", slide=slide_number)
 
 
 
@@ -627,23 +866,66 @@ class BalancedAudioProcessor:
         print("="*50)
 
         metrics = self.performance_metrics
-        total_time = metrics['total_processing_time']
+        total_time = time.perf_counter() - self.listening_since if self.listening_since else 0.0
         print(f"⏱️ Tiempo total: {total_time:.2f}s")
-        print(f"🎤 Capturas de audio: {metrics['audio_captures']}")
-        print(f"🔄 Cambios de slide: {metrics['slide_changes']}")
-
-        if metrics['slide_times']:
-            avg_slide_time = sum(metrics['slide_times']) / len(metrics['slide_times'])
-            min_slide_time = min(metrics['slide_times'])
-            max_slide_time = max(metrics['slide_times'])
-
-            print(f"📈 Tiempo promedio entre slides: {avg_slide_time:.2f}s")
-            print(f"🚀 Tiempo mínimo: {min_slide_time:.2f}s")
-            print(f"🐌 Tiempo máximo: {max_slide_time:.2f}s")
-
-        if metrics['processing_times']:
-            avg_process = sum(metrics['processing_times']) / len(metrics['processing_times'])
-            print(f"⚡ Procesamiento promedio: {avg_process:.3f}s")
+        print(f"🎤 Capturas de audio: {self.audio_blocks.value}")
+        print(f"🔄 Cambios de slide: {self.slide_changes.value}")
+
+        if self.slide_intervals.count:
+            print(f"📈 Tiempo promedio entre slides: {self.slide_intervals.mean:.2f}s")
+            print(f"🚀 Tiempo mínimo: {self.slide_intervals.min:.2f}s")
+            print(f"🐌 Tiempo máximo: {self.slide_intervals.max:.2f}s")
+
+        if self.batch_seconds.count:
+            print(f"⚡ Procesamiento promedio: {self.batch_seconds.mean:.3f}s "
+                  f"(p95 {self.batch_seconds.percentile(0.95) * 1000:.1f} ms)")
+
+        capture = metrics.get('capture')
+        if capture and capture['blocks']:
+            print(f"🎙️ Callback de audio: {capture['blocks']} bloques, promedio {capture['avg_ms']:.3f} ms, "
+                  f"máx {capture['max_ms']:.3f} ms (deadline {capture['deadline_ms']:.0f} ms)")
+            print(f"   Overruns: {capture['overruns']} | Descartados (cola llena): {capture['dropped']} | "
+                  f"Status: {capture['status_flags']} (overflow {capture['input_overflow']}, "
+                  f"underflow {capture['input_underflow']})")
+
+        if metrics.get('latency'):
+            print("⏱️ Latencia micrófono → slide por etapa:")
+            for line in metrics['latency']:
+                print(line)
+
+        if metrics.get('dsp'):
+            print("🎚️ Pipeline DSP (costo por etapa):")
+            for line in metrics['dsp']:
+                print(line)
+
+        vad = metrics.get('vad')
+        if vad and vad['frames']:
+            decoded_seconds = self.decoded_bytes.value / 32000
+            skipped_seconds = vad['frames'] * vad['frame_ms'] / 1000 * vad['skipped_fraction']
+            cost = self.decode_seconds.value / decoded_seconds if decoded_seconds else 0.0
+            print(f"🗣️ VAD: {vad['skipped_fraction']:.0%} del audio sin decodificar ({skipped_seconds:.1f}s), "
+                  f"{vad['openings']} frases")
+            print(f"   CPU ahorrada estimada: {skipped_seconds * cost:.2f}s "
+                  f"({cost * 1000:.1f} ms de decodificación por segundo de audio)")
+
+        if metrics.get('ring_overflow_bytes'):
+            print(f"⚠️ Audio descartado por ring lleno: {metrics['ring_overflow_bytes'] / 32000:.2f}s")
+        slides = metrics.get('slides')
+        if slides and slides['commands']:
+            print(f"🖥️ Comandos de slide: {slides['commands']} (p95 {slides['command_ms_p95']:.1f} ms), "
+                  f"fallidos: {slides['failed']}, por respaldo: {slides['fallbacks']}, descartados: {slides['dropped']}")
+        watch = metrics.get('powerpoint_watch')
+        if watch and watch['failures']:
+            print(f"⚠️ Consultas a PowerPoint fallidas: {watch['failures']} de {watch['polls']}")
+        if metrics.get('log_dropped'):
+            print(f"⚠️ Mensajes de log descartados (cola llena): {metrics['log_dropped']}")
+
+        pool = metrics.get('recognizer_pool')
+        if pool and pool['swaps'] > 1:
+            print(f"♻️ Recognizer pool: {pool['swaps']} swaps, promedio {pool['avg_swap_ms']:.2f} ms, "
+                  f"máx {pool['max_swap_ms']:.2f} ms, sin repuesto {pool['misses']}, "
+                  f"Reset() {pool['resets']} / fallos {pool['reset_failures']}, "
+                  f"cambios de gramática {pool['grammar_swaps']}")
 
         print("="*50)
 
@@ -654,15 +936,57 @@ class BalancedAudioProcessor:
 
         print("Cerrando recursos de audio...")
         try:
-            if hasattr(self, 'stream'):
-                self.stream.stop()
-                self.stream.close()
+            if self.source is not None:
+                self.source.stop()
             if hasattr(self, 'denoiser'):
                 # Forzar limpieza limpia para evitar el warning
                 self.denoiser = None
         except:
             pass
 
+        if hasattr(self, 'capture'):
+            self.performance_metrics['capture'] = self.capture.summary()
+        self.performance_metrics['ring_overflow_bytes'] = self.audio_ring.overflow_bytes
+        self.performance_metrics['latency'] = self.tracer.report()
+        if self.pipeline is not None:
+            self.performance_metrics['dsp'] = self.pipeline.report()
+            if self.pipeline.vad is not None:
+                gate = self.pipeline.vad.gate
+                self.performance_metrics['vad'] = dict(
+                    gate.stats,
+                    frame_ms=gate.frame_ms,
+                    skipped_fraction=gate.skipped_fraction,
+                )
+        if self.worker is not None:
+            health = self.worker.close()
+            self.decoded_bytes.inc(health.get('decoded_bytes', 0))
+            self.decode_seconds.inc(health.get('decode_time', 0.0))
+            if 'recognizer_pool' in health:
+                self.performance_metrics['recognizer_pool'] = health['recognizer_pool']
+        elif self.recognizer_pool is not None:
+            self.performance_metrics['recognizer_pool'] = self.recognizer_pool.health()
+            self.recognizer_pool.close()
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.stop()
+        self.performance_metrics['slides'] = self.slides.close()
+        self.performance_metrics['powerpoint_watch'] = self.ppt_watcher.close()
+        if getattr(self, 'logging', None) is not None:
+            self.performance_metrics['log_dropped'] = self.logging.dropped
+        # Escribe lo que quedó en la cola antes del resumen (que va por print)
+        shutdown_logging()
+        if self.decision_trace is not None:
+            self.decision_trace.close()
+            print(f"📝 {self.decision_trace.count} decisiones de slide en {self.decision_trace.path}")
+        if self.replay:
+            self.source.close()
+        if self.recorder is not None:
+            recording = self.recorder.close()
+            self.performance_metrics['recording'] = recording
+            print(f"🎙️ Sesión grabada: {recording['events']} eventos en {recording['files']} archivo(s), "
+                  f"último {recording['path']}")
+            if recording['dropped'] or recording['errors']:
+                print(f"⚠️ Grabación: {recording['dropped']} eventos descartados, {recording['errors']} errores de escritura")
+
         self._print_performance_summary()
         print("Sistema detenido correctamente")
 
@@ -722,7 +1046,37 @@ def main():
     
     parser = argparse.ArgumentParser(description='Sistema de Seguimiento de Letras para PowerPoint')
     parser.add_argument('--song', '-s', help='Archivo JSON de la canción a usar')
+    parser.add_argument('--prefetch-model', action='store_true',
+                        help='Leer el directorio del modelo al page cache antes de cargarlo')
+    parser.add_argument('--multiprocess', action='store_true',
+                        help='Decodificar con Vosk en un proceso aparte (audio por memoria compartida)')
+    parser.add_argument('--wav', help='Repetir una grabación WAV en vez del micrófono (slides en una presentación falsa)')
+    parser.add_argument('--fast', action='store_true',
+                        help='Con --wav: tan rápido como dé la CPU en vez de a ritmo real')
+    parser.add_argument('--decisions', help='Con --wav: archivo JSONL para las decisiones de slide')
     args = parser.parse_args()
+
+    source = None
+    if args.wav:
+        source = WavFileSource(args.wav, realtime=not args.fast)
+        print(f"📼 Grabación: {args.wav} ({source.duration:.1f}s a {source.sample_rate} Hz, "
+              f"{'sin esperas' if args.fast else 'ritmo real'})")
+
+    # version antigua pero buena.
+    model_path = "models/vosk-model-es-0.42/vosk-model-es-0.42" 
+    #model_path = "models/modelo_cristiano_final"
+
+    # ✅ ARRANQUE EN PARALELO: el modelo empieza a cargar YA (mientras se elige la canción)
+    startup = StartupTasks()
+    if args.multiprocess:
+        # El proceso de reconocimiento carga su propio modelo
+        worker = RecognitionWorker(model_path, prefetch=args.prefetch_model)
+        startup.start("modelo", worker.start)
+    else:
+        startup.start("modelo", load_model, model_path, prefetch=args.prefetch_model)
+    if source is None:
+        startup.start("powerpoint", probe_powerpoint)
+        startup.start("audio", probe_audio_input)
     
     # ✅ SELECCIÓN POR ARGUMENTO O INTERACTIVA
     if args.song:
@@ -745,8 +1099,10 @@ def main():
                 print(f"   - {song}")
         return
     
-    # ✅ CARGAR LA CANCIÓN SELECCIONADA (SOLO UNA VEZ)
+    # ✅ CARGAR LA CANCIÓN SELECCIONADA (SOLO UNA VEZ) y compilarla en paralelo al modelo
     lyrics_data = load_lyrics_data(selected_song)
+    if lyrics_data:
+        startup.start("letras", create_tracker, lyrics_data, SourceClock(source) if source is not None else None)
     
     if not lyrics_data:
         print(f"ERROR: No se pudo cargar {selected_song}")
@@ -790,38 +1146,55 @@ def main():
     print(f"🎯 Rango de slides: {min(available_slides)} a {max(available_slides)}")
     
     # ✅ ADVERTENCIA SI POWERPOINT ESTÁ EN UN SLIDE QUE NO EXISTE
-    try:
-        import win32com.client
-        pythoncom.CoInitialize()
-        app = win32com.client.Dispatch("PowerPoint.Application")
-        presentation = app.ActivePresentation
-        ppt_slide = presentation.SlideShowWindow.View.Slide.SlideIndex
+    # (al repetir una grabación la presentación es falsa y no hay micrófono: nada que verificar)
+    if source is None:
+        try:
+            ppt_slide = startup.result("powerpoint")
         
-        if ppt_slide not in available_slides:
-            print(f"\n⚠️ ADVERTENCIA: PowerPoint está en slide {ppt_slide}, pero este slide NO existe en el JSON")
-            print(f"   → Los slides disponibles son: {sorted(available_slides)}")
-            print(f"   → Por favor, coloca PowerPoint en el slide {min(available_slides)}")
-            print(f"   → Presiona Enter para continuar (el sistema ajustará automáticamente) o Ctrl+C para salir")
-            input()
+            if ppt_slide not in available_slides:
+                import pythoncom
+                import win32com.client
+                pythoncom.CoInitialize()
+                app = win32com.client.Dispatch("PowerPoint.Application")
+                presentation = app.ActivePresentation
+                print(f"\n⚠️ ADVERTENCIA: PowerPoint está en slide {ppt_slide}, pero este slide NO existe en el JSON")
+                print(f"   → Los slides disponibles son: {sorted(available_slides)}")
+                print(f"   → Por favor, coloca PowerPoint en el slide {min(available_slides)}")
+                print(f"   → Presiona Enter para continuar (el sistema ajustará automáticamente) o Ctrl+C para salir")
+                input()
             
-            try:
-                target_slide = min(available_slides)
-                presentation.SlideShowWindow.View.GotoSlide(target_slide)
-                print(f"✅ PowerPoint movido al slide {target_slide}")
-            except Exception as e:
-                print(f"⚠️ No se pudo mover PowerPoint: {e}")
-                print(f"   → Por favor, mueve manualmente PowerPoint al slide {min(available_slides)}")
+                try:
+                    target_slide = min(available_slides)
+                    presentation.SlideShowWindow.View.GotoSlide(target_slide)
+                    print(f"✅ PowerPoint movido al slide {target_slide}")
+                except Exception as e:
+                    print(f"⚠️ No se pudo mover PowerPoint: {e}")
+                    print(f"   → Por favor, mueve manualmente PowerPoint al slide {min(available_slides)}")
                 
-    except Exception as e:
-        print(f"⚠️ No se pudo verificar el slide actual de PowerPoint: {e}")
-        print("   → Asegúrate de que PowerPoint esté abierto en modo presentación")
-    # version antigua pero buena.
-    model_path = "models/vosk-model-es-0.42/vosk-model-es-0.42" 
-    #model_path = "models/modelo_cristiano_final"
+        except Exception as e:
+            print(f"⚠️ No se pudo verificar el slide actual de PowerPoint: {e}")
+            print("   → Asegúrate de que PowerPoint esté abierto en modo presentación")
+
+        try:
+            audio_device, audio_rate = startup.result("audio")
+            print(f"🎤 Micrófono: {audio_device} (captura a {audio_rate} Hz)")
+        except Exception as e:
+            print(f"⚠️ No se pudo verificar el micrófono: {e}")
 
-    
     try:
-        processor = BalancedAudioProcessor(model_path, lyrics_data)
+        tracker = startup.result("letras")
+        if not startup.tasks["modelo"].done:
+            print("⏳ Esperando el modelo de Vosk...")
+        if args.multiprocess:
+            processor = BalancedAudioProcessor(model_path, lyrics_data, tracker=tracker,
+                                               worker=startup.result("modelo"),
+                                               source=source, decisions_path=args.decisions,
+                                               song_path=selected_song)
+        else:
+            processor = BalancedAudioProcessor(model_path, lyrics_data, model=startup.result("modelo"),
+                                               tracker=tracker, source=source, decisions_path=args.decisions,
+                                               song_path=selected_song)
+        startup.report()
         processor.start_listening()
         
     except Exception as e:
@@ -0,0 +1,114 @@
+"""
+Benchmark: tamaño de lote de AcceptWaveform vs. latencia y CPU.
+
+Decodifica la misma grabación (WAV 16 kHz mono) con distintos tamaños de
+lote, como lo hace el loop principal (AcceptWaveform + PartialResult por
+lote, alimentando memoryviews del AudioRing). Para cada lote reporta:
+  - CPU: tiempo de CPU por segundo de audio (% de un núcleo)
+  - latencia media ≈ espera media del lote (batch/2) + decodificación p50
+  - latencia p95   ≈ lote completo + decodificación p95
+
+    python bench_batching.py --model vosk-model-es-0.42 --wav ensayo.wav --batches 10 20 40 60 100 200
+    python bench_batching.py ... --plot batching.png     (requiere matplotlib)
+
+El valor elegido va en config.json → audio.batch_ms.
+"""
+import argparse
+import json
+import time
+
+import vosk
+
+from bench_grammar import read_wav
+from ring_buffer import AudioRing, WaveformFeeder, frame_aligned_bytes
+
+
+def run_batch(model, audio, batch_ms):
+    recognizer = vosk.KaldiRecognizer(model, 16000)
+    recognizer.SetWords(False)
+    feeder = WaveformFeeder()
+    batch_bytes = frame_aligned_bytes(batch_ms)
+    ring = AudioRing(max(batch_bytes * 4, frame_aligned_bytes(2000)))
+    block = frame_aligned_bytes(20)      # el callback entrega bloques de 20 ms
+
+    call_times = []
+    cpu_start = time.process_time()
+    for offset in range(0, len(audio), block):
+        ring.write(audio[offset:offset + block])
+        while ring.available >= batch_bytes:
+            start = time.perf_counter()
+            if feeder.accept(recognizer, ring.read(batch_bytes)):
+                json.loads(recognizer.Result())
+            json.loads(recognizer.PartialResult())
+            call_times.append(time.perf_counter() - start)
+    recognizer.FinalResult()
+    cpu = time.process_time() - cpu_start
+
+    call_times.sort()
+    p50 = call_times[len(call_times) // 2] * 1000
+    p95 = call_times[int(len(call_times) * 0.95)] * 1000
+    return {
+        "batch_ms": batch_ms,
+        "calls": len(call_times),
+        "cpu": cpu,
+        "call_p50_ms": p50,
+        "call_p95_ms": p95,
+        "latency_ms": batch_ms / 2 + p50,
+        "latency_p95_ms": batch_ms + p95,
+        "zero_copy": feeder.zero_copy,
+    }
+
+
+def plot(results, path):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(7, 4.5))
+    cpu = [r["cpu_pct"] for r in results]
+    latency = [r["latency_ms"] for r in results]
+    ax.plot(cpu, latency, "o-")
+    for r in results:
+        ax.annotate(f"{r['batch_ms']} ms", (r["cpu_pct"], r["latency_ms"]),
+                    textcoords="offset points", xytext=(6, 4))
+    ax.set_xlabel("CPU (% de un núcleo)")
+    ax.set_ylabel("Latencia media estimada (ms)")
+    ax.set_title("Lote de AcceptWaveform: latencia vs. CPU")
+    ax.grid(True, alpha=0.3)
+    fig.tight_layout()
+    fig.savefig(path)
+    print(f"📈 Gráfico guardado en {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", required=True)
+    parser.add_argument("--wav", required=True, help="WAV 16 kHz mono 16 bits")
+    parser.add_argument("--batches", type=int, nargs="+", default=[10, 20, 40, 60, 100, 200])
+    parser.add_argument("--plot", help="guardar gráfico latencia vs. CPU (PNG)")
+    args = parser.parse_args()
+
+    vosk.SetLogLevel(-1)
+    model = vosk.Model(args.model)
+    audio, duration = read_wav(args.wav)
+
+    print(f"🎵 Audio: {duration:.1f}s")
+    print(f"{'lote':>6} {'llamadas':>9} {'CPU %':>7} {'ms/llamada p50':>15} {'p95':>7} "
+          f"{'latencia ms':>12} {'p95':>7}")
+    results = []
+    for batch_ms in args.batches:
+        result = run_batch(model, audio, batch_ms)
+        result["cpu_pct"] = result["cpu"] / duration * 100
+        results.append(result)
+        print(f"{batch_ms:>4}ms {result['calls']:>9} {result['cpu_pct']:>7.1f} "
+              f"{result['call_p50_ms']:>15.2f} {result['call_p95_ms']:>7.2f} "
+              f"{result['latency_ms']:>12.1f} {result['latency_p95_ms']:>7.1f}")
+
+    if not results[0]["zero_copy"]:
+        print("ℹ️ Este binding de Vosk no acepta memoryview: se midió con copia a bytes")
+    if args.plot:
+        plot(results, args.plot)
+
+
+if __name__ == "__main__":
+    main()
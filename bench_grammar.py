@@ -0,0 +1,163 @@
+"""
+Benchmark: Vosk con vocabulario abierto vs. gramática restringida.
+
+Decodifica la misma grabación (WAV 16 kHz mono) tres veces:
+  - abierto: KaldiRecognizer(model, 16000), como hoy
+  - cancion: gramática con TODA la letra + comandos + [unk]
+  - ventana: gramática del slide actual + N siguientes, que se cambia
+             cuando el tracker avanza (como el modo "recognition.grammar")
+y mide factor de tiempo real (RTF), WER contra la letra y % de palabras
+reconocidas que existen en la letra.
+
+    python bench_grammar.py --model vosk-model-es-0.42 --wav ensayo.wav --song mi_cancion_lyrics.json
+
+Nota: los modelos grandes con grafo HCLG estático (p. ej. es-0.42) no
+soportan gramáticas en tiempo de ejecución; Vosk lo avisa y decodifica
+con vocabulario abierto. El modo gramática sirve con modelos "small".
+"""
+import argparse
+import contextlib
+import io
+import json
+import time
+import wave
+
+import vosk
+
+from grammar import SlideGrammar
+from hypothesis_diff import HypothesisDiff
+from lyric_tracker import LyricTracker, load_lyrics_data
+from slide_plan import normalize_text
+
+CHUNK_SECONDS = 0.2
+
+
+def read_wav(path):
+    with wave.open(path, 'rb') as wav:
+        if wav.getnchannels() != 1 or wav.getsampwidth() != 2 or wav.getframerate() != 16000:
+            raise SystemExit("❌ El WAV tiene que ser 16 kHz, mono, 16 bits")
+        frames = wav.readframes(wav.getnframes())
+    return frames, len(frames) / 2 / 16000
+
+
+def word_errors(reference, hypothesis):
+    """Distancia de edición por palabras (sustituciones + borrados + inserciones)"""
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_word in enumerate(reference, 1):
+        current = [i] + [0] * len(hypothesis)
+        for j, hyp_word in enumerate(hypothesis, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1,
+                             previous[j - 1] + (ref_word != hyp_word))
+        previous = current
+    return previous[-1]
+
+
+def decode(model, audio, grammar_for=None, tracker=None):
+    """
+    Decodifica en bloques de CHUNK_SECONDS. Con grammar_for, el recognizer se
+    reconstruye con la gramática del slide actual cada vez que el tracker avanza
+    (en el sistema real eso lo hace el RecognizerPool en segundo plano, así que
+    ese tiempo se reporta aparte y no cuenta para el RTF).
+    """
+    def build():
+        if grammar_for is None:
+            return vosk.KaldiRecognizer(model, 16000)
+        return vosk.KaldiRecognizer(model, 16000, grammar_for(tracker.current_slide if tracker else 1))
+
+    recognizer = build()
+    hypothesis = HypothesisDiff()
+    words = []
+    decode_time = 0.0
+    swap_time = 0.0
+    swaps = 0
+    step = int(16000 * CHUNK_SECONDS) * 2
+
+    def track(new_words):
+        nonlocal recognizer, swap_time, swaps
+        if tracker is None or not new_words:
+            return
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = tracker.process_recognized_text(' '.join(new_words))
+            if result == "CHANGE_SLIDE":
+                tracker.next_slide()
+            elif result == "GOTO_SLIDE":
+                decision = tracker.last_relocation
+                tracker.jump_to(decision.slide, decision.position)
+        if result in ("CHANGE_SLIDE", "GOTO_SLIDE") and grammar_for is not None:
+            start = time.perf_counter()
+            recognizer = build()
+            swap_time += time.perf_counter() - start
+            swaps += 1
+            hypothesis.reset()
+
+    for offset in range(0, len(audio), step):
+        start = time.perf_counter()
+        final = recognizer.AcceptWaveform(audio[offset:offset + step])
+        if final:
+            text = json.loads(recognizer.Result()).get('text', '')
+            new_words = hypothesis.feed_final(text)
+            words.extend(normalize_text(text))
+        else:
+            text = json.loads(recognizer.PartialResult()).get('partial', '')
+            new_words = hypothesis.feed_partial(text)
+        decode_time += time.perf_counter() - start
+        track(new_words)
+
+    start = time.perf_counter()
+    words.extend(normalize_text(json.loads(recognizer.FinalResult()).get('text', '')))
+    decode_time += time.perf_counter() - start
+    return words, decode_time, swap_time, swaps
+
+
+def make_tracker(lyrics_data):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return LyricTracker(lyrics_data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", required=True)
+    parser.add_argument("--wav", required=True, help="WAV 16 kHz mono 16 bits")
+    parser.add_argument("--song", default="lyrics_data.json")
+    parser.add_argument("--reference", help="texto cantado (por defecto, toda la letra)")
+    parser.add_argument("--ahead", type=int, default=3, help="preload_slides_ahead")
+    args = parser.parse_args()
+
+    vosk.SetLogLevel(-1)
+    model = vosk.Model(args.model)
+    audio, duration = read_wav(args.wav)
+    lyrics_data = load_lyrics_data(args.song)
+
+    tracker = make_tracker(lyrics_data)
+    song_words = [w for n in tracker.song_plan.numbers for w in tracker.song_plan.get(n).words]
+    song_vocab = set(song_words)
+    if args.reference:
+        with open(args.reference, 'r', encoding='utf-8') as f:
+            reference = normalize_text(f.read())
+    else:
+        reference = song_words
+
+    window = SlideGrammar(tracker.lyrics_data, ahead=args.ahead)
+    whole_song = SlideGrammar(tracker.lyrics_data, ahead=len(window.numbers))
+    first = window.numbers[0] if window.numbers else 1
+
+    variants = [
+        ("abierto", dict()),
+        ("cancion", dict(grammar_for=lambda _slide: whole_song.grammar_for(first))),
+        ("ventana", dict(grammar_for=window.grammar_for, tracker=make_tracker(lyrics_data))),
+    ]
+
+    print(f"🎵 Audio: {duration:.1f}s | referencia: {len(reference)} palabras | "
+          f"vocabulario de la letra: {len(song_vocab)}")
+    print(f"{'modo':<9} {'RTF':>6} {'WER':>7} {'en letra':>9} {'swaps':>6} {'ms/swap':>8}")
+    for name, options in variants:
+        words, decode_time, swap_time, swaps = decode(model, audio, **options)
+        wer = word_errors(reference, words) / max(1, len(reference))
+        in_lyrics = sum(w in song_vocab for w in words) / max(1, len(words))
+        per_swap = swap_time / swaps * 1000 if swaps else 0.0
+        print(f"{name:<9} {decode_time / duration:>6.3f} {wer:>7.1%} {in_lyrics:>9.1%} "
+              f"{swaps:>6} {per_swap:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
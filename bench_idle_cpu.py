@@ -0,0 +1,124 @@
+"""
+Benchmark: loop con sleep-polling (antes) vs. loop bloqueante (ahora).
+
+Corre cada estrategia con un productor que imita al callback de audio
+(bloques de 20 ms) y un recognizer falso de costo fijo, y mide:
+  - CPU del proceso por segundo de reloj (% de un núcleo)
+  - latencia desde que el bloque entra a la cola hasta que se decodifica
+    (incluye la espera a que se complete el lote de --batch-ms)
+en dos escenarios: "silencio" (el stream no entrega audio, p. ej. en pausa)
+y "audio" (50 bloques/s en tiempo real).
+
+    python bench_idle_cpu.py --seconds 5
+"""
+import argparse
+import queue
+import threading
+import time
+from collections import deque
+
+from housekeeping import Housekeeping
+from ring_buffer import AudioRing, drain_queue, frame_aligned_bytes
+
+BLOCK = frame_aligned_bytes(20)
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def fake_decode(_view):
+    busy(0.0003)                # AcceptWaveform + PartialResult de 60 ms de audio (falso)
+
+
+def fake_powerpoint_poll():
+    busy(0.00005)               # llamada COM SlideShowWindow.View.Slide.SlideIndex (falsa)
+
+
+def producer(audio_queue, stamps, stop, with_audio):
+    if not with_audio:
+        stop.wait()             # stream en pausa: no entra nada
+        return
+    block = bytes(BLOCK)
+    next_at = time.perf_counter()
+    while not stop.is_set():
+        stamps.append(time.perf_counter())
+        audio_queue.put(block)
+        next_at += 0.02
+        time.sleep(max(0.0, next_at - time.perf_counter()))
+
+
+def polling_loop(audio_queue, stamps, stop, latencies, batch_bytes, sleep_time=0.006):
+    """Réplica del loop anterior: sleep fijo, empty()/get_nowait y poll de PowerPoint en cada vuelta"""
+    ring = AudioRing(frame_aligned_bytes(2000))
+    while not stop.is_set():
+        while not audio_queue.empty():
+            ring.write(audio_queue.get_nowait())
+        while ring.available >= batch_bytes:
+            fake_decode(ring.read(batch_bytes))
+            now = time.perf_counter()
+            for _ in range(batch_bytes // BLOCK):
+                latencies.append(now - stamps.popleft())
+        fake_powerpoint_poll()
+        time.sleep(sleep_time)
+
+
+def blocking_loop(audio_queue, stamps, stop, latencies, batch_bytes, idle_timeout=0.5, poll_interval=0.25):
+    """El loop actual: bloqueado en la cola, tareas periódicas con su propio reloj"""
+    ring = AudioRing(frame_aligned_bytes(2000))
+    housekeeping = Housekeeping()
+    housekeeping.every(poll_interval, fake_powerpoint_poll, "powerpoint")
+    while not stop.is_set():
+        next_task = housekeeping.run_due()
+        drain_queue(audio_queue, ring.write, min(idle_timeout, next_task))
+        while ring.available >= batch_bytes:
+            fake_decode(ring.read(batch_bytes))
+            now = time.perf_counter()
+            for _ in range(batch_bytes // BLOCK):
+                latencies.append(now - stamps.popleft())
+
+
+def run(loop, with_audio, seconds, batch_bytes):
+    audio_queue = queue.Queue(maxsize=100)
+    stamps = deque()
+    latencies = []
+    stop = threading.Event()
+    threads = [
+        threading.Thread(target=producer, args=(audio_queue, stamps, stop, with_audio)),
+        threading.Thread(target=loop, args=(audio_queue, stamps, stop, latencies, batch_bytes)),
+    ]
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    cpu = (time.process_time() - cpu_start) / (time.perf_counter() - wall_start)
+    latencies.sort()
+    if latencies:
+        p50 = latencies[len(latencies) // 2] * 1000
+        p95 = latencies[int(len(latencies) * 0.95)] * 1000
+    else:
+        p50 = p95 = float('nan')
+    return cpu * 100, p50, p95
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--batch-ms", type=int, default=60)
+    args = parser.parse_args()
+    batch_bytes = frame_aligned_bytes(args.batch_ms)
+
+    print(f"{'loop':<10} {'escenario':<9} {'CPU %':>7} {'latencia p50 ms':>16} {'p95 ms':>8}")
+    for name, loop in (("polling", polling_loop), ("bloqueante", blocking_loop)):
+        for scenario, with_audio in (("silencio", False), ("audio", True)):
+            cpu, p50, p95 = run(loop, with_audio, args.seconds, batch_bytes)
+            print(f"{name:<10} {scenario:<9} {cpu:>7.2f} {p50:>16.2f} {p95:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
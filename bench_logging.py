@@ -0,0 +1,119 @@
+"""
+Benchmark: print() en el hilo de reconocimiento (antes) vs. log asíncrono (ahora).
+
+Canta la canción completa palabra por palabra a través de
+LyricTracker.process_recognized_text (con cambios de slide) y mide el tiempo
+de cada llamada en tres modos:
+  - sincrónico: cada evento se formatea y se escribe en el hilo que llama,
+    como los print() de antes
+  - asíncrono: el evento se encola sin formatear y lo escribe el hilo de fondo
+  - asíncrono INFO: además los eventos DEBUG (progreso de coro, saltos,
+    limpiezas de buffer) ni siquiera se encolan
+
+La consola se imita con --console-ms de espera por escritura (la consola de
+Windows tarda del orden de 0.1-1 ms por línea); con --stdout se escribe en la
+salida real.
+
+    python bench_logging.py --song lyrics_data.json --repeats 20
+"""
+import argparse
+import contextlib
+import io
+import os
+import time
+
+from event_log import setup_logging, shutdown_logging
+from lyric_tracker import LyricTracker, load_lyrics_data
+
+
+class SlowConsole(io.TextIOBase):
+    """
+    Stream que tarda console_ms por escritura (consola de Windows simulada).
+    Duerme en vez de girar: una escritura real a la consola suelta el GIL.
+    """
+
+    def __init__(self, console_ms):
+        self.delay = console_ms / 1000
+        self.sink = open(os.devnull, "w", encoding="utf-8")
+        self.writes = 0
+
+    def write(self, text):
+        self.sink.write(text)
+        self.writes += 1
+        time.sleep(self.delay)
+        return len(text)
+
+    def flush(self):
+        self.sink.flush()
+
+
+def sing(lyrics_data, repeats):
+    """Tiempos de process_recognized_text cantando la canción repeats veces"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        tracker = LyricTracker(lyrics_data)
+    slides = sorted(tracker.song_plan.slides)
+    first = tracker.current_slide
+    times = []
+    for _ in range(repeats):
+        tracker.jump_to(first)
+        while True:
+            words = list(tracker.plan.words)
+            result = "CONTINUE"
+            for word in words:
+                start = time.perf_counter()
+                result = tracker.process_recognized_text(word)
+                times.append(time.perf_counter() - start)
+                if result == "CHANGE_SLIDE":
+                    break
+            if tracker.current_slide + 1 not in slides:
+                break
+            tracker.next_slide()
+    return times
+
+
+def run(lyrics_data, repeats, mode, stream):
+    level = "INFO" if mode == "asíncrono INFO" else "DEBUG"
+    service = setup_logging({"level": level}, asynchronous=mode != "sincrónico", stream=stream)
+    wall_start = time.perf_counter()
+    times = sing(lyrics_data, repeats)
+    hot = time.perf_counter() - wall_start
+    shutdown_logging()
+    drained = time.perf_counter() - wall_start
+    times.sort()
+    return {
+        'calls': len(times),
+        'us_p50': times[len(times) // 2] * 1e6,
+        'us_p99': times[int(len(times) * 0.99)] * 1e6,
+        'us_max': times[-1] * 1e6,
+        'hot_ms': hot * 1000,
+        'drain_ms': (drained - hot) * 1000,
+        'dropped': service.dropped if service is not None else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--song", default="lyrics_data.json")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--console-ms", type=float, default=0.3, help="Espera simulada por escritura en consola")
+    parser.add_argument("--stdout", action="store_true", help="Escribir en la salida real en vez de simularla")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        lyrics_data = load_lyrics_data(args.song)
+
+    results = []
+    for mode in ("sincrónico", "asíncrono", "asíncrono INFO"):
+        stream = None if args.stdout else SlowConsole(args.console_ms)
+        results.append((mode, run(lyrics_data, args.repeats, mode, stream)))
+
+    print(f"Consola: {'stdout real' if args.stdout else f'simulada, {args.console_ms} ms por escritura'}")
+    print(f"{'modo':<15} {'llamadas':>8} {'p50 µs':>8} {'p99 µs':>9} {'máx µs':>9} "
+          f"{'total ms':>9} {'vaciado ms':>11} {'descart.':>8}")
+    for mode, stats in results:
+        print(f"{mode:<15} {stats['calls']:>8} {stats['us_p50']:>8.1f} {stats['us_p99']:>9.1f} "
+              f"{stats['us_max']:>9.1f} {stats['hot_ms']:>9.1f} {stats['drain_ms']:>11.1f} {stats['dropped']:>8}")
+
+
+if __name__ == "__main__":
+    main()
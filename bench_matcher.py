@@ -0,0 +1,122 @@
+"""
+Benchmark: matcher voraz vs. alineamiento con banda (DP NumPy).
+
+Simula lo que Vosk entrega al tracker (palabras omitidas, insertadas y
+sustituidas) y mide error de posición, avances de más y tiempo por llamada.
+
+    python bench_matcher.py --song lyrics_data.json --trials 200
+"""
+import argparse
+import contextlib
+import io
+import random
+import time
+
+from lyric_tracker import LyricTracker, load_lyrics_data
+from alignment import BandedAligner
+from slide_plan import compile_song
+
+FILLERS = ["eh", "oh", "la", "que", "se", "uh", "ya", "no"]
+
+
+def noisy_stream(words, vocab, rng, p_drop=0.15, p_sub=0.10, p_ins=0.10):
+    """Genera (palabra_reconocida, posición_real_después) como lo haría Vosk"""
+    stream = []
+    for i, word in enumerate(words):
+        if rng.random() < p_ins:
+            stream.append((rng.choice(FILLERS), i))
+        roll = rng.random()
+        if roll < p_drop:
+            continue
+        if roll < p_drop + p_sub:
+            stream.append((rng.choice(vocab), i + 1))
+        else:
+            stream.append((word, i + 1))
+    return stream
+
+
+def make_tracker(lyrics_data, matcher):
+    with contextlib.redirect_stdout(io.StringIO()):
+        tracker = LyricTracker(lyrics_data)
+    tracker.matcher = matcher
+    return tracker
+
+
+def run_matcher(tracker, streams):
+    errors = []
+    over_advances = 0
+    call_times = []
+    for slide, stream in streams:
+        tracker.current_slide = slide
+        tracker.current_word_index = 0
+        tracker.align_window.clear()
+        plan = tracker.plan
+        for word, truth in stream:
+            start = time.perf_counter()
+            if tracker.matcher == "alignment":
+                tracker._match_alignment([word], plan)
+            elif len(word) > 1:
+                tracker._match_greedy([word], plan)
+            call_times.append(time.perf_counter() - start)
+            error = tracker.current_word_index - truth
+            errors.append(abs(error))
+            if error > 1:
+                over_advances += 1
+    call_times.sort()
+    return {
+        "error_medio": sum(errors) / len(errors),
+        "avances_de_mas": over_advances / len(errors),
+        "us_p50": call_times[len(call_times) // 2] * 1e6,
+        "us_p99": call_times[int(len(call_times) * 0.99)] * 1e6,
+    }
+
+
+def bench_budget(lyrics_data, slide_words=40, window=8, repeats=2000):
+    """Tiempo de BandedAligner.align en un slide de 40 palabras (presupuesto por llamada)"""
+    all_words = []
+    for value in lyrics_data.values():
+        words = value["processed_text"] if isinstance(value, dict) else value
+        all_words.extend(words)
+    words = (all_words * (slide_words // max(1, len(all_words)) + 1))[:slide_words]
+    aligner = BandedAligner(compile_song({"slide_1": words}), band=slide_words)
+    recent = [w.lower() for w in words[10:10 + window]]
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        aligner.align(1, recent, 10)
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de matchers de LyricTracker')
+    parser.add_argument('--song', '-s', default='lyrics_data.json')
+    parser.add_argument('--trials', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    lyrics_data = load_lyrics_data(args.song)
+    if not lyrics_data:
+        return
+
+    plan = compile_song({k: (v["processed_text"] if isinstance(v, dict) else v)
+                         for k, v in lyrics_data.items()})
+    vocab = sorted({w for p in plan.slides.values() for w in p.words})
+    rng = random.Random(args.seed)
+    streams = []
+    for _ in range(args.trials):
+        for number, slide_plan in plan.slides.items():
+            streams.append((number, noisy_stream(list(slide_plan.words), vocab, rng)))
+
+    print("\n📊 MATCHER VORAZ vs ALINEAMIENTO")
+    print("=" * 60)
+    print(f"{'matcher':<12}{'error medio':>12}{'avance de más':>15}{'p50 µs':>10}{'p99 µs':>10}")
+    for matcher in ("greedy", "alignment"):
+        stats = run_matcher(make_tracker(lyrics_data, matcher), streams)
+        print(f"{matcher:<12}{stats['error_medio']:>12.2f}{stats['avances_de_mas']:>14.1%}"
+              f"{stats['us_p50']:>10.1f}{stats['us_p99']:>10.1f}")
+    print("=" * 60)
+    print(f"⏱️ align() en slide de 40 palabras (ventana 8): {bench_budget(lyrics_data):.1f} µs/llamada")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""
+Benchmark: un solo proceso vs. modo multiproceso (balanced_main.py --multiprocess).
+
+Un hilo imita al callback de audio (bloques de 20 ms en tiempo real) y otro
+imita al resto del proceso principal (overlay, hotkeys, COM): cada
+--stall-every s hace gc.collect() sobre --gc-objects contenedores, una pausa
+que retiene el GIL. Para cada resultado parcial nuevo que llega al loop
+principal se mide la latencia desde que se capturó el último bloque del lote
+que lo produjo, y se reporta p50 / p95 / p99 / máx y el desvío (jitter).
+
+Con --stall-every 0 no hay pausas (mide solo el costo del pipe y del ring).
+
+Sin --model se usa un recognizer sintético que gasta --decode-cost ms de CPU
+en Python por segundo de audio (retiene el GIL: peor caso para un proceso).
+Con --model se usa Vosk de verdad, con --wav como audio (WAV 16 kHz mono).
+
+    python bench_multiprocess.py --seconds 10
+    python bench_multiprocess.py --model vosk-model-es-0.42 --wav ensayo.wav --seconds 20
+"""
+import argparse
+import gc
+import json
+import queue
+import statistics
+import threading
+import time
+
+import numpy as np
+
+from hypothesis_diff import HypothesisDiff
+from recognition_worker import RecognitionWorker
+from recognizer_pool import lean_recognizer
+from ring_buffer import AudioRing, WaveformFeeder, drain_queue, frame_aligned_bytes
+from startup import load_model
+
+BLOCK = frame_aligned_bytes(20)
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+class SyntheticRecognizer:
+    """Imita a KaldiRecognizer: CPU fija por segundo de audio y una parcial nueva por lote"""
+
+    def __init__(self, model, sample_rate, grammar=None):
+        self.cost = model['decode_cost'] / 1000
+        self.batches = 0
+
+    def SetWords(self, _enabled):
+        pass
+
+    SetPartialWords = SetWords
+
+    def SetGrammar(self, _grammar):
+        pass
+
+    def Reset(self):
+        self.batches = 0
+
+    def AcceptWaveform(self, data):
+        busy(self.cost * len(data) / 32000)
+        self.batches += 1
+        return False
+
+    def PartialResult(self):
+        return json.dumps({"partial": f"palabra {self.batches}"})
+
+    def Result(self):
+        return json.dumps({"text": ""})
+
+    FinalResult = Result
+
+
+def synthetic_model(decode_cost, prefetch=False):
+    return {'decode_cost': float(decode_cost)}
+
+
+def producer(audio, audio_queue, stamps, stop):
+    """Bloques de 20 ms en tiempo real, como el callback de sounddevice"""
+    offset = 0
+    next_at = time.perf_counter()
+    while not stop.is_set():
+        if offset + BLOCK > len(audio):
+            offset = 0
+        stamps.append(time.perf_counter())
+        audio_queue.put(audio[offset:offset + BLOCK])
+        offset += BLOCK
+        next_at += 0.02
+        time.sleep(max(0.0, next_at - time.perf_counter()))
+
+
+def disturbance(stop, every, objects, pauses):
+    """Resto del proceso principal: pausas de GC que retienen el GIL"""
+    junk = []
+    for _ in range(objects):
+        item = []
+        item.append(item)       # ciclo: el GC tiene que recorrerlo
+        junk.append(item)
+    if every <= 0:
+        return
+    while not stop.wait(every):
+        start = time.perf_counter()
+        gc.collect()
+        pauses.append(time.perf_counter() - start)
+
+
+def capture_stamp(stamps, position):
+    """Instante de captura del bloque que contiene el byte position - 1"""
+    return stamps[-(-position // BLOCK) - 1]
+
+
+def single_process_loop(context, audio_queue, stamps, stop, latencies):
+    """El loop de balanced_main sin --multiprocess: Vosk en el mismo hilo"""
+    recognizer = context['factory'](context['model'], 16000)
+    lean_recognizer(recognizer)
+    ring = AudioRing(frame_aligned_bytes(2000))
+    feeder = WaveformFeeder()
+    hypothesis = HypothesisDiff()
+    batch_bytes = frame_aligned_bytes(context['batch_ms'])
+    position = 0
+    while not stop.is_set():
+        drain_queue(audio_queue, ring.write, 0.5)
+        while ring.available >= batch_bytes:
+            view = ring.read(batch_bytes)
+            position += len(view)
+            if feeder.accept(recognizer, view):
+                recognizer.Result()
+            partial = json.loads(recognizer.PartialResult()).get('partial', '').strip()
+            if partial and hypothesis.feed_partial(partial) is not None:
+                latencies.append(time.perf_counter() - capture_stamp(stamps, position))
+
+
+def multi_process_loop(context, audio_queue, stamps, stop, latencies):
+    """El loop de balanced_main con --multiprocess: ring compartido → proceso de reconocimiento"""
+    worker = context['worker']
+    while not stop.is_set():
+        drain_queue(audio_queue, worker.ring.write, 0.5)
+        for _kind, _text, _new_words, position in worker.results():
+            latencies.append(time.perf_counter() - capture_stamp(stamps, position))
+
+
+def run(loop, context, audio, seconds, stall_every, gc_objects):
+    audio_queue = queue.Queue(maxsize=100)
+    stamps = []
+    latencies = []
+    pauses = []
+    stop = threading.Event()
+    stop_capture = threading.Event()
+    threads = [
+        threading.Thread(target=loop, args=(context, audio_queue, stamps, stop, latencies)),
+        threading.Thread(target=disturbance, args=(stop, stall_every, gc_objects, pauses)),
+    ]
+    capture = threading.Thread(target=producer, args=(audio, audio_queue, stamps, stop_capture))
+    capture.start()
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    # La captura para después del loop (como el stream real, que sigue entregando bloques)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    stop_capture.set()
+    capture.join()
+
+    latencies = sorted(latency * 1000 for latency in latencies)
+    if not latencies:
+        return None
+
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))]
+
+    return {
+        'results': len(latencies),
+        'p50': pct(0.50),
+        'p95': pct(0.95),
+        'p99': pct(0.99),
+        'max': latencies[-1],
+        'jitter': statistics.pstdev(latencies),
+        'gc_pause_ms': max(pauses) * 1000 if pauses else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", help="Directorio del modelo de Vosk (sin él: recognizer sintético)")
+    parser.add_argument("--wav", help="WAV 16 kHz mono (sin él: ruido)")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--batch-ms", type=int, default=60)
+    parser.add_argument("--decode-cost", type=float, default=300.0,
+                        help="Recognizer sintético: ms de CPU por segundo de audio")
+    parser.add_argument("--stall-every", type=float, default=0.25, help="Segundos entre pausas de GC")
+    parser.add_argument("--gc-objects", type=int, default=300000)
+    args = parser.parse_args()
+
+    if args.wav:
+        from bench_grammar import read_wav
+        audio, _ = read_wav(args.wav)
+    else:
+        audio = (np.random.default_rng(0).normal(0, 3000, 16000 * 10)).astype(np.int16).tobytes()
+
+    if args.model:
+        model_path, loader, factory = args.model, load_model, None
+        import vosk
+        model = load_model(args.model)
+        single_factory = vosk.KaldiRecognizer
+    else:
+        model_path, loader, factory = args.decode_cost, synthetic_model, SyntheticRecognizer
+        model = synthetic_model(args.decode_cost)
+        single_factory = SyntheticRecognizer
+
+    worker = RecognitionWorker(model_path, batch_ms=args.batch_ms, model_loader=loader, factory=factory).start()
+    modes = (
+        ("1 proceso", single_process_loop, {'model': model, 'factory': single_factory, 'batch_ms': args.batch_ms}),
+        ("multiproceso", multi_process_loop, {'worker': worker}),
+    )
+
+    print(f"Lote {args.batch_ms} ms, pausa de GC cada {args.stall_every * 1000:.0f} ms "
+          f"({args.gc_objects} objetos), {args.seconds:.0f}s por modo")
+    print(f"{'modo':<13} {'result.':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'máx ms':>8} "
+          f"{'jitter σ':>9} {'pausa GC':>9}")
+    try:
+        for name, loop, context in modes:
+            stats = run(loop, context, audio, args.seconds, args.stall_every, args.gc_objects)
+            if stats is None:
+                print(f"{name:<13} sin resultados")
+                continue
+            print(f"{name:<13} {stats['results']:>7} {stats['p50']:>8.1f} {stats['p95']:>8.1f} "
+                  f"{stats['p99']:>8.1f} {stats['max']:>8.1f} {stats['jitter']:>9.1f} {stats['gc_pause_ms']:>9.1f}")
+    finally:
+        health = worker.close()
+    if health:
+        print(f"Proceso de reconocimiento: {health['batches']} lotes, "
+              f"overflow del ring compartido: {worker.ring.overflow_bytes} bytes")
+
+
+if __name__ == "__main__":
+    main()
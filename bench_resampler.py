@@ -0,0 +1,82 @@
+"""
+Benchmark: resample_poly bloque por bloque vs. StreamingResampler.
+
+Mide el costo por bloque de 20 ms (lo que paga el callback de audio) y el
+error contra resamplear la señal completa de una vez: resample_poly por
+bloque rediseña el FIR en cada llamada y mete discontinuidades en cada borde.
+
+    python bench_resampler.py --orig 48000 --target 16000 --blocks 2000
+"""
+import argparse
+import time
+
+import numpy as np
+from scipy.signal import resample_poly, upfirdn
+
+from resampler import StreamingResampler, design_filter
+
+
+def test_signal(samples, rate, rng):
+    """Voz sintética: armónicos de una fundamental que se mueve + ruido"""
+    t = np.arange(samples) / rate
+    f0 = 180 + 40 * np.sin(2 * np.pi * 0.5 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / rate
+    signal = sum(np.sin(k * phase) / k for k in range(1, 12))
+    return (0.3 * signal + 0.01 * rng.standard_normal(samples)).astype(np.float32)
+
+
+def percentiles(times):
+    times = sorted(times)
+    return times[len(times) // 2] * 1e6, times[int(len(times) * 0.99)] * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orig", type=int, default=48000)
+    parser.add_argument("--target", type=int, default=16000)
+    parser.add_argument("--block-ms", type=int, default=20)
+    parser.add_argument("--blocks", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    block = args.orig * args.block_ms // 1000
+    audio = test_signal(block * args.blocks, args.orig, rng)
+    blocks = [audio[i:i + block] for i in range(0, len(audio), block)]
+
+    resampler = StreamingResampler(args.orig, args.target)
+    reference = upfirdn(design_filter(resampler.up, resampler.down), audio.astype(np.float64),
+                        resampler.up, resampler.down)
+
+    poly_times, poly_out = [], []
+    for chunk in blocks:
+        start = time.perf_counter()
+        poly_out.append(resample_poly(chunk, args.target, args.orig))
+        poly_times.append(time.perf_counter() - start)
+
+    stream_times, stream_out = [], []
+    for chunk in blocks:
+        start = time.perf_counter()
+        out = resampler.process(chunk)
+        stream_times.append(time.perf_counter() - start)
+        stream_out.append(out.copy())
+
+    # resample_poly compensa el retardo del filtro: se compara contra la versión de señal completa
+    poly = np.concatenate(poly_out)
+    poly_reference = resample_poly(audio.astype(np.float64), args.target, args.orig)[:len(poly)]
+    stream = np.concatenate(stream_out)
+    n = min(len(stream), len(reference))
+
+    def snr(signal, error):
+        return 10 * np.log10(np.sum(signal ** 2) / max(np.sum(error ** 2), 1e-30))
+
+    print(f"🎚️ {args.orig} → {args.target} Hz, bloques de {block} muestras ({args.block_ms} ms), {len(blocks)} bloques")
+    print(f"{'método':<20} {'µs p50':>8} {'µs p99':>8} {'SNR vs. señal completa':>24}")
+    p50, p99 = percentiles(poly_times)
+    print(f"{'resample_poly':<20} {p50:>8.1f} {p99:>8.1f} {snr(poly_reference, poly - poly_reference):>21.1f} dB")
+    p50, p99 = percentiles(stream_times)
+    print(f"{'StreamingResampler':<20} {p50:>8.1f} {p99:>8.1f} "
+          f"{snr(reference[:n], stream[:n] - reference[:n]):>21.1f} dB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark: comandos de slide en el hilo de audio (antes) vs. SlideController (ahora).
+
+Con una FakePresentation de --latency-ms por comando:
+  - antes: cada cambio hace CoInitialize + Dispatch (--dispatch-ms simulados)
+    y el comando en el hilo que decide; ir a otro slide presiona una tecla
+    por slide de distancia con 100 ms de espera entre teclas
+  - ahora: el hilo que decide solo encola; el hilo de slides ejecuta next o
+    GotoSlide (un solo comando, sin importar la distancia)
+
+Se mide cuánto queda bloqueado el hilo que decide por comando y cuánto tarda
+el comando en verse en la presentación.
+
+    python bench_slide_controller.py --changes 20 --jumps 5 --distance 6
+"""
+import argparse
+import time
+
+from slide_controller import FakePresentation, SlideController
+
+
+def blocking_commands(presentation, changes, jumps, distance, dispatch_s):
+    """Réplica de _change_slide / _go_to_slide anteriores"""
+    blocked = []
+    for _ in range(changes):
+        start = time.perf_counter()
+        time.sleep(dispatch_s)                  # CoInitialize + Dispatch en cada cambio
+        presentation.next()
+        blocked.append(time.perf_counter() - start)
+    for _ in range(jumps):
+        start = time.perf_counter()
+        for _ in range(distance):
+            presentation.next()                 # una tecla por slide
+            time.sleep(0.1)
+        blocked.append(time.perf_counter() - start)
+    return blocked, list(blocked)
+
+
+def queued_commands(presentation, changes, jumps, distance):
+    controller = SlideController(presentation).start()
+    blocked = []
+    applied = []
+
+    def done(seconds, ok):
+        applied.append(seconds)
+
+    for i in range(changes + jumps):
+        start = time.perf_counter()
+        if i < changes:
+            controller.next(on_done=done)
+        else:
+            controller.goto(presentation.slide + distance, on_done=done)
+        blocked.append(time.perf_counter() - start)
+        # El cantante tarda en llegar al próximo cambio: no se acumulan comandos
+        controller.wait_idle(5.0)
+    controller.close()
+    return blocked, applied
+
+
+def summary(values):
+    values = sorted(value * 1000 for value in values)
+    return values[len(values) // 2], values[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--changes", type=int, default=20)
+    parser.add_argument("--jumps", type=int, default=5)
+    parser.add_argument("--distance", type=int, default=6, help="Slides de distancia de cada salto")
+    parser.add_argument("--latency-ms", type=float, default=30.0, help="Latencia simulada de cada comando")
+    parser.add_argument("--dispatch-ms", type=float, default=15.0, help="CoInitialize + Dispatch simulados")
+    args = parser.parse_args()
+    slides = 1 + args.changes + args.jumps * args.distance
+
+    print(f"{'modo':<12} {'bloqueo p50 ms':>15} {'bloqueo máx ms':>15} {'visible p50 ms':>15} {'visible máx ms':>15}")
+    for name in ("bloqueante", "cola"):
+        presentation = FakePresentation(slides, latency=args.latency_ms / 1000)
+        if name == "bloqueante":
+            blocked, applied = blocking_commands(presentation, args.changes, args.jumps, args.distance,
+                                                 args.dispatch_ms / 1000)
+        else:
+            blocked, applied = queued_commands(presentation, args.changes, args.jumps, args.distance)
+        blocked_p50, blocked_max = summary(blocked)
+        applied_p50, applied_max = summary(applied)
+        print(f"{name:<12} {blocked_p50:>15.3f} {blocked_max:>15.1f} {applied_p50:>15.1f} {applied_max:>15.1f}"
+              f"   (slide final {presentation.slide})")
+
+
+if __name__ == "__main__":
+    main()
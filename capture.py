@@ -0,0 +1,91 @@
+import queue
+import time
+
+import numpy as np
+
+STATUS_FLAGS = ('input_overflow', 'input_underflow', 'output_overflow', 'output_underflow', 'priming_output')
+
+
+class CaptureCallback:
+    """
+    Callback de sounddevice sin asignaciones por bloque.
+
+    Solo copia el bloque int16 a un slot preasignado y lo encola: todo el
+    procesamiento (ganancia, denoise, resample, VAD) lo hace el Pipeline
+    en el hilo del loop. Los slots rotan y son más que el maxsize de la
+    cola, así que un slot nunca se reescribe mientras sigue encolado.
+
+    Cada bloque se encola como (vista, capturado_en, callback_en), en
+    segundos de perf_counter: capturado_en descuenta el buffer de PortAudio
+    (time_info) cuando el host lo informa. Así se traza la latencia
+    micrófono → slide (LatencyTracer).
+
+    Mide su propio tiempo contra el deadline del bloque y cuenta overruns,
+    flags de status y bloques descartados por cola llena.
+    """
+
+    def __init__(self, audio_queue, sample_rate, block_size):
+        self.audio_queue = audio_queue
+        self.sample_rate = sample_rate
+        self.deadline = block_size / sample_rate
+
+        slots = (audio_queue.maxsize or 100) + 2
+        self._slots = np.zeros((slots, block_size), dtype=np.int16)
+        self._slot_bytes = [memoryview(slot).cast('B') for slot in self._slots]
+        self._next_slot = 0
+
+        self.stats = {
+            'blocks': 0,
+            'dropped': 0,           # cola llena → bloque perdido
+            'overruns': 0,          # el callback tardó más que el bloque
+            'status_flags': 0,
+            'last_ms': 0.0,
+            'max_ms': 0.0,
+            'total_ms': 0.0,
+        }
+        for flag in STATUS_FLAGS:
+            self.stats[flag] = 0
+
+    def _record_status(self, status):
+        self.stats['status_flags'] += 1
+        for flag in STATUS_FLAGS:
+            if getattr(status, flag, False):
+                self.stats[flag] += 1
+
+    def __call__(self, indata, frames, time_info, status):
+        start = time.perf_counter()
+        captured_at = start
+        adc_delay = time_info.currentTime - time_info.inputBufferAdcTime if time_info else 0.0
+        if 0.0 < adc_delay < 1.0:
+            captured_at -= adc_delay
+        if status:
+            # Se cuenta y se sigue: el bloque actual es válido aunque se haya perdido el anterior
+            self._record_status(status)
+
+        # Copia del bloque crudo al slot de turno (sin asignar)
+        index = self._next_slot
+        self._next_slot = (index + 1) % len(self._slots)
+        count = min(frames, self._slots.shape[1])
+        self._slots[index][:count] = indata[:count, 0]
+
+        try:
+            self.audio_queue.put_nowait((self._slot_bytes[index][:count * 2], captured_at, start))
+        except queue.Full:
+            self.stats['dropped'] += 1
+
+        elapsed = time.perf_counter() - start
+        self.stats['blocks'] += 1
+        self.stats['last_ms'] = elapsed * 1000
+        self.stats['total_ms'] += elapsed * 1000
+        if elapsed * 1000 > self.stats['max_ms']:
+            self.stats['max_ms'] = elapsed * 1000
+        if elapsed > self.deadline:
+            self.stats['overruns'] += 1
+
+    def summary(self):
+        blocks = self.stats['blocks']
+        return dict(
+            self.stats,
+            avg_ms=self.stats['total_ms'] / blocks if blocks else 0.0,
+            deadline_ms=self.deadline * 1000,
+        )
@@ -0,0 +1,58 @@
+"""
+Relojes para LyricTracker (anti-stuck, ignición, timers de coro).
+
+El tracker nunca llama a time.time() directamente: le pregunta a su reloj.
+En vivo es SYSTEM_CLOCK; replay_transcript.py le pasa un VirtualClock que
+avanza con los instantes grabados, así una sesión se repite igual (y mucho
+más rápido que en tiempo real) sin Vosk ni audio.
+
+    tracker = LyricTracker(lyrics_data, clock=VirtualClock())
+
+balanced_main.py --wav usa SourceClock (el tiempo = audio entregado).
+"""
+import time
+
+
+class SystemClock:
+    """Reloj de pared (segundos, como time.time())"""
+
+    def now(self):
+        return time.time()
+
+
+class VirtualClock:
+    """Reloj manual: el tiempo solo avanza con advance() o set() (nunca retrocede)"""
+
+    def __init__(self, start=0.0):
+        self._now = float(start)
+
+    def now(self):
+        return self._now
+
+    def advance(self, seconds):
+        if seconds > 0:
+            self._now += seconds
+        return self._now
+
+    def set(self, t):
+        """Lleva el reloj al instante t (si t ya pasó, no hace nada)"""
+        if t > self._now:
+            self._now = float(t)
+        return self._now
+
+
+class SourceClock:
+    """
+    Segundos de audio entregados por una fuente (audio_source.WavFileSource):
+    al repetir una grabación con --fast los timers del tracker corren con el
+    audio, no con el reloj de pared.
+    """
+
+    def __init__(self, source):
+        self.source = source
+
+    def now(self):
+        return self.source.position_seconds
+
+
+SYSTEM_CLOCK = SystemClock()
@@ -0,0 +1,361 @@
+import time
+
+import numpy as np
+
+from resampler import StreamingResampler
+from vad import VoiceGate
+
+TARGET_RATE = 16000     # lo que espera Vosk
+
+
+class Stage:
+    """
+    Etapa de un Pipeline: recibe float32 a rate_in y devuelve float32 a rate_out.
+
+    frame_size (muestras) = tamaño fijo de frame que necesita la etapa
+    (RNNoise 480, webrtcvad 10/20/30 ms); el sobrante queda guardado para el
+    siguiente bloque. Los buffers de salida se preasignan y solo crecen si
+    llega un bloque más grande. Cada etapa mide su costo.
+    """
+
+    name = "stage"
+    frame_size = None
+    required_rate = None    # tasa de entrada obligatoria (None = cualquiera)
+
+    def __init__(self):
+        self.rate_in = None
+        self._carry = np.zeros(0, dtype=np.float32)
+        self._carried = 0
+        self._out = np.zeros(0, dtype=np.float32)
+        self.stats = {'calls': 0, 'samples': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+
+    def configure(self, rate_in):
+        """Recibe la tasa de entrada y devuelve la de salida"""
+        self.rate_in = rate_in
+        return rate_in
+
+    def output(self, size):
+        """Buffer de salida preasignado de al menos size muestras"""
+        if len(self._out) < size:
+            self._out = np.zeros(size, dtype=np.float32)
+        return self._out[:size]
+
+    def process(self, x):
+        raise NotImplementedError
+
+    def reset(self):
+        self._carried = 0
+
+    def run(self, x):
+        if not len(x):
+            return x
+        start = time.perf_counter()
+        if self.frame_size:
+            # Completar frames con el sobrante del bloque anterior
+            total = self._carried + len(x)
+            if len(self._carry) < total:
+                grown = np.zeros(total, dtype=np.float32)
+                grown[:self._carried] = self._carry[:self._carried]
+                self._carry = grown
+            self._carry[self._carried:total] = x
+            usable = total - total % self.frame_size
+            y = self.process(self._carry[:usable]) if usable else self._carry[:0]
+            rest = total - usable
+            self._carry[:rest] = self._carry[usable:total]
+            self._carried = rest
+        else:
+            y = self.process(x)
+
+        elapsed = (time.perf_counter() - start) * 1000
+        self.stats['calls'] += 1
+        self.stats['samples'] += len(x)
+        self.stats['total_ms'] += elapsed
+        if elapsed > self.stats['max_ms']:
+            self.stats['max_ms'] = elapsed
+        return y
+
+
+class GainStage(Stage):
+    """
+    Normalización de volumen.
+    mode="peak": pico del bloque a `target` (lo que hacía el callback).
+    mode="agc": envolvente con ataque/liberación que sigue entre bloques.
+    max_gain = tope opcional de ganancia (None = sin tope, como el callback: hasta target/floor).
+    """
+
+    name = "gain"
+
+    def __init__(self, mode="peak", target=0.9, floor=0.01, attack_ms=10, release_ms=500, max_gain=None):
+        super().__init__()
+        self.mode = mode
+        self.target = np.float32(target)
+        self.floor = floor
+        self.attack_ms = attack_ms
+        self.release_ms = release_ms
+        self.max_gain = max_gain
+        self.envelope = 0.0
+
+    def reset(self):
+        super().reset()
+        self.envelope = 0.0
+
+    def process(self, x):
+        peak = max(float(x.max()), -float(x.min())) if len(x) else 0.0
+        if self.mode == "agc":
+            block_ms = len(x) * 1000 / self.rate_in
+            tau = self.attack_ms if peak > self.envelope else self.release_ms
+            alpha = 1.0 - np.exp(-block_ms / tau)
+            self.envelope += alpha * (peak - self.envelope)
+            level = self.envelope
+        else:
+            level = peak
+        if level > self.floor:
+            gain = self.target / level
+            if self.max_gain is not None:
+                gain = min(self.max_gain, gain)
+            x *= np.float32(gain)
+        return x
+
+
+class SmoothingStage(Stage):
+    """Media móvil (la de AudioEnhancer) con historia entre bloques: sin saltos en los bordes"""
+
+    name = "smoothing"
+
+    def __init__(self, window=5):
+        super().__init__()
+        self.window = window
+        self._history = np.zeros(window - 1, dtype=np.float32)
+        self._work = np.zeros(0, dtype=np.float32)
+        self._cumsum = np.zeros(0, dtype=np.float64)
+
+    def reset(self):
+        super().reset()
+        self._history.fill(0.0)
+
+    def process(self, x):
+        history = self.window - 1
+        size = history + len(x)
+        if len(self._work) < size:
+            self._work = np.zeros(size, dtype=np.float32)
+            self._cumsum = np.zeros(size + 1, dtype=np.float64)
+        work = self._work[:size]
+        work[:history] = self._history
+        work[history:] = x
+        cumsum = self._cumsum[:size + 1]
+        np.cumsum(work, out=cumsum[1:])
+        out = self.output(len(x))
+        np.subtract(cumsum[self.window:], cumsum[:len(x)], out=out, casting='unsafe')
+        out *= np.float32(1.0 / self.window)
+        self._history[:] = work[len(x):]
+        return out
+
+
+class ResampleStage(Stage):
+    """StreamingResampler (FIR polifásico con estado) a TARGET_RATE"""
+
+    name = "resample"
+
+    def __init__(self, target_rate=TARGET_RATE):
+        super().__init__()
+        self.target_rate = target_rate
+        self.resampler = None
+
+    def configure(self, rate_in):
+        self.rate_in = rate_in
+        self.resampler = StreamingResampler(rate_in, self.target_rate)
+        return self.target_rate
+
+    def reset(self):
+        super().reset()
+        self.resampler.reset()
+
+    def process(self, x):
+        return self.resampler.process(x)
+
+
+class DenoiseStage(Stage):
+    """RNNoise (pyrnnoise, opcional) en frames de 480 muestras a 48 kHz, como pruebaaudi.AudioDenoiser"""
+
+    name = "denoise"
+    frame_size = 480
+    required_rate = 48000
+
+    def __init__(self):
+        super().__init__()
+        from pyrnnoise import RNNoise
+        self._rnnoise_class = RNNoise
+        self.denoiser = None
+
+    def configure(self, rate_in):
+        if rate_in != 48000:
+            raise ValueError(f"RNNoise necesita 48000 Hz (llega {rate_in} Hz)")
+        self.rate_in = rate_in
+        self.denoiser = self._rnnoise_class(sample_rate=rate_in)
+        return rate_in
+
+    def process(self, x):
+        out = self.output(len(x))
+        for offset in range(0, len(x), self.frame_size):
+            out[offset:offset + self.frame_size] = self.denoiser.process_frame(x[offset:offset + self.frame_size])
+        return out
+
+
+class VadStage(Stage):
+    """
+    Compuerta de voz (VoiceGate) como etapa final: solo deja pasar voz
+    (con pre-roll y hangover). `closed` queda en True si la voz terminó
+    en el último bloque, para que el loop vacíe el recognizer.
+    """
+
+    name = "vad"
+
+    def __init__(self, aggressiveness=2, frame_ms=30, hangover_ms=300, preroll_ms=300):
+        super().__init__()
+        self.gate_options = dict(aggressiveness=aggressiveness, frame_ms=frame_ms,
+                                 hangover_ms=hangover_ms, preroll_ms=preroll_ms)
+        self.gate = None
+        self.closed = False
+        self._pcm = np.zeros(0, dtype=np.int16)
+
+    def configure(self, rate_in):
+        self.rate_in = rate_in
+        self.gate = VoiceGate(sample_rate=rate_in, **self.gate_options)
+        self.frame_size = rate_in * self.gate.frame_ms // 1000
+        return rate_in
+
+    @property
+    def active(self):
+        return self.gate.active
+
+    def reset(self):
+        super().reset()
+        self.gate.reset()
+
+    def process(self, x):
+        if len(self._pcm) < len(x):
+            self._pcm = np.zeros(len(x), dtype=np.int16)
+        pcm = self._pcm[:len(x)]
+        np.multiply(x, np.float32(32767), out=pcm, casting='unsafe')
+        chunks, self.closed = self.gate.filter(memoryview(pcm).cast('B'))
+
+        # Los trozos con voz (y el pre-roll) se juntan de vuelta en float32
+        total = sum(len(chunk) for chunk in chunks) // 2
+        out = self.output(total)
+        offset = 0
+        for chunk in chunks:
+            samples = np.frombuffer(chunk, dtype=np.int16)
+            np.multiply(samples, np.float32(1.0 / 32768.0), out=out[offset:offset + len(samples)])
+            offset += len(samples)
+        return out
+
+
+STAGES = {
+    "gain": GainStage,
+    "smoothing": SmoothingStage,
+    "resample": ResampleStage,
+    "denoise": DenoiseStage,
+    "vad": VadStage,
+}
+
+
+class Pipeline:
+    """
+    Cadena de etapas DSP sobre bloques int16 de la captura.
+    Entra int16 a capture_rate, sale un memoryview de bytes int16 a 16 kHz
+    (vista de un buffer preasignado, válida hasta el siguiente process()).
+    """
+
+    def __init__(self, stages, capture_rate):
+        self.stages = list(stages)
+        self.capture_rate = capture_rate
+        rate = capture_rate
+        for stage in self.stages:
+            rate = stage.configure(rate)
+        if rate != TARGET_RATE:
+            raise ValueError(f"El pipeline termina en {rate} Hz; falta la etapa 'resample'")
+        self.vad = next((s for s in self.stages if isinstance(s, VadStage)), None)
+        self._float = np.zeros(0, dtype=np.float32)
+        self._pcm = np.zeros(0, dtype=np.int16)
+
+    @classmethod
+    def from_config(cls, config, capture_rate):
+        """
+        Arma el pipeline desde config.json:
+        "dsp": {"stages": ["gain", "resample", "vad"], "gain": {...}, ...}
+        Los parámetros de "vad" salen de la sección "vad". Si falta "resample"
+        y la captura no es a 16 kHz se agrega antes de "vad"; si la captura ya
+        es a 16 kHz, "resample" se omite. Una etapa que necesita otra tasa
+        (denoise: 48 kHz) se desactiva con un aviso, igual que si faltara su paquete.
+        """
+        dsp_config = config.get("dsp", {})
+        names = list(dsp_config.get("stages", ["gain", "resample"]))
+        if capture_rate == TARGET_RATE:
+            names = [n for n in names if n != "resample"]
+        elif "resample" not in names:
+            names.insert(names.index("vad") if "vad" in names else len(names), "resample")
+
+        stages = []
+        rate = capture_rate
+        for name in names:
+            if name not in STAGES:
+                raise ValueError(f"Etapa DSP desconocida: {name}")
+            options = dict(config.get("vad", {}) if name == "vad" else dsp_config.get(name, {}))
+            options.pop("enabled", None)
+            required = STAGES[name].required_rate
+            if required is not None and rate != required:
+                print(f"⚠️ Etapa '{name}' desactivada: necesita {required} Hz (llega {rate} Hz)")
+                continue
+            try:
+                stages.append(STAGES[name](**options))
+            except ImportError as e:
+                print(f"⚠️ Etapa '{name}' desactivada: {e}")
+                continue
+            if name == "resample":
+                rate = options.get("target_rate", TARGET_RATE)
+        return cls(stages, capture_rate)
+
+    @property
+    def names(self):
+        return [stage.name for stage in self.stages]
+
+    @property
+    def closed(self):
+        return self.vad is not None and self.vad.closed
+
+    def reset(self):
+        for stage in self.stages:
+            stage.reset()
+
+    def process(self, block):
+        """Bloque int16 (bytes o ndarray) → memoryview de bytes int16 a 16 kHz"""
+        samples = np.frombuffer(block, dtype=np.int16) if not isinstance(block, np.ndarray) else block.reshape(-1)
+        if len(self._float) < len(samples):
+            self._float = np.zeros(len(samples), dtype=np.float32)
+        x = self._float[:len(samples)]
+        np.multiply(samples, np.float32(1.0 / 32768.0), out=x)
+
+        if self.vad is not None:
+            self.vad.closed = False
+        for stage in self.stages:
+            x = stage.run(x)
+
+        if len(self._pcm) < len(x):
+            self._pcm = np.zeros(len(x) * 2, dtype=np.int16)
+        pcm = self._pcm[:len(x)]
+        np.multiply(x, np.float32(32767), out=pcm, casting='unsafe')
+        return memoryview(pcm).cast('B')
+
+    def report(self):
+        """Costo por etapa: µs por bloque y µs por segundo de audio de entrada"""
+        lines = []
+        for stage in self.stages:
+            stats = stage.stats
+            if not stats['calls']:
+                continue
+            per_call = stats['total_ms'] * 1000 / stats['calls']
+            seconds = stats['samples'] / stage.rate_in
+            per_second = stats['total_ms'] / seconds if seconds else 0.0
+            lines.append(f"   {stage.name:<10} {per_call:>8.1f} µs/bloque  {per_second:>6.2f} ms/s de audio  "
+                         f"máx {stats['max_ms']:.2f} ms")
+        return lines
@@ -0,0 +1,202 @@
+"""
+Log asíncrono para el camino caliente (reconocimiento → tracker → slide).
+
+Un print() en la consola de Windows puede tardar milisegundos y bloquea al
+hilo que reconoce. Acá los eventos se encolan sin formatear (LazyMessage) y
+un hilo de fondo (QueueListener) los escribe en la consola y, opcionalmente,
+en un archivo JSON Lines con un registro compacto por evento:
+
+    log = get_log("tracker")
+    log.debug("progreso_coro", "PROGRESO CORO: {index}/{total}", index=7, total=22)
+
+    {"t":1760000000.123,"lvl":"DEBUG","src":"tracker","event":"progreso_coro","index":7,"total":22}
+
+Sin setup_logging() los mensajes salen por consola en el mismo hilo (como
+print), así los scripts de prueba siguen funcionando igual.
+
+    "logging": {"level": "INFO", "file": "sesion.jsonl", "file_level": "DEBUG", "queue_size": 10000}
+"""
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+
+ROOT = "letras"
+
+
+class LazyMessage:
+    """Plantilla + campos: se formatea recién cuando un handler lo escribe (en el hilo de fondo)"""
+
+    __slots__ = ("event", "template", "fields")
+
+    def __init__(self, event, template, fields):
+        self.event = event
+        self.template = template
+        self.fields = fields
+
+    def __str__(self):
+        try:
+            return self.template.format(**self.fields)
+        except (KeyError, IndexError, ValueError):
+            return f"{self.template} {self.fields}"
+
+
+class EventLog:
+    """Logger de eventos con nombre; los campos viajan sin formatear"""
+
+    def __init__(self, name):
+        self.logger = logging.getLogger(f"{ROOT}.{name}")
+
+    def log(self, level, event, template, **fields):
+        logger = self.logger
+        if logger.isEnabledFor(level):
+            logger.log(level, LazyMessage(event, template, fields))
+
+    def debug(self, event, template, **fields):
+        self.log(logging.DEBUG, event, template, **fields)
+
+    def info(self, event, template, **fields):
+        self.log(logging.INFO, event, template, **fields)
+
+    def warning(self, event, template, **fields):
+        self.log(logging.WARNING, event, template, **fields)
+
+    def error(self, event, template, **fields):
+        self.log(logging.ERROR, event, template, **fields)
+
+
+def get_log(name):
+    return EventLog(name)
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Un objeto JSON por línea: instante, nivel, origen, evento y campos"""
+
+    def format(self, record):
+        entry = {
+            't': round(record.created, 3),
+            'lvl': record.levelname,
+            'src': record.name.rpartition('.')[2],
+        }
+        msg = record.msg
+        if isinstance(msg, LazyMessage):
+            entry['event'] = msg.event
+            for key, value in msg.fields.items():
+                entry[key] = value if isinstance(value, (int, float, str, bool, type(None))) else str(value)
+        else:
+            entry['msg'] = record.getMessage()
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, separators=(',', ':'))
+
+
+class _EnqueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler que no formatea en el hilo que loguea (el prepare() original
+    llama a format()) y nunca bloquea: con la cola llena el registro se descarta.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class AsyncLogging:
+    """Cola + hilo escritor instalados en el logger raíz de la aplicación"""
+
+    def __init__(self, handlers, queue_size=10000):
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.handler = _EnqueueHandler(self.queue)
+        self.listener = logging.handlers.QueueListener(self.queue, *handlers, respect_handler_level=True)
+        self.handlers = handlers
+
+    @property
+    def dropped(self):
+        return self.handler.dropped
+
+    def start(self):
+        self.listener.start()
+        return self
+
+    def flush(self, timeout=1.0):
+        """Espera a que el hilo escritor vacíe la cola (antes de imprimir un resumen)"""
+        deadline = time.perf_counter() + timeout
+        while self.queue.unfinished_tasks and time.perf_counter() < deadline:
+            time.sleep(0.005)
+
+    def stop(self):
+        """Escribe lo pendiente y cierra los handlers"""
+        if self.listener._thread is not None:
+            self.listener.stop()
+        for handler in self.handlers:
+            handler.close()
+
+
+def _console_handler(level, stream=None):
+    handler = logging.StreamHandler(stream or sys.stdout)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    handler.setLevel(level)
+    return handler
+
+
+_root = logging.getLogger(ROOT)
+_root.propagate = False
+_root.setLevel(logging.INFO)
+_default_handler = _console_handler(logging.INFO)
+_root.addHandler(_default_handler)
+_active = None
+
+
+def setup_logging(config=None, asynchronous=True, stream=None):
+    """
+    Sección "logging" de config.json. asynchronous=False escribe en el mismo
+    hilo (el comportamiento de print, para comparar en bench_logging.py).
+    Devuelve el AsyncLogging activo (o None en modo sincrónico).
+    """
+    global _active
+    config = config or {}
+    console_level = logging.getLevelName(str(config.get("level", "INFO")).upper())
+    handlers = [_console_handler(console_level, stream)]
+    levels = [console_level]
+    if config.get("file"):
+        file_level = logging.getLevelName(str(config.get("file_level", "DEBUG")).upper())
+        file_handler = logging.FileHandler(config["file"], encoding="utf-8")
+        file_handler.setFormatter(JsonLinesFormatter())
+        file_handler.setLevel(file_level)
+        handlers.append(file_handler)
+        levels.append(file_level)
+
+    shutdown_logging()
+    for handler in list(_root.handlers):
+        _root.removeHandler(handler)
+    _root.setLevel(min(levels))
+
+    if not asynchronous:
+        for handler in handlers:
+            _root.addHandler(handler)
+        return None
+    _active = AsyncLogging(handlers, config.get("queue_size", 10000)).start()
+    _root.addHandler(_active.handler)
+    return _active
+
+
+def shutdown_logging():
+    """Vacía la cola y vuelve al handler de consola sincrónico"""
+    global _active
+    if _active is None:
+        return
+    _root.removeHandler(_active.handler)
+    _active.stop()
+    _active = None
+    _root.addHandler(_default_handler)
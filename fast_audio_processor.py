@@ -4,6 +4,7 @@ import json
 import threading
 import time
 from lyric_tracker import LyricTracker, load_lyrics_data
+from metrics import REGISTRY, MetricsExporter, load_metrics_config
 import pyautogui
 
 class FastAudioProcessor:
@@ -16,6 +17,13 @@ class FastAudioProcessor:
         self.sample_rate = 16000
         self.chunk_size = 2000  # Chunks más pequeños para menor latencia
         self.is_listening = False
+
+        # Métricas de memoria fija (metrics.py, compartidas con balanced_main)
+        self.metrics = REGISTRY
+        self.audio_blocks = self.metrics.counter("audio_blocks_total", "Bloques leídos del stream")
+        self.slide_changes = self.metrics.counter("slide_changes_total", "Cambios de slide hechos por el sistema")
+        self.batch_seconds = self.metrics.histogram("batch_processing_seconds", "Vosk + tracker por bloque")
+        self.metrics_exporter = MetricsExporter.from_config(load_metrics_config())
         
         print("⚡ Procesador de Audio RÁPIDO Inicializado")
     
@@ -33,6 +41,8 @@ class FastAudioProcessor:
             
             self.is_listening = True
             print("🎤 Escuchando... (Modo RÁPIDO - Ctrl+C para detener)")
+            if self.metrics_exporter is not None:
+                self.metrics_exporter.start()
             
             # Hilo de procesamiento optimizado
             self.process_thread = threading.Thread(target=self._fast_process_audio)
@@ -48,6 +58,8 @@ class FastAudioProcessor:
             try:
                 # Leer audio del stream directamente
                 data = self.stream.read(self.chunk_size, exception_on_overflow=False)
+                self.audio_blocks.inc()
+                process_start = time.perf_counter()
                 
                 # PROCESAMIENTO RÁPIDO: Enfocarse en resultados parciales para respuesta inmediata
                 if self.recognizer.AcceptWaveform(data):
@@ -64,6 +76,7 @@ class FastAudioProcessor:
                     print(f"🎤 {partial_text}")
                     # Procesar parcial inmediatamente para mejor respuesta
                     self._handle_partial_text(partial_text)
+                self.batch_seconds.record(time.perf_counter() - process_start)
                 
                 # Pausa mínima para no saturar CPU
                 time.sleep(0.03)  # Solo 30ms entre procesamientos
@@ -94,6 +107,7 @@ class FastAudioProcessor:
         try:
             # Cambio inmediato sin esperas
             pyautogui.press('pagedown')
+            self.slide_changes.inc()
             print("✅ Slide cambiado (RÁPIDO)")
             
             # Avanzar tracker
@@ -112,4 +126,8 @@ class FastAudioProcessor:
             self.stream.close()
         if hasattr(self, 'audio'):
             self.audio.terminate()
-        print("🛑 Escucha detenida")
\ No newline at end of file
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.stop()
+        print(f"🛑 Escucha detenida ({self.audio_blocks.value} bloques, "
+              f"{self.slide_changes.value} cambios de slide, "
+              f"procesamiento p95 {self.batch_seconds.percentile(0.95) * 1000:.1f} ms)")
\ No newline at end of file
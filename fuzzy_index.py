@@ -0,0 +1,82 @@
+import jellyfish
+
+MAX_CACHE = 20000   # palabras reconocidas distintas antes de vaciar los caches
+
+
+def _deletes(word, max_distance):
+    """La palabra y todas sus variantes con hasta max_distance letras borradas"""
+    variants = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        next_frontier = set()
+        for variant in frontier:
+            if not variant:
+                continue
+            for i in range(len(variant)):
+                next_frontier.add(variant[:i] + variant[i + 1:])
+        variants |= next_frontier
+        frontier = next_frontier
+    return variants
+
+
+class DeletionIndex:
+    """
+    Índice estilo SymSpell sobre el vocabulario de la canción.
+
+    Guarda las variantes por borrado (distancia ≤ 2) de cada palabra de la letra,
+    así una palabra reconocida encuentra sus candidatas con un par de búsquedas
+    en diccionario en vez de comparar Levenshtein contra cada palabra. El
+    resultado (y el soundex) de cada palabra reconocida queda en caché: las
+    siguientes veces es una sola búsqueda O(1).
+    """
+
+    def __init__(self, vocabulary, max_distance=2):
+        self.max_distance = max_distance
+        self.vocabulary = frozenset(vocabulary)
+        self.deletes = {}
+        for word in self.vocabulary:
+            for variant in _deletes(word, max_distance):
+                self.deletes.setdefault(variant, set()).add(word)
+        self._lookup_cache = {}
+        self._soundex_cache = {}
+
+    def __len__(self):
+        return len(self.vocabulary)
+
+    def lookup(self, word):
+        """{palabra_de_la_letra: distancia} para todas las palabras a distancia ≤ max_distance"""
+        result = self._lookup_cache.get(word)
+        if result is not None:
+            return result
+
+        candidates = set()
+        for variant in _deletes(word, self.max_distance):
+            hits = self.deletes.get(variant)
+            if hits:
+                candidates |= hits
+
+        # Verificación: los borrados simétricos encuentran candidatas de más
+        result = {}
+        for candidate in candidates:
+            distance = jellyfish.levenshtein_distance(word, candidate)
+            if distance <= self.max_distance:
+                result[candidate] = distance
+
+        if len(self._lookup_cache) >= MAX_CACHE:
+            self._lookup_cache.clear()
+        self._lookup_cache[word] = result
+        return result
+
+    def distance(self, word, lyric_word, default=None):
+        """Distancia de edición si es ≤ max_distance, si no default"""
+        return self.lookup(word).get(lyric_word, default)
+
+    def soundex(self, word):
+        """Soundex cacheado de una palabra reconocida"""
+        key = self._soundex_cache.get(word)
+        if key is None:
+            key = jellyfish.soundex(word)
+            if len(self._soundex_cache) >= MAX_CACHE:
+                self._soundex_cache.clear()
+            self._soundex_cache[word] = key
+        return key
@@ -0,0 +1,65 @@
+import json
+import re
+
+from slide_plan import is_metadata_word, slide_number
+
+UNK = "[unk]"
+
+# Palabras que usa _check_special_commands (tienen que seguir reconociéndose)
+COMMAND_WORDS = (
+    "repetir", "otra", "vez", "repite",
+    "atrás", "volver", "anterior", "retrocede",
+    "empezar", "inicio", "principio", "primero",
+    "slide", "uno", "dos", "tres", "cuatro", "cinco",
+)
+
+# Se conservan acentos y ñ: el léxico del modelo de Vosk está en español escrito
+_NON_WORD = re.compile(r'[^a-záéíóúüñ]')
+
+
+def surface_word(word):
+    """Palabra de la letra tal como la conoce el modelo: minúsculas, sin puntuación"""
+    return _NON_WORD.sub('', word.lower())
+
+
+class SlideGrammar:
+    """
+    Gramáticas de Vosk restringidas a una ventana deslizante de slides.
+
+    grammar_for(n) = palabras del slide n y de los `ahead` slides siguientes,
+    más las palabras de comandos de voz y [unk]. Se calcula una vez por slide
+    y queda en caché como el JSON que recibe KaldiRecognizer.
+    """
+
+    def __init__(self, lyrics_data, ahead=3, commands=COMMAND_WORDS):
+        self.ahead = ahead
+        self.commands = frozenset(commands)
+        self.slide_words = {}
+        for slide_key, raw_words in lyrics_data.items():
+            number = slide_number(slide_key)
+            if number is None:
+                continue
+            words = {surface_word(w) for w in raw_words if not is_metadata_word(w)}
+            words.discard('')
+            self.slide_words[number] = frozenset(words)
+        self.numbers = tuple(sorted(self.slide_words))
+        self._cache = {}
+
+    def window(self, slide):
+        """Slides que cubre la gramática de `slide` (el actual y los siguientes)"""
+        following = [n for n in self.numbers if n >= slide]
+        return tuple(following[:self.ahead + 1])
+
+    def words_for(self, slide):
+        words = set(self.commands)
+        for number in self.window(slide):
+            words |= self.slide_words[number]
+        return words
+
+    def grammar_for(self, slide):
+        """JSON de la gramática para KaldiRecognizer(model, rate, grammar)"""
+        grammar = self._cache.get(slide)
+        if grammar is None:
+            grammar = json.dumps(sorted(self.words_for(slide)) + [UNK], ensure_ascii=False)
+            self._cache[slide] = grammar
+        return grammar
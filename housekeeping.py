@@ -0,0 +1,43 @@
+import time
+
+
+class Housekeeping:
+    """
+    Tareas periódicas del loop principal (poll de PowerPoint, etc.) con su
+    propio reloj: corren cuando les toca, no en cada vuelta del loop.
+    run_due() devuelve cuánto falta para la próxima, así el loop puede
+    bloquearse esperando audio exactamente hasta entonces.
+    """
+
+    def __init__(self):
+        self.tasks = []
+        self.runs = {}
+        self.errors = {}
+
+    def every(self, interval, fn, name=None):
+        name = name or fn.__name__
+        self.tasks.append([interval, time.monotonic() + interval, fn, name])
+        self.runs[name] = 0
+        self.errors[name] = 0
+
+    def run_due(self):
+        """Ejecuta las tareas vencidas; segundos hasta la próxima (None si no hay tareas)"""
+        if not self.tasks:
+            return None
+        now = time.monotonic()
+        next_due = None
+        for task in self.tasks:
+            interval, due, fn, name = task
+            if now >= due:
+                try:
+                    fn()
+                except Exception:
+                    self.errors[name] += 1
+                self.runs[name] += 1
+                due += interval
+                if due <= now:
+                    due = now + interval    # atrasada: no se ejecuta en ráfaga
+                task[1] = due
+            if next_due is None or due < next_due:
+                next_due = due
+        return max(0.0, next_due - time.monotonic())
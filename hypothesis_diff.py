@@ -0,0 +1,60 @@
+class HypothesisDiff:
+    """
+    Etapa entre el recognizer de Vosk y LyricTracker.
+
+    PartialResult() devuelve SIEMPRE la hipótesis completa que va creciendo.
+    Esta clase recuerda qué prefijo ya se entregó al tracker y solo deja pasar
+    las palabras nuevas, para que ninguna palabra avance el cursor dos veces.
+    """
+
+    def __init__(self):
+        self.partials_seen = 0
+        self.partials_skipped = 0
+        self.revisions = 0
+        self.tokens_fed = 0
+        self.reset()
+
+    def reset(self):
+        """Nueva frase (Result() final o recognizer reiniciado)"""
+        self._last_text = ""
+        self._tokens = []
+        self.consumed = 0
+
+    def _diff(self, tokens):
+        common = 0
+        limit = min(len(tokens), len(self._tokens))
+        while common < limit and tokens[common] == self._tokens[common]:
+            common += 1
+
+        if common < self.consumed:
+            # Vosk reescribió palabras que ya se aplicaron: no se vuelven a aplicar,
+            # y si la hipótesis se acortó, el prefijo consumido se recorta con ella
+            self.revisions += 1
+            self.consumed = min(self.consumed, len(tokens))
+
+        new_tokens = tokens[self.consumed:]
+        self.consumed = len(tokens)
+        self._tokens = tokens
+        self.tokens_fed += len(new_tokens)
+        return new_tokens
+
+    def feed_partial(self, text):
+        """
+        Devuelve la lista de palabras nuevas de la parcial,
+        o None si la parcial no cambió desde la última vez.
+        """
+        self.partials_seen += 1
+        if text == self._last_text:
+            self.partials_skipped += 1
+            return None
+        self._last_text = text
+        return self._diff(text.split())
+
+    def feed_final(self, text):
+        """
+        Reconcilia el Result() final con lo que ya aplicaron las parciales:
+        devuelve solo las palabras que las parciales no entregaron.
+        """
+        new_tokens = self._diff(text.split())
+        self.reset()
+        return new_tokens
@@ -0,0 +1,101 @@
+import time
+from collections import deque
+
+from metrics import REGISTRY
+
+
+class LatencyTracer:
+    """
+    Latencia del micrófono al proyector, por etapa y de punta a punta.
+
+    El callback sella cada bloque con su instante de captura; el loop anota
+    hasta qué byte del ring llegó la salida de cada bloque (mark_output) y,
+    al decodificar un lote, batch() recupera la captura más reciente que
+    entró en ese lote. Esa es la referencia de la decisión del tracker y
+    del comando a PowerPoint que la sigue.
+
+    Etapas: adc (buffer de PortAudio), cola, dsp, lote (espera en el ring),
+    vosk, tracker, slide (cola del SlideController + comando). Punta a
+    punta: mic→decisión y mic→slide. En modo multiproceso "vosk" incluye la espera del lote y
+    el viaje por el pipe.
+
+    Cada etapa es un histograma latency_seconds{stage=...} del registry de
+    métricas (memoria fija, se exporta en vivo con MetricsExporter).
+    """
+
+    STAGES = ("adc", "cola", "dsp", "lote", "vosk", "tracker", "slide", "mic→decisión", "mic→slide")
+
+    def __init__(self, max_marks=1000, registry=REGISTRY):
+        self.histograms = {
+            stage: registry.histogram("latency_seconds", "Latencia micrófono → slide por etapa", {"stage": stage})
+            for stage in self.STAGES
+        }
+        self._marks = deque(maxlen=max_marks)   # (fin en el ring, captura, llegada al ring)
+        self.current = None         # captura más reciente del último lote decodificado
+        self.current_queued_at = None
+        self._decision = None       # captura que originó la decisión en curso
+
+    def record(self, stage, seconds):
+        self.histograms[stage].record(seconds)
+
+    def mark_output(self, end_position, captured_at, now=None):
+        """Los bytes del ring hasta end_position salieron del bloque capturado en captured_at"""
+        self._marks.append((end_position, captured_at, now if now is not None else time.perf_counter()))
+
+    def batch(self, start, end, now=None, record_wait=True):
+        """
+        Lote [start, end) del ring entra al recognizer: registra la espera de
+        cada bloque ("lote") y deja en current la captura más reciente del lote.
+        Los bloques que terminan antes de start se descartaron (ring.clear()).
+        Devuelve cuántos bloques entraron.
+        """
+        now = now if now is not None else time.perf_counter()
+        marks = self._marks
+        blocks = 0
+        while marks and marks[0][0] <= end:
+            position, captured_at, queued_at = marks.popleft()
+            if position <= start:
+                continue
+            if record_wait:
+                self.record("lote", now - queued_at)
+            self.current = captured_at
+            self.current_queued_at = queued_at
+            blocks += 1
+        return blocks
+
+    def decided(self, now=None):
+        """El tracker decidió cambiar de slide con el audio del último lote"""
+        if self.current is None:
+            return
+        now = now if now is not None else time.perf_counter()
+        self._decision = self.current
+        self.record("mic→decisión", now - self.current)
+
+    def take_decision(self):
+        """Captura que originó la decisión en curso, para el comando que la ejecuta (la olvida acá)"""
+        decision, self._decision = self._decision, None
+        return decision
+
+    def commanded(self, seconds, decision=None, now=None):
+        """
+        El comando a PowerPoint terminó (seconds = desde que se pidió).
+        Puede llamarse desde el hilo de slides: decision viene de take_decision().
+        """
+        self.record("slide", seconds)
+        if decision is not None:
+            now = now if now is not None else time.perf_counter()
+            self.record("mic→slide", now - decision)
+
+    def forget_decision(self):
+        """La decisión no llegó a PowerPoint (control manual activo, canción terminada)"""
+        self._decision = None
+
+    def snapshot(self):
+        return {stage: histogram.summary() for stage, histogram in self.histograms.items() if histogram.count}
+
+    def report(self):
+        lines = [f"   {'etapa':<14} {'n':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'máx':>8}  (ms)"]
+        for stage, summary in self.snapshot().items():
+            lines.append(f"   {stage:<14} {summary['count']:>7} {summary['p50'] * 1000:>8.2f} "
+                         f"{summary['p95'] * 1000:>8.2f} {summary['p99'] * 1000:>8.2f} {summary['max'] * 1000:>8.2f}")
+        return lines
@@ -1,28 +1,64 @@
 import json
-import time
-import re
-import jellyfish 
+from collections import deque
+from clock import SYSTEM_CLOCK
+from slide_plan import compile_song, normalize_text
+from ngram_index import NGramIndex, RelocationDecision
+from alignment import BandedAligner
+from position_hmm import PositionHMM
+from event_log import get_log
+
+log = get_log("tracker")
 class LyricTracker:
-    def __init__(self, lyrics_data, start_slide=None):
+    def __init__(self, lyrics_data, start_slide=None, clock=None):
+        # Reloj inyectable: SYSTEM_CLOCK en vivo, VirtualClock al repetir una transcripción
+        self.clock = clock or SYSTEM_CLOCK
         self.stuck_position = 0
         self.coro_fase = 0          # 0=normal | 1=primera rep | 2=segunda rep
         self.coro_crossed = False  # evita repetir el cruce del //
 
-        self.last_strong_word_time = time.time()
-        self.start_time = time.time()
+        self.last_strong_word_time = self.clock.now()
+        self.start_time = self.clock.now()
+        self.timers_paused_at = None   # VAD sin voz → anti-stuck congelado
         
         # ✅ CONVERTIR AUTOMÁTICAMENTE a formato compatible
         self.lyrics_data = self._convert_to_universal_format(lyrics_data)
         
+        # CARGAR CONFIGURACIÓN
+        self.config = self._load_config()
+
+        # ✅ COMPILAR LA CANCIÓN UNA SOLA VEZ (palabras, fonética, umbrales por slide)
+        self.slide_structures = self._analyze_slide_structures()
+        self.song_plan = compile_song(self.lyrics_data, self.slide_structures)
+        self.plan = self.song_plan.get(None)
+        self.fuzzy = self.song_plan.fuzzy
+
+        # ✅ ÍNDICE DE N-GRAMAS DE TODA LA CANCIÓN (reubicación en cualquier slide)
+        self.relocation_config = self.config.get("relocation", {})
+        self.ngram_index = NGramIndex(self.song_plan)
+        self.recent_words = deque(maxlen=self.relocation_config.get("window", 6))
+        self.last_relocation = None
+        self.goto_target = None
+
+        # ✅ MATCHER SELECCIONABLE: "greedy" (voraz) o "alignment" (DP con banda)
+        tracking_config = self.config.get("tracking", {})
+        self.matcher = tracking_config.get("matcher", "greedy")
+        self.alignment_config = tracking_config.get("alignment", {})
+        self.aligner = BandedAligner(
+            self.song_plan,
+            band=self.alignment_config.get("band", 12),
+            behind=self.alignment_config.get("behind", 2),
+        )
+        self.align_window = deque(maxlen=self.alignment_config.get("window", 8))
+        self.last_alignment = None
+
+        # ✅ MOTOR SELECCIONABLE: "cursor" (índice + casos especiales) o "hmm"
+        # (distribución de probabilidad sobre todas las posiciones de la canción)
+        self.engine = tracking_config.get("engine", "cursor")
+        self.hmm_config = tracking_config.get("hmm", {})
+        self.hmm = None
+
         # ✅ DETECTAR PRIMER SLIDE DISPONIBLE
-        available_slides = []
-        for key in self.lyrics_data.keys():
-            if key.startswith("slide_"):
-                try:
-                    num = int(key.replace("slide_", ""))
-                    available_slides.append(num)
-                except ValueError:
-                    continue
+        available_slides = list(self.song_plan.numbers)
         
         if available_slides:
             first_slide = min(available_slides)
@@ -36,30 +72,27 @@ class LyricTracker:
             self.current_slide = first_slide
             
         print(f"🎯 Slide inicial configurado: {self.current_slide} (slides disponibles: {sorted(available_slides)})")
+
+        # El HMM arranca con toda la masa en el slide inicial (ya elegido arriba)
+        if self.engine == "hmm":
+            self.hmm = PositionHMM(self.song_plan, **self.hmm_config.get("model", {}))
+            self.hmm.reset(self.current_slide)
+            self._hmm_slide = self.current_slide
         
         self.current_word_index = 0
         self.is_tracking = False
-        self.preloaded_slides = {}
-        self.start_time = time.time()
-        self.last_progress_time = time.time()
+        self.start_time = self.clock.now()
+        self.last_progress_time = self.clock.now()
         self.stuck_start_time = None
         self.stuck_position = 0
         self.coro_repetido_detectado = False
         self.aplausos_detectados = 0
-        self.last_slide_change_time = time.time()
+        self.last_slide_change_time = self.clock.now()
         self.recent_progress = 0.0
         self.song_data = {}  # ← Esto también falta, lo necesitas para _is_problematic_song()
 
-        # CARGAR CONFIGURACIÓN
-        self.config = self._load_config()
-        
-        # Cache de palabras y DETECCIÓN DE ESTRUCTURA MEJORADA
-        self.slide_words_cache = {}
-        self.slide_metadata = {}
-        self.slide_structures = self._analyze_slide_structures()
-        self._build_words_cache()
-        self.current_slide_metadata = None
-        self._preload_slides_ahead(3)
+        # Los slides viven solo en self.song_plan (un buffer de ids para toda la canción)
+        self.current_slide_metadata = list(self.plan.metadata)
         
         print("🎵 Motor FASE 1.5 - Formato Universal (Nuevo + Viejo)")
 
@@ -103,18 +136,15 @@ class LyricTracker:
 
 
 
-    def _preload_slides_ahead(self, slides_ahead=3):
-        """Pre-carga múltiples slides hacia adelante"""
-        for i in range(1, slides_ahead + 1):
-            slide_num = self.current_slide + i
-            slide_key = f"slide_{slide_num}"
-            
-            if slide_key in self.slide_words_cache:
-                self.preloaded_slides[slide_num] = {
-                    'words': self.slide_words_cache[slide_key],
-                    'metadata': self.slide_metadata.get(slide_key, [])
-                }
-        print(f"🔮 Pre-cargados {slides_ahead} slides adelante")
+    @property
+    def current_slide(self):
+        return self._current_slide
+
+    @current_slide.setter
+    def current_slide(self, number):
+        # Cambiar de slide = cambiar de índice; el plan ya está compilado
+        self._current_slide = number
+        self.plan = self.song_plan.get(number)
 
     def previous_slide(self):
         """Para cuando presiones tecla de retroceder"""
@@ -123,79 +153,45 @@ class LyricTracker:
             self.current_slide -= 1
             self.current_word_index = 0
             self.force_reload_current_slide()
-            print(f"← RETROCESO MANUAL → Slide {self.current_slide} recargado 100% limpio")
-            self._preload_slides_ahead(3)
+            log.info("retroceso", "← RETROCESO MANUAL → Slide {slide} recargado 100% limpio", slide=self.current_slide)
             return True
         else:
-            print("Ya estás en el primer slide")
+            log.info("primer_slide", "Ya estás en el primer slide")
             return False
 
     def next_slide(self):
         """Cambio de slide (automático o manual)"""
         self.current_slide += 1
         self.current_word_index = 0
-        self.last_slide_change_time = time.time()
+        self.last_slide_change_time = self.clock.now()
 
         # ← CLAVE: reset_progress=True para inicializar correctamente el estado del coro
         self.force_reload_current_slide(reset_progress=True)
 
-        slide_key = f"slide_{self.current_slide}"
-        self.current_slide_metadata = self.slide_metadata.get(slide_key, [])
-        print(f"→ Slide {self.current_slide} cargado LIMPIO y listo para cantar desde aquí")
+        log.info("slide_cargado", "→ Slide {slide} cargado LIMPIO y listo para cantar desde aquí", slide=self.current_slide)
 
-        self._preload_slides_ahead(3)
         return True
 
 
     def force_reload_current_slide(self, reset_progress=False):
         """
-        Fuerza recarga completa del slide actual.
+        Sincroniza el estado con el slide actual.
         reset_progress = True SOLO cuando hay cambio real de slide.
+        El plan del slide ya viene compilado: aquí no se normaliza nada.
         """
-        slide_key = f"slide_{self.current_slide}"
-
-        # Limpiar caché viejo
-        self.slide_words_cache.pop(slide_key, None)
-        self.slide_metadata.pop(slide_key, None)
-        self.preloaded_slides.pop(self.current_slide, None)
-
-        # Reconstruir desde cero con normalización completa
-        words = self.lyrics_data.get(slide_key, [])
-        metadata_words = []
-        content_words = []
-
-        for word in words:
-            if isinstance(word, str) and (
-                word.startswith("DUPLICADO") or
-                word.startswith("MITAD") or
-                "MITAD1" in word
-            ):
-                metadata_words.append(word)
-            else:
-                cleaned = word.lower()
-                cleaned = cleaned.replace('á','a').replace('é','e').replace('í','i').replace('ó','o').replace('ú','u')
-                cleaned = re.sub(r'[^a-z]', '', cleaned)
-                if cleaned:
-                    content_words.append(cleaned)
-
-        self.slide_words_cache[slide_key] = content_words
-        self.slide_metadata[slide_key] = metadata_words
-        self.current_slide_metadata = metadata_words
-
-        print(
-            f"RECARGA FORZADA slide {self.current_slide} → "
-            f"{len(content_words)} palabras listas (normalizadas)"
-        )
+        self.current_slide_metadata = list(self.plan.metadata)
 
         # 🔑 GESTIÓN CORRECTA DEL ESTADO
         if reset_progress:
             self.current_word_index = 0
-            self.last_progress_time = time.time()
+            self.recent_words.clear()
+            self.align_window.clear()
+            self.last_progress_time = self.clock.now()
 
             if self.is_current_slide_duplicated():
                 self.coro_fase = 1
                 self.coro_crossed = False
-                print("🎵 CORO DETECTADO → Fase 1 iniciada")
+                log.debug("coro_detectado", "🎵 CORO DETECTADO → Fase 1 iniciada", slide=self.current_slide)
             else:
                 self.coro_fase = 0
                 self.coro_crossed = False
@@ -260,51 +256,40 @@ class LyricTracker:
                     pass
         return len(words) // 2
 
-    def _build_words_cache(self):
-        """Cache con normalización COMPLETA de acentos"""
-        for slide_key, words in self.lyrics_data.items():
-            metadata_words = []
-            content_words = []
-            
-            for word in words:
-                if isinstance(word, str) and (
-                    word.startswith("DUPLICADO") or 
-                    word.startswith("MITAD") or 
-                    "MITAD1" in word
-                ):
-                    metadata_words.append(word)
-                else:
-                    cleaned = word.lower()
-                    cleaned = cleaned.replace('á','a').replace('é','e').replace('í','i').replace('ó','o').replace('ú','u')
-                    cleaned = re.sub(r'[^a-z]', '', cleaned)
-                    if cleaned:
-                        content_words.append(cleaned)
-            
-            self.slide_words_cache[slide_key] = content_words
-            self.slide_metadata[slide_key] = metadata_words
-
-   
     def get_current_slide_text(self):
         """Obtiene solo el contenido (sin metadatos) - 100% compatible"""
-        slide_key = f"slide_{self.current_slide}"
-        return self.slide_words_cache.get(slide_key, [])
+        return self.plan.words
 
     def get_current_slide_metadata(self):
         """Obtiene metadatos del slide actual"""
-        slide_key = f"slide_{self.current_slide}"
-        return self.slide_metadata.get(slide_key, [])
+        return list(self.plan.metadata)
+
+    def has_slide(self, number):
+        """True si el slide existe en la canción"""
+        return number in self.song_plan
+
+    def pause_timers(self):
+        """Sin voz (VAD): el tiempo en silencio no cuenta para anti-stuck ni ignición"""
+        if self.timers_paused_at is None:
+            self.timers_paused_at = self.clock.now()
+
+    def resume_timers(self):
+        """Volvió la voz: los timers se corren hacia adelante lo que duró el silencio"""
+        if self.timers_paused_at is None:
+            return
+        now = self.clock.now()
+        # Si algo reinició un timer durante la pausa, solo cuenta el silencio posterior
+        self.last_progress_time += now - max(self.timers_paused_at, self.last_progress_time)
+        self.last_strong_word_time += now - max(self.timers_paused_at, self.last_strong_word_time)
+        self.timers_paused_at = None
 
     def is_current_slide_duplicated(self):
         """Detecta si el slide actual tiene contenido duplicado"""
-        slide_key = f"slide_{self.current_slide}"
-        return slide_key in self.slide_structures
+        return self.plan.duplicated
 
     def get_duplication_split_point(self):
         """Obtiene el punto de división para slides duplicados"""
-        slide_key = f"slide_{self.current_slide}"
-        if slide_key in self.slide_structures:
-            return self.slide_structures[slide_key]['half_point']
-        return len(self.get_current_slide_text()) // 2
+        return self.plan.half_point
 
     def _load_config(self):
         """Carga configuración desde JSON"""
@@ -426,10 +411,11 @@ class LyricTracker:
                 ctx_word = current_slide_words[ctx_pos]
                 
                 # Matching estricto: solo salta si es muy buena coincidencia
-                if (jellyfish.soundex(rec_word) == jellyfish.soundex(ctx_word) and
-                    jellyfish.levenshtein_distance(rec_word, ctx_word) <= 1):
+                if (self.fuzzy.soundex(rec_word) == self.fuzzy.soundex(ctx_word) and
+                    self.fuzzy.distance(rec_word, ctx_word, 99) <= 1):
                     
-                    print(f"CONTEXTUAL SALTO SEGURO +{offset}: '{rec_word}' → '{ctx_word}'")
+                    log.debug("salto_contextual", "CONTEXTUAL SALTO SEGURO +{offset}: '{word}' → '{expected}'",
+                              offset=offset, word=rec_word, expected=ctx_word)
                     return ctx_word, ctx_pos + 1
         
         return None, current_position
@@ -437,129 +423,277 @@ class LyricTracker:
 
 
     
-    def _sync_from_anywhere(self, recognized_words, current_slide_words):
-        """Busca palabras clave fuertes del slide y sincroniza desde cualquier parte"""
-        # Palabras clave fuertes del slide actual (las que más se repiten o son únicas)
-        key_words = []
-        for i, word in enumerate(current_slide_words):
-            if word in ["jesus", "senor", "creo", "poder", "gloria", "recibe", "manos", "levanta", "presencia", "aqui"]:
-                key_words.append((word, i))
-        
-        for rec_word in recognized_words:
-            for key, pos in key_words:
-                if (jellyfish.soundex(rec_word) == jellyfish.soundex(key) or
-                    jellyfish.levenshtein_distance(rec_word, key) <= 1):
-                    if pos > self.current_word_index:
-                        print(f"SINCRONIZACIÓN SEGURA: '{rec_word}' → '{key}' en posición {pos}")
-                        self.current_word_index = pos + 1
-                        return True
-        return False
-
-    
-
-    def process_recognized_text(self, recognized_text):
-        # Normalización
-        text = recognized_text.lower().strip()
-        text = text.replace('á','a').replace('é','e').replace('í','i').replace('ó','o').replace('ú','u')
-        text = re.sub(r'[^a-z\s]', ' ', text)
-        if len(text) < 3:
-            return "CONTINUE"
-
-        words = [w for w in text.split() if len(w) > 1]
-        if not words:
-            return "CONTINUE"
-
-        current_slide_words = [
-            w.lower().replace('á','a').replace('é','e').replace('í','i').replace('ó','o').replace('ú','u')
-            for w in self.get_current_slide_text()
-        ]
-
-        old_index = self.current_word_index
-
-        # Matching normal
+    def _match_greedy(self, words, plan):
+        """Matcher voraz: compara cada palabra solo con la palabra esperada"""
+        current_slide_words = plan.words
+        ids = plan.ids
+        phonetic_ids = plan.phonetic_ids
+        vocab = self.song_plan.vocab
+        phonetics = self.song_plan.phonetics
+        fuzzy = self.fuzzy
         for word in words:
-            if self.current_word_index >= len(current_slide_words):
+            index = self.current_word_index
+            if index >= len(current_slide_words):
                 break
-            expected = current_slide_words[self.current_word_index]
+            expected = current_slide_words[index]
             if (
-                jellyfish.soundex(word) == jellyfish.soundex(expected) or
-                jellyfish.levenshtein_distance(word, expected) <= 2 or
+                vocab.get(word) == ids[index] or      # comparación de enteros
+                phonetics.get(fuzzy.soundex(word)) == phonetic_ids[index] or
+                expected in fuzzy.lookup(word) or    # distancia ≤ 2 sin Levenshtein par a par
                 expected in word or
                 word in expected or
                 word[:3] == expected[:3]
             ):
                 self.current_word_index += 1
 
-        # Sincronización segura
+    def _match_alignment(self, words, plan):
+        """
+        Matcher por alineamiento: la ventana reciente se alinea contra una banda
+        de posiciones del slide (tolera palabras omitidas o insertadas por Vosk)
+        """
+        self.align_window.extend(words)
+        result = self.aligner.align(plan.number, self.align_window, self.current_word_index)
+        if result is None:
+            return
+        position, confidence = result
+        self.last_alignment = result
+        if confidence >= self.alignment_config.get("min_confidence", 0.5) and position > self.current_word_index:
+            self.current_word_index = position
+
+    def _hmm_change_at(self, plan):
+        """Palabras cantadas a partir de las cuales el HMM cambia de slide"""
+        if plan.duplicated:
+            return plan.chorus_change_index
+        return int(len(plan) * plan.progress_threshold + 0.999)
+
+    def _process_hmm(self, words):
+        """
+        Motor probabilístico: un paso forward por palabra y decisiones por
+        masa de probabilidad (sin fases de coro ni anti-stuck por tiempo).
+        """
+        hmm = self.hmm
+        cfg = self.hmm_config
+
+        if self._hmm_slide != self.current_slide:
+            # El slide cambió desde fuera (F8, PowerPoint, comando de voz):
+            # si el modelo no lo esperaba, se reinicia en ese slide
+            believed, _, _ = hmm.best()
+            if believed not in (self.current_slide, self.current_slide - 1):
+                hmm.reset(self.current_slide, self.current_word_index)
+            self._hmm_slide = self.current_slide
+
+        old_index = self.current_word_index
+        for word in words:
+            hmm.update(word)
+
+        slide, index, _ = hmm.best()
+        if slide == self.current_slide and index > self.current_word_index:
+            self.current_word_index = index
+            self.last_progress_time = self.clock.now()
+
+        plan = self.plan
+        change_at = self._hmm_change_at(plan)
+        if plan.words and hmm.mass_ahead(self.current_slide, change_at) >= cfg.get("change_mass", 0.6):
+            log.info("fin_slide_hmm", "🎶 HMM: fin de slide {slide} (palabra {index}/{total})",
+                     slide=self.current_slide, index=self.current_word_index, total=len(plan))
+            self._hmm_slide = self.current_slide + 1
+            return "CHANGE_SLIDE"
+
+        # La masa se fue a otro slide: coro repetido o verso saltado
+        mass = hmm.slide_mass()
+        best_index = int(mass.argmax())
+        target = hmm.numbers[best_index]
+        # (la cola del slide anterior NO es un salto: se cambió antes de terminarlo)
+        finishing_previous = (
+            target == self.current_slide - 1 and slide == target and
+            index >= self._hmm_change_at(self.song_plan.get(target))
+        )
         if (
-            not self.is_current_slide_duplicated() and
-            self.current_word_index < len(current_slide_words) * 0.4
+            target not in (self.current_slide, self.current_slide + 1) and
+            not finishing_previous and
+            mass[best_index] >= cfg.get("goto_mass", 0.8)
         ):
-            self._sync_from_anywhere(words, current_slide_words)
+            position = index if slide == target else 0
+            self.last_relocation = RelocationDecision("GOTO", target, position, float(mass[best_index]), [])
+            self.goto_target = target
+            self._hmm_slide = target
+            log.info("reubicacion_hmm", "REUBICACIÓN HMM → Slide {slide} ({mass:.0%})",
+                     slide=target, mass=float(mass[best_index]))
+            return "GOTO_SLIDE"
+
+        return "PROGRESS" if self.current_word_index > old_index else "CONTINUE"
+
+    def _tail_start(self, plan):
+        """Primera palabra desde la que el tracker puede dejar el slide (lo que sigue es la cola)"""
+        if plan.duplicated:
+            return plan.chorus_change_index
+        return int(min(plan.early_transition_at, len(plan) * plan.progress_threshold))
+
+    def _relocate(self):
+        """
+        Reubica al cantante en CUALQUIER slide usando el índice de n-gramas
+        con las últimas palabras reconocidas.
+        - SYNC: salto hacia adelante dentro del slide actual
+        - GOTO: el cantante está en otro slide (coro repetido, verso saltado)
+        """
+        cfg = self.relocation_config
+        candidates = self.ngram_index.locate(self.recent_words, near_slide=self.current_slide)
+        if not candidates:
+            return None
+
+        best = candidates[0]
+        action = "NONE"
+        # La cola del slide anterior NO es un salto: el tracker cambia antes de
+        # terminarlo (75-85 %) y el cantante sigue con las últimas palabras
+        # (en un coro duplicado la cola también vota, con el mismo puntaje, por la primera mitad)
+        tail_start = self._tail_start(self.song_plan.get(best.slide)) if best.slide in self.song_plan else 0
+        finishing_previous = best.slide == self.current_slide - 1 and any(
+            c.slide == best.slide and c.score == best.score and c.position >= tail_start
+            for c in candidates
+        )
+        if best.slide == self.current_slide:
+            if (
+                not self.plan.duplicated and
+                best.score >= cfg.get("min_sync_score", 5) and
+                best.position > self.current_word_index
+            ):
+                log.debug("sincronizacion", "SINCRONIZACIÓN N-GRAMA: posición {old} → {position} (puntaje {score})",
+                          old=self.current_word_index, position=best.position, score=best.score)
+                self.current_word_index = best.position
+                action = "SYNC"
+        elif (
+            not finishing_previous and
+            best.score >= cfg.get("min_goto_score", 12) and
+            self.clock.now() - self.last_slide_change_time >= cfg.get("cooldown", 4.0) and
+            self.ngram_index.ends_in(self.recent_words, best.slide)
+        ):
+            action = "GOTO"
+            self.goto_target = best.slide
+
+        self.last_relocation = RelocationDecision(action, best.slide, best.position, best.score, candidates)
+        return self.last_relocation
+
+    def sync_to(self, slide):
+        """El slide cambió desde fuera (PowerPoint): se recarga limpio y los timers arrancan de nuevo"""
+        self.current_slide = slide
+        self.current_word_index = 0
+        self.last_progress_time = self.clock.now()
+        self.last_strong_word_time = self.clock.now()
+        self.force_reload_current_slide()
+
+    def jump_to(self, slide, position=0):
+        """Reubica el tracker en otro slide (después de un GotoSlide)"""
+        self.current_slide = slide
+        self.last_slide_change_time = self.clock.now()
+        self.force_reload_current_slide(reset_progress=True)
+        self.current_word_index = min(position, len(self.plan))
+        if self.plan.duplicated and self.current_word_index >= self.plan.chorus_cross_index:
+            # Cayó en la segunda repetición del coro: el cruce ya pasó, no se vuelve a half_point
+            self.coro_fase = 2
+            self.coro_crossed = True
+
+    def process_recognized_text(self, recognized_text):
+        # Normalización (solo del texto reconocido; el slide ya viene compilado)
+        # (llegan solo palabras nuevas vía HypothesisDiff: una palabra corta como
+        # "mi" o "tu" es válida por sí sola, el filtro es por palabra)
+        if isinstance(recognized_text, list):
+            recognized_text = ' '.join(recognized_text)
+
+        all_words = normalize_text(recognized_text)
+        words = [w for w in all_words if len(w) > 1]
+        if not words:
+            return "CONTINUE"
+
+        if self.hmm is not None:
+            return self._process_hmm(all_words)
+
+        plan = self.plan
+        current_slide_words = plan.words
+
+        old_index = self.current_word_index
+
+        # Matching normal (voraz o alineamiento, según config.json)
+        if self.matcher == "alignment":
+            self._match_alignment(all_words, plan)
+        else:
+            self._match_greedy(words, plan)
+
+        # Reubicación por n-gramas (dentro del slide o en cualquier otro slide)
+        # (el matcher voraz casi siempre "avanza" algo, por eso se evalúa siempre;
+        #  GOTO exige varias palabras seguidas EXACTAS de otro slide)
+        self.recent_words.extend(all_words)
+        if self.relocation_config.get("enabled", True):
+            decision = self._relocate()
+            if decision is not None and decision.action == "GOTO":
+                log.info("reubicacion", "REUBICACIÓN → Slide {slide} posición {position} (puntaje {score})",
+                         slide=decision.slide, position=decision.position, score=decision.score)
+                return "GOTO_SLIDE"
 
 
         # === Anti-stuck por tiempo (DESACTIVADO EN COROS) ===
-        tiempo_sin_avance = time.time() - self.last_progress_time
+        tiempo_sin_avance = self.clock.now() - self.last_progress_time
         if (
-            not self.is_current_slide_duplicated() and
+            not plan.duplicated and
             len(current_slide_words) > 10 and
             self.current_word_index > 3 and
             self.current_word_index == old_index and
             tiempo_sin_avance > 12.0
         ):
-            print(f"ANTI-STUCK GLOBAL: {tiempo_sin_avance:.1f}s sin avance → Forzando cambio")
+            log.info("anti_stuck", "ANTI-STUCK GLOBAL: {seconds:.1f}s sin avance → Forzando cambio",
+                     seconds=tiempo_sin_avance, slide=self.current_slide)
             return "CHANGE_SLIDE"
 
         # Actualiza tiempo si hubo progreso
         if self.current_word_index > old_index:
-            self.last_progress_time = time.time()
-            if self.is_current_slide_duplicated():
-                progreso_coro = self.current_word_index / len(current_slide_words)
-                print(f"PROGRESO CORO: {self.current_word_index}/{len(current_slide_words)} ({progreso_coro:.0%}) - Fase {self.coro_fase}")
+            self.last_progress_time = self.clock.now()
+            if plan.duplicated:
+                log.debug("progreso_coro", "PROGRESO CORO: {index}/{total} ({progress:.0%}) - Fase {phase}",
+                          index=self.current_word_index, total=len(current_slide_words),
+                          progress=self.current_word_index / len(current_slide_words), phase=self.coro_fase)
 
                 # === Gestión de coros duplicados (UNIVERSAL + ANTICIPACIÓN INTELIGENTE) ===
-        if self.is_current_slide_duplicated():
-            half_point = self.get_duplication_split_point()  # ya lo tienes como get_duplication_split_point
-            total_words = len(current_slide_words)
+        if plan.duplicated:
+            half_point = plan.half_point
 
-            # Cruce tolerante (65% primera mitad)
-            cross_threshold = int(half_point * 0.65)
+            # Cruce tolerante (65% primera mitad, precalculado en el plan)
+            cross_threshold = plan.chorus_cross_index
 
             if self.coro_fase == 1 and not self.coro_crossed and self.current_word_index >= cross_threshold:
-                print(f"CRUCE DE CORO → Segunda repetición iniciada (índice {self.current_word_index}/{half_point})")
+                log.debug("cruce_coro", "CRUCE DE CORO → Segunda repetición iniciada (índice {index}/{half})",
+                          index=self.current_word_index, half=half_point)
                 self.coro_fase = 2
                 self.coro_crossed = True
                 self.current_word_index = half_point
-                self.last_progress_time = time.time()
+                self.last_progress_time = self.clock.now()
 
                         # === ANTICIPACIÓN EN FASE 2 (AJUSTADO PARA DEMORARSE UN POQUITO MÁS) ===
             if self.coro_fase == 2:
                 # Avance principal: ahora con 70% del slide total (más conservador que 60%)
-                if self.current_word_index >= int(total_words * 0.70):  # ~15-16 palabras en 22
-                    print("CORO CASI COMPLETO (70% segunda vuelta) → Cambiando con fluidez")
+                if self.current_word_index >= plan.chorus_change_index:  # ~15-16 palabras en 22
+                    log.info("coro_completo", "CORO CASI COMPLETO (70% segunda vuelta) → Cambiando con fluidez",
+                             slide=self.current_slide)
                     self.coro_fase = 0
                     self.coro_crossed = False
                     return "CHANGE_SLIDE"
 
                 # Anti-stuck rápido: 8 segundos (en vez de 6) para dar más margen
                 if tiempo_sin_avance > 8.0 and self.current_word_index > half_point:
-                    print("ANTI-STUCK EN CORO → Avanzando tras pausa moderada")
+                    log.info("anti_stuck_coro", "ANTI-STUCK EN CORO → Avanzando tras pausa moderada",
+                             slide=self.current_slide)
                     self.coro_fase = 0
                     self.coro_crossed = False
                     return "CHANGE_SLIDE"
         # =====================================================================
 
         # === AVANCE NATURAL POR PROGRESO DE LETRA (fuera de coros) ===
-        if not self.is_current_slide_duplicated():
+        if not plan.duplicated:
             total = len(current_slide_words)
             if total > 0:
                 progreso = self.current_word_index / total
-                umbral = 0.75 if total <= 10 else 0.85
+                umbral = plan.progress_threshold
                 if progreso >= umbral:
-                    print(
-                        f"🎶 Fin de slide detectado por progreso "
-                        f"({progreso:.0%}, umbral {umbral:.0%}) → Avanzando"
-                    )
+                    log.info("fin_slide", "🎶 Fin de slide detectado por progreso ({progress:.0%}, umbral {threshold:.0%}) → Avanzando",
+                             slide=self.current_slide, progress=progreso, threshold=umbral)
                     return "CHANGE_SLIDE"
 
         return "PROGRESS" if self.current_word_index > old_index else "CONTINUE"
@@ -606,7 +740,7 @@ class LyricTracker:
                 word == expected.replace('í','i').replace('ó','o').replace('á','a').replace('é','e').replace('ú','u')):
                 jump = i - self.current_word_index
                 self.current_word_index = i + 1
-                print(f"Look-ahead +{jump}: '{word}' → posición {i+1}")
+                log.debug("look_ahead", "Look-ahead +{jump}: '{word}' → posición {position}", jump=jump, word=word, position=i + 1)
                 return True
         return False
    
@@ -628,7 +762,7 @@ class LyricTracker:
         """Reinicia el seguimiento"""
         self.current_slide = slide_number
         self.current_word_index = 0
-        print(f"🔄 Seguimiento reiniciado al Slide {slide_number}")
+        log.info("reinicio", "🔄 Seguimiento reiniciado al Slide {slide}", slide=slide_number)
 
     def _detectar_aplausos_o_gritos(self, text):
             """Detecta gritos de alabanza típicos"""
@@ -641,7 +775,7 @@ class LyricTracker:
             if count >= 2:
                 self.aplausos_detectados += count
                 if self.aplausos_detectados >= 3:
-                    print("¡APLAUSOS/GRITOS DETECTADOS! → Forzando cambio")
+                    log.info("aplausos", "¡APLAUSOS/GRITOS DETECTADOS! → Forzando cambio", count=self.aplausos_detectados)
                     return True
             return False
 
@@ -658,7 +792,7 @@ class LyricTracker:
         if self.current_word_index > 5:
             return None  # Ya avanzó un poco → todo bien
 
-        tiempo_desde_ultimo_progreso = time.time() - self.last_progress_time
+        tiempo_desde_ultimo_progreso = self.clock.now() - self.last_progress_time
 
         # Tolerancia dinámica: cuanto más avanzado el slide, más paciencia
         tolerancia = {
@@ -668,7 +802,8 @@ class LyricTracker:
         }.get(self.current_slide, 60)
 
         if tiempo_desde_ultimo_progreso > tolerancia:
-            print(f"IGNICIÓN INTELIGENTE: {tiempo_desde_ultimo_progreso:.1f}s sin progreso → Cambio forzado (slide {self.current_slide} → {self.current_slide + 1})")
+            log.info("ignicion", "IGNICIÓN INTELIGENTE: {seconds:.1f}s sin progreso → Cambio forzado (slide {slide} → {next})",
+                     seconds=tiempo_desde_ultimo_progreso, slide=self.current_slide, next=self.current_slide + 1)
             return "CHANGE_SLIDE"
 
         return None
@@ -676,21 +811,20 @@ class LyricTracker:
 
     def forzar_siguiente_slide(self):
         """FUNCIÓN PÚBLICA para tecla de emergencia (F8, pedal, etc.)"""
-        print("🚨 BOTÓN DE EMERGENCIA PRESIONADO → Cambio inmediato")
-        self.ultimo_cambio_slide = time.time()
+        log.info("emergencia", "🚨 BOTÓN DE EMERGENCIA PRESIONADO → Cambio inmediato")
+        self.ultimo_cambio_slide = self.clock.now()
         self.aplausos_detectados = 0
         self.coro_repetido_detectado = False
         return "CHANGE_SLIDE"
 
     def resetear_a_inicio(self):
         """Detecta frases como "Vamos a cantar", "Esta canción dice", etc."""
-        print("RESETEO AUTOMÁTICO → Volviendo al slide 2")
+        log.info("reseteo", "RESETEO AUTOMÁTICO → Volviendo al slide 2")
         self.current_slide = 2
         self.current_word_index = 0
-        self.start_time = time.time()
+        self.start_time = self.clock.now()
         self.aplausos_detectados = 0
         self.coro_repetido_detectado = False
-        self._preload_slides_ahead(3)
 
 
 
@@ -0,0 +1,273 @@
+"""
+Métricas de memoria fija para sesiones largas (servicios de 2 h o más).
+
+Contadores, gauges e histogramas logarítmicos en un MetricsRegistry que
+comparten balanced_main, optimized_main y fast_audio_processor (REGISTRY).
+MetricsExporter los escribe cada tanto a un archivo local, en formato de
+texto de Prometheus o JSON, reemplazándolo entero (se puede leer en vivo).
+
+    "metrics": {"export_file": "metricas.prom", "format": "prometheus", "interval": 10.0}
+"""
+import json
+import math
+import os
+import threading
+import time
+
+
+class Counter:
+    """Valor que solo crece (un escritor por contador)"""
+
+    kind = "counter"
+
+    def __init__(self, help_text=""):
+        self.help = help_text
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+
+class Gauge:
+    """Último valor observado"""
+
+    kind = "gauge"
+
+    def __init__(self, help_text=""):
+        self.help = help_text
+        self.value = 0.0
+
+    def set(self, value):
+        self.value = value
+
+
+class Histogram:
+    """
+    Histograma con buckets logarítmicos (memoria fija).
+    Cada bucket cubre un ~5 % más que el anterior, de min_value a max_value:
+    record() es O(1) y los percentiles tienen un error relativo de ~2.5 %.
+    Los valores fuera de rango caen en el primer/último bucket (min y max
+    se guardan exactos).
+    """
+
+    kind = "summary"
+    RATIO = 1.05
+
+    def __init__(self, help_text="", min_value=1e-5, max_value=30.0):
+        self.help = help_text
+        self.min_value = min_value
+        self._log_ratio = math.log(self.RATIO)
+        self.counts = [0] * (int(math.log(max_value / min_value) / self._log_ratio) + 2)
+        self.count = 0
+        self.total = 0.0
+        self.min = 0.0
+        self.max = 0.0
+
+    def record(self, value):
+        if value < 0:
+            return
+        if value <= self.min_value:
+            index = 0
+        else:
+            index = min(int(math.log(value / self.min_value) / self._log_ratio) + 1, len(self.counts) - 1)
+        self.counts[index] += 1
+        if not self.count or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self.count += 1
+        self.total += value
+
+    def percentile(self, p):
+        """Valor (punto medio geométrico del bucket) del percentil p en [0, 1]"""
+        if not self.count:
+            return 0.0
+        target = p * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= target:
+                if index == 0:
+                    return self.min
+                estimate = self.min_value * self.RATIO ** (index - 0.5)
+                return max(self.min, min(self.max, estimate))
+        return self.max
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'mean': self.mean,
+            'min': self.min,
+            'p50': self.percentile(0.50),
+            'p95': self.percentile(0.95),
+            'p99': self.percentile(0.99),
+            'max': self.max,
+        }
+
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _label_text(labels):
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"')
+        parts.append(f'{key}="{value}"')
+    return ",".join(parts)
+
+
+class MetricsRegistry:
+    """
+    Métricas por nombre (+ etiquetas opcionales). counter()/gauge()/histogram()
+    devuelven la existente si ya se creó, así cada módulo pide la suya sin
+    coordinarse. Los collectors son funciones que devuelven {nombre: valor}
+    y se leen solo al exportar (estado que ya vive en otro objeto).
+    """
+
+    def __init__(self):
+        self._metrics = {}      # (nombre, etiquetas) → métrica
+        self._collectors = []
+        self._lock = threading.Lock()
+        self.created_at = time.time()
+
+    def _get(self, cls, name, help_text, labels, **options):
+        key = (name, tuple(sorted((labels or {}).items())))
+        metric = self._metrics.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(key)
+                if metric is None:
+                    metric = cls(help_text, **options)
+                    self._metrics[key] = metric
+        return metric
+
+    def counter(self, name, help_text="", labels=None):
+        return self._get(Counter, name, help_text, labels)
+
+    def gauge(self, name, help_text="", labels=None):
+        return self._get(Gauge, name, help_text, labels)
+
+    def histogram(self, name, help_text="", labels=None, **options):
+        return self._get(Histogram, name, help_text, labels, **options)
+
+    def collector(self, fn):
+        """fn() → {nombre: valor numérico}, exportado como gauges"""
+        self._collectors.append(fn)
+
+    def _collected(self):
+        values = {}
+        for fn in list(self._collectors):
+            try:
+                values.update(fn())
+            except Exception:
+                continue
+        values['uptime_seconds'] = time.time() - self.created_at
+        return values
+
+    def snapshot(self):
+        """dict serializable con todas las métricas"""
+        metrics = {}
+        for (name, labels), metric in list(self._metrics.items()):
+            entry = metric.summary() if isinstance(metric, Histogram) else metric.value
+            key = f"{name}{{{_label_text(labels)}}}" if labels else name
+            metrics[key] = entry
+        metrics.update(self._collected())
+        return {'timestamp': time.time(), 'metrics': metrics}
+
+    def to_prometheus(self):
+        """Formato de texto de Prometheus (histogramas como summary con cuantiles)"""
+        lines = []
+        described = set()
+        for (name, labels), metric in sorted(self._metrics.items(), key=lambda item: item[0]):
+            if name not in described:
+                described.add(name)
+                if metric.help:
+                    lines.append(f"# HELP {name} {metric.help}")
+                lines.append(f"# TYPE {name} {metric.kind}")
+            label_text = _label_text(labels)
+            if isinstance(metric, Histogram):
+                for q in QUANTILES:
+                    quantile = _label_text(labels + (("quantile", q),))
+                    lines.append(f"{name}{{{quantile}}} {metric.percentile(q):.6g}")
+                suffix = f"{{{label_text}}}" if label_text else ""
+                lines.append(f"{name}_sum{suffix} {metric.total:.6g}")
+                lines.append(f"{name}_count{suffix} {metric.count}")
+            else:
+                suffix = f"{{{label_text}}}" if label_text else ""
+                lines.append(f"{name}{suffix} {metric.value}")
+        for name, value in sorted(self._collected().items()):
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {float(value):.6g}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path, fmt="prometheus"):
+        """Escribe el archivo entero de una vez (replace atómico)"""
+        temp = path + ".tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            if fmt == "json":
+                json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+            else:
+                f.write(self.to_prometheus())
+        os.replace(temp, path)
+
+
+REGISTRY = MetricsRegistry()
+
+
+class MetricsExporter:
+    """Hilo de fondo que exporta el registry cada interval segundos (y una vez más al parar)"""
+
+    def __init__(self, path, fmt="prometheus", interval=10.0, registry=REGISTRY):
+        self.path = path
+        self.fmt = fmt
+        self.interval = interval
+        self.registry = registry
+        self.exports = 0
+        self.errors = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-export", daemon=True)
+
+    @classmethod
+    def from_config(cls, config, registry=REGISTRY):
+        """Sección "metrics" de config.json; None si no hay export_file"""
+        path = (config or {}).get("export_file")
+        if not path:
+            return None
+        return cls(path, config.get("format", "prometheus"), config.get("interval", 10.0), registry)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def export_now(self):
+        try:
+            self.registry.export(self.path, self.fmt)
+            self.exports += 1
+        except OSError:
+            self.errors += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.export_now()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(self.interval)
+        self.export_now()
+
+
+def load_metrics_config(path="config.json"):
+    """Sección "metrics" de config.json (para los main que no cargan la config completa)"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f).get("metrics", {})
+    except (OSError, ValueError):
+        return {}
@@ -0,0 +1,77 @@
+from collections import namedtuple
+
+# Candidato de reubicación: slide, posición (índice de la siguiente palabra a cantar), puntaje
+Candidate = namedtuple('Candidate', ['slide', 'position', 'score'])
+
+# Decisión de reubicación que toma el tracker (se expone para GotoSlide y logs)
+RelocationDecision = namedtuple(
+    'RelocationDecision', ['action', 'slide', 'position', 'score', 'candidates']
+)
+
+
+class NGramIndex:
+    """
+    Índice invertido de bigramas/trigramas de TODA la canción.
+    (id1, id2[, id3]) → [(slide, posición después del n-grama), ...]
+    Las claves son tuplas de ids del vocabulario (enteros, no strings).
+
+    Con las últimas palabras reconocidas devuelve en microsegundos dónde
+    puede estar el cantante, aunque la banda haya saltado a otro slide.
+    """
+
+    def __init__(self, song_plan, orders=(2, 3)):
+        self.orders = orders
+        self.vocab = song_plan.vocab
+        self.postings = {}
+        self.slide_lengths = {}
+        for number, plan in song_plan.slides.items():
+            ids = tuple(plan.ids)
+            self.slide_lengths[number] = len(ids)
+            for n in orders:
+                for i in range(len(ids) - n + 1):
+                    gram = ids[i:i + n]
+                    self.postings.setdefault(gram, []).append((number, i + n))
+
+    def ends_in(self, recent_words, slide):
+        """
+        True si las dos últimas palabras son un bigrama de slide: el salto lo
+        respalda lo que se está cantando ahora, no palabras viejas de la ventana.
+        """
+        if len(recent_words) < 2:
+            return False
+        gram = tuple(self.vocab.get(w) for w in list(recent_words)[-2:])
+        return any(number == slide for number, _ in self.postings.get(gram, ()))
+
+    def locate(self, recent_words, near_slide=None, top_k=3):
+        """
+        Candidatos ordenados por puntaje (trigrama pesa 3, bigrama 2).
+        Cada n-grama vota por la posición proyectada al final de la ventana.
+        En empates gana el slide más cercano hacia adelante de near_slide.
+        """
+        recent = tuple(self.vocab.get(w) for w in recent_words)
+        total = len(recent)
+        scores = {}
+        for n in self.orders:
+            for i in range(total - n + 1):
+                hits = self.postings.get(recent[i:i + n])
+                if not hits:
+                    continue
+                words_after = total - (i + n)
+                for slide, end in hits:
+                    position = min(end + words_after, self.slide_lengths[slide])
+                    key = (slide, position)
+                    scores[key] = scores.get(key, 0) + n
+
+        if not scores:
+            return []
+
+        def rank(item):
+            (slide, position), score = item
+            if near_slide is None:
+                return (-score, slide, position)
+            distance = slide - near_slide
+            # adelante primero (0, 1, 2...), luego hacia atrás
+            return (-score, distance if distance >= 0 else 1000 - distance, position)
+
+        ranked = sorted(scores.items(), key=rank)[:top_k]
+        return [Candidate(slide, position, score) for (slide, position), score in ranked]
@@ -3,6 +3,7 @@ import vosk
 import json
 import time
 from lyric_tracker import LyricTracker, load_lyrics_data
+from metrics import REGISTRY, MetricsExporter, load_metrics_config
 import pyautogui
 
 class OptimizedAudioProcessor:
@@ -15,14 +16,16 @@ class OptimizedAudioProcessor:
         # CONFIGURACIÓN OPTIMIZADA
         self.chunk_size = 1500  # Chunk más pequeño para menor latencia
         
-        # Métricas
-        self.performance_metrics = {
-            'total_processing_time': 0,
-            'audio_captures': 0,
-            'slide_changes': 0,
-            'last_slide_change_time': None,
-            'slide_times': []
-        }
+        # Métricas de memoria fija (metrics.py, compartidas con balanced_main)
+        self.metrics = REGISTRY
+        self.audio_blocks = self.metrics.counter("audio_blocks_total", "Bloques leídos del stream")
+        self.slide_changes = self.metrics.counter("slide_changes_total", "Cambios de slide hechos por el sistema")
+        self.batch_seconds = self.metrics.histogram("batch_processing_seconds", "Lectura + Vosk + tracker por vuelta")
+        self.slide_intervals = self.metrics.histogram("slide_interval_seconds", "Tiempo entre cambios de slide",
+                                                      max_value=3600.0)
+        self.last_slide_change_time = None
+        self.total_time = 0.0
+        self.metrics_exporter = MetricsExporter.from_config(load_metrics_config())
         
         print("⚡ Procesador de Audio OPTIMIZADO Inicializado")
         print("💡 Máxima velocidad + Precisión equilibrada")
@@ -41,6 +44,8 @@ class OptimizedAudioProcessor:
             
             print("🎤 Escuchando... (Modo RÁPIDO - Ctrl+C para detener)")
             print("💡 Sistema optimizado para menor latencia")
+            if self.metrics_exporter is not None:
+                self.metrics_exporter.start()
             
             self._main_loop()
             
@@ -59,14 +64,14 @@ class OptimizedAudioProcessor:
         while self.is_listening:
             try:
                 current_time = time.time()
-                self.performance_metrics['total_processing_time'] = current_time - loop_start_time
+                self.total_time = current_time - loop_start_time
                 
                 # PROCESAR MÁS FRECUENTEMENTE
                 if current_time - last_processing_time >= processing_interval:
                     process_start = time.time()
                     
                     data = self.stream.read(self.chunk_size, exception_on_overflow=False)
-                    self.performance_metrics['audio_captures'] += 1
+                    self.audio_blocks.inc()
                     
                     # PROCESAMIENTO RÁPIDO: Enfocarse en resultados parciales
                     partial_result = json.loads(self.recognizer.PartialResult())
@@ -103,6 +108,7 @@ class OptimizedAudioProcessor:
                     
                     # Log de procesamiento lento
                     process_time = time.time() - process_start
+                    self.batch_seconds.record(process_time)
                     if process_time > 0.05:  # Más estricto
                         print(f"⏱️  Procesamiento: {process_time:.3f}s")
                     
@@ -186,9 +192,9 @@ class OptimizedAudioProcessor:
             print("✅ Slide cambiado (RÁPIDO)")
             
             current_time = time.time()
-            if self.performance_metrics['last_slide_change_time']:
-                time_since_last = current_time - self.performance_metrics['last_slide_change_time']
-                self.performance_metrics['slide_times'].append(time_since_last)
+            if self.last_slide_change_time:
+                time_since_last = current_time - self.last_slide_change_time
+                self.slide_intervals.record(time_since_last)
                 print(f"🕒 Tiempo entre slides: {time_since_last:.2f}s")
                 
                 # FEEDBACK EN TIEMPO REAL
@@ -199,8 +205,8 @@ class OptimizedAudioProcessor:
                 else:
                     print("🔶 Velocidad: LENTA - Considera ajustar sensibilidad")
             
-            self.performance_metrics['last_slide_change_time'] = current_time
-            self.performance_metrics['slide_changes'] += 1
+            self.last_slide_change_time = current_time
+            self.slide_changes.inc()
             
             change_time = time.time() - change_start
             print(f"⚡ Cambio completado en: {change_time:.3f}s")
@@ -218,17 +224,14 @@ class OptimizedAudioProcessor:
         print("📊 RESUMEN DE RENDIMIENTO OPTIMIZADO")
         print("="*50)
         
-        metrics = self.performance_metrics
-        total_time = metrics['total_processing_time']
+        print(f"⏱️  Tiempo total de ejecución: {self.total_time:.2f}s")
+        print(f"🎤 Capturas de audio procesadas: {self.audio_blocks.value}")
+        print(f"🔄 Cambios de slide realizados: {self.slide_changes.value}")
         
-        print(f"⏱️  Tiempo total de ejecución: {total_time:.2f}s")
-        print(f"🎤 Capturas de audio procesadas: {metrics['audio_captures']}")
-        print(f"🔄 Cambios de slide realizados: {metrics['slide_changes']}")
-        
-        if metrics['slide_times']:
-            avg_slide_time = sum(metrics['slide_times']) / len(metrics['slide_times'])
-            min_slide_time = min(metrics['slide_times'])
-            max_slide_time = max(metrics['slide_times'])
+        if self.slide_intervals.count:
+            avg_slide_time = self.slide_intervals.mean
+            min_slide_time = self.slide_intervals.min
+            max_slide_time = self.slide_intervals.max
             
             print(f"📈 Tiempo promedio entre slides: {avg_slide_time:.2f}s")
             print(f"🚀 Tiempo mínimo entre slides: {min_slide_time:.2f}s")
@@ -252,6 +255,8 @@ class OptimizedAudioProcessor:
     def stop_listening(self):
         """Limpia recursos"""
         self.is_listening = False
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.stop()
         if hasattr(self, 'stream'):
             self.stream.stop_stream()
             self.stream.close()
@@ -0,0 +1,122 @@
+import numpy as np
+
+
+class PositionHMM:
+    """
+    Rastreador probabilístico de la posición en TODA la canción.
+
+    Estado s = "ya se cantaron s palabras de la canción" (0 = antes de empezar).
+    Cada palabra reconocida hace un paso forward vectorizado:
+      - avanzar 1 o 2 palabras (2 = Vosk se comió una)
+      - quedarse (Vosk insertó una palabra que no está en la letra)
+      - saltar al inicio de cualquier slide (coro repetido, verso saltado)
+      - saltar a cualquier posición (probabilidad muy baja)
+    Repeticiones, saltos y coros salen del modelo de transición, sin timers.
+    Todo es O(posiciones) en NumPy.
+    """
+
+    def __init__(self, song_plan, p_next=0.80, p_skip=0.08, p_stay=0.10,
+                 p_jump_start=0.015, p_jump_any=0.005,
+                 p_match=0.90, p_phonetic=0.40, p_miss=0.02, p_insert=0.05):
+        self.p_next = p_next
+        self.p_skip = p_skip
+        self.p_stay = p_stay
+        self.p_jump_start = p_jump_start
+        self.p_jump_any = p_jump_any
+        self.p_match = p_match
+        self.p_phonetic = p_phonetic
+        self.p_miss = p_miss
+        self.p_insert = p_insert
+        self.fuzzy = song_plan.fuzzy
+        self.vocab = song_plan.vocab
+        self.phonetics = song_plan.phonetics
+
+        # El buffer de ids de la canción ya está en orden de slide:
+        # palabra k ↔ estado k+1 (vistas int32 sin copia)
+        self.numbers = song_plan.numbers
+        self.word_ids = np.frombuffer(song_plan.word_ids, dtype=np.int32)
+        self.phonetic_ids = np.frombuffer(song_plan.phonetic_ids, dtype=np.int32)
+        self.offsets = {n: song_plan.get(n).start for n in self.numbers}
+        self.lengths = {n: len(song_plan.get(n)) for n in self.numbers}
+
+        n_states = len(self.word_ids) + 1
+        slide_of = np.zeros(n_states, dtype=np.int64)
+        for i, number in enumerate(self.numbers):
+            start = self.offsets[number]
+            slide_of[start + 1:start + 1 + self.lengths[number]] = i
+        self.slide_index = slide_of
+        # Destinos de salto "inicio de slide" = primera palabra de cada slide
+        self.jump_start = np.zeros(n_states)
+        for number in self.numbers:
+            if self.lengths[number]:
+                self.jump_start[self.offsets[number] + 1] = 1.0
+        if self.jump_start.sum() > 0:
+            self.jump_start /= self.jump_start.sum()
+        self.jump_any = np.full(n_states, 1.0 / max(1, n_states - 1))
+        self.jump_any[0] = 0.0
+
+        self.alpha = np.zeros(n_states)
+        self._pred = np.empty(n_states)
+        self._emit = np.empty(n_states)
+        self.reset()
+
+    def __len__(self):
+        return len(self.alpha)
+
+    def reset(self, slide=None, index=0):
+        """Concentra toda la probabilidad en (slide, palabras ya cantadas)"""
+        self.alpha.fill(0.0)
+        state = 0 if slide is None else self.offsets.get(slide, 0) + index
+        self.alpha[min(state, len(self.alpha) - 1)] = 1.0
+
+    def update(self, word):
+        """Un paso forward con la palabra reconocida (ya normalizada)"""
+        alpha = self.alpha
+        pred = self._pred
+        emit = self._emit
+
+        # Transiciones que CONSUMEN una palabra de la letra
+        pred.fill(0.0)
+        pred[1:] += self.p_next * alpha[:-1]
+        pred[2:] += self.p_skip * alpha[:-2]
+        pred += self.p_jump_start * self.jump_start
+        pred += self.p_jump_any * self.jump_any
+
+        emit[0] = 0.0
+        tail = emit[1:]
+        tail.fill(self.p_miss)
+        tail[self.phonetic_ids == self.phonetics.get(self.fuzzy.soundex(word))] = self.p_phonetic
+        tail[self.word_ids == self.vocab.get(word)] = self.p_match
+        pred *= emit
+
+        # Quedarse: la palabra fue una inserción de Vosk
+        pred += self.p_stay * self.p_insert * alpha
+
+        total = pred.sum()
+        if total > 0.0:
+            np.divide(pred, total, out=alpha)
+        return alpha
+
+    def best(self):
+        """(slide, palabras cantadas en ese slide, probabilidad) del estado más probable"""
+        state = int(np.argmax(self.alpha))
+        if state == 0:
+            return self.numbers[0], 0, float(self.alpha[0])
+        number = self.numbers[self.slide_index[state]]
+        return number, state - self.offsets[number], float(self.alpha[state])
+
+    def slide_mass(self):
+        """Probabilidad total de cada slide (en el orden de self.numbers)"""
+        return np.bincount(self.slide_index[1:], weights=self.alpha[1:], minlength=len(self.numbers))
+
+    def mass_ahead(self, slide, index):
+        """Probabilidad de ir en (slide, index) o más adelante dentro del slide siguiente"""
+        if slide not in self.offsets:
+            return 0.0
+        start = self.offsets[slide] + max(index, 1)
+        position = self.numbers.index(slide)
+        end = self.offsets[slide] + self.lengths[slide] + 1
+        if position + 1 < len(self.numbers):
+            following = self.numbers[position + 1]
+            end = self.offsets[following] + self.lengths[following] + 1
+        return float(self.alpha[start:end].sum())
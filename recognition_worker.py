@@ -0,0 +1,250 @@
+"""
+Modo multiproceso: Vosk decodifica en su propio proceso.
+
+El proceso principal (captura + DSP, hotkeys, overlay, COM) escribe el audio
+ya procesado en un SharedAudioRing; el proceso de reconocimiento lo decodifica
+en lotes y devuelve los resultados (texto + palabras nuevas) por un Pipe.
+Una llamada COM lenta o una pausa del GC en el proceso principal ya no frena
+la decodificación, y Vosk no compite por el GIL con el loop de audio.
+
+Las decisiones del tracker se siguen tomando en el proceso principal: el
+tracker lo mueven también F8/F9, PowerPointSync y el overlay.
+"""
+import json
+import multiprocessing
+import signal
+import time
+
+from hypothesis_diff import HypothesisDiff
+from recognizer_pool import RecognizerPool, lean_recognizer
+from ring_buffer import SharedAudioRing, WaveformFeeder, frame_aligned_bytes
+from startup import load_model
+
+
+class RecognitionLoop:
+    """Lado del proceso de reconocimiento: ring compartido → Vosk → resultados por el pipe"""
+
+    def __init__(self, recognizer_pool, ring, control, events, batch_ms=60, idle_timeout=0.5):
+        self.pool = recognizer_pool
+        self.ring = ring
+        self.control = control
+        self.events = events
+        self.batch_bytes = frame_aligned_bytes(batch_ms)
+        self.idle_timeout = idle_timeout
+        self.recognizer = recognizer_pool.acquire()
+        self.hypothesis = HypothesisDiff()
+        self.feeder = WaveformFeeder()
+        self.generation = 0     # cuántos reset llegaron: viaja con cada resultado
+        self.running = True
+        self.stats = {
+            'batches': 0,
+            'decoded_bytes': 0,
+            'decode_time': 0.0,
+            'flushes': 0,
+            'resets': 0,
+        }
+
+    def run(self):
+        while self.running:
+            if not self.control.poll():
+                self.ring.wait(self.idle_timeout)
+            self._handle_control()
+            self._decode()
+
+    def _handle_control(self):
+        while self.running and self.control.poll():
+            message = self.control.recv()
+            kind = message[0]
+            if kind == "flush":
+                # Fin de frase (VAD): decodificar hasta donde iba el productor y vaciar Vosk
+                self._decode(limit=message[1])
+                self._final(self.recognizer.FinalResult(), self.ring.position)
+                self.stats['flushes'] += 1
+            elif kind == "reset":
+                self._reset(message[1], message[2], message[3])
+            elif kind == "configure":
+                self.batch_bytes = frame_aligned_bytes(message[1])
+            elif kind == "health":
+                self.events.send(("health", self.health()))
+            elif kind == "stop":
+                self.running = False
+                self.events.send(("health", self.health()))
+
+    def _decode(self, limit=None):
+        """Lotes completos de batch_bytes; con limit (flush) también el resto hasta limit"""
+        ring = self.ring
+        while self.running:
+            # Un reset pendiente va antes del próximo lote (no mezclar slides)
+            if limit is None and self.control.poll():
+                return
+            end = ring.written if limit is None else min(limit, ring.written)
+            available = end - ring.position
+            if available <= 0 or (limit is None and available < self.batch_bytes):
+                return
+
+            batch_start, batch = ring.peek(self.batch_bytes, limit)
+            position = batch_start + len(batch)
+            start = time.perf_counter()
+
+            accepted = self.feeder.accept(self.recognizer, batch)
+            # Recién ahora Vosk terminó con la vista: el productor puede reusar esa zona
+            ring.commit(position)
+            if accepted:
+                self._final(self.recognizer.Result(), position)
+
+            partial = json.loads(self.recognizer.PartialResult()).get('partial', '').strip()
+            new_words = self.hypothesis.feed_partial(partial)
+            # None = la parcial no cambió → no se manda nada
+            if partial and new_words is not None:
+                self.events.send(("partial", partial, new_words, position, self.generation))
+
+            self.stats['batches'] += 1
+            self.stats['decoded_bytes'] += len(batch)
+            self.stats['decode_time'] += time.perf_counter() - start
+
+    def _final(self, result_json, position):
+        text = json.loads(result_json).get('text', '').strip()
+        new_words = self.hypothesis.feed_final(text)
+        if text:
+            self.events.send(("final", text, new_words, position, self.generation))
+
+    def _reset(self, generation, grammar, next_grammar):
+        """Recognizer limpio del pool (O(1)); en modo gramática prepara el repuesto siguiente"""
+        self.generation = generation
+        self.recognizer = self.pool.acquire(self.recognizer, grammar)
+        if next_grammar is not None:
+            self.pool.set_grammar(next_grammar)
+        self.hypothesis.reset()
+        self.stats['resets'] += 1
+        self.events.send(("swapped", self.pool.stats['last_swap_ms']))
+
+    def health(self):
+        return dict(self.stats, recognizer_pool=self.pool.health(), zero_copy=self.feeder.zero_copy)
+
+
+def run_worker(model_path, ring_name, ring_capacity, doorbell, control, events,
+               batch_ms=60, prefetch=False, model_loader=load_model, factory=None):
+    """Punto de entrada del proceso de reconocimiento"""
+    # Ctrl+C llega a todo el grupo de procesos: el que decide cerrar es el principal
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    start = time.perf_counter()
+    try:
+        model = model_loader(model_path, prefetch=prefetch)
+        pool = RecognizerPool(model, 16000, configure=lean_recognizer, factory=factory)
+        ring = SharedAudioRing(ring_capacity, name=ring_name, doorbell=doorbell)
+        loop = RecognitionLoop(pool, ring, control, events, batch_ms)
+    except Exception as e:
+        events.send(("error", f"{type(e).__name__}: {e}"))
+        return
+    events.send(("ready", time.perf_counter() - start))
+
+    try:
+        loop.run()
+    except (EOFError, BrokenPipeError):
+        pass    # el proceso principal se fue
+    finally:
+        pool.close()
+        ring.close()
+
+
+class RecognitionWorker:
+    """
+    Lado del proceso principal: arranca el proceso de reconocimiento y habla con él.
+
+    ring     = SharedAudioRing donde escribe el pipeline DSP
+    reset()  = recognizer limpio (cambio de slide), flush() = fin de frase
+    results() devuelve sin bloquear los resultados que ya llegaron.
+
+    Cada reset() sube la generación y el proceso la devuelve con cada
+    resultado: lo que el recognizer viejo ya había mandado por el pipe
+    (audio del slide anterior) se descarta en vez de llegar al tracker.
+    """
+
+    def __init__(self, model_path, batch_ms=60, ring_ms=2000, prefetch=False,
+                 model_loader=load_model, factory=None):
+        # spawn también en Linux: el hijo no hereda hooks de teclado, COM ni hilos
+        context = multiprocessing.get_context("spawn")
+        self.doorbell = context.Event()
+        self.ring = SharedAudioRing(frame_aligned_bytes(ring_ms), doorbell=self.doorbell)
+        self._control, worker_control = context.Pipe()
+        self._events, worker_events = context.Pipe(duplex=False)
+        self.process = context.Process(
+            target=run_worker,
+            name="reconocimiento",
+            args=(model_path, self.ring.name, self.ring.capacity, self.doorbell, worker_control, worker_events),
+            kwargs=dict(batch_ms=batch_ms, prefetch=prefetch, model_loader=model_loader, factory=factory),
+            daemon=True,
+        )
+        self.ready_seconds = None
+        self.last_health = {}
+        self.generation = 0
+        self.stats = {'last_swap_ms': 0.0, 'partials': 0, 'finals': 0, 'stale': 0}
+
+    def start(self, timeout=None):
+        """Arranca el proceso y espera a que tenga el modelo cargado; devuelve self"""
+        self.process.start()
+        if not self._events.poll(timeout):
+            raise TimeoutError("El proceso de reconocimiento no respondió")
+        message = self._events.recv()
+        if message[0] != "ready":
+            self.process.join(1.0)
+            raise RuntimeError(f"Proceso de reconocimiento: {message[1]}")
+        self.ready_seconds = message[1]
+        return self
+
+    def _send(self, *message):
+        self._control.send(message)
+        self.doorbell.set()
+
+    def configure(self, batch_ms):
+        self._send("configure", batch_ms)
+
+    def reset(self, grammar=None, next_grammar=None):
+        self.generation += 1
+        self._send("reset", self.generation, grammar, next_grammar)
+
+    def flush(self):
+        self._send("flush", self.ring.written)
+
+    def wait(self, timeout):
+        """Bloquea hasta que haya resultados (o timeout)"""
+        return self._events.poll(timeout)
+
+    def results(self):
+        """
+        Resultados ya recibidos, sin bloquear: (tipo, texto, palabras_nuevas, posición).
+        Es un generador: la generación se compara al entregar cada resultado, así
+        un reset() hecho mientras se procesa uno descarta los viejos que siguen.
+        """
+        while self._events.poll():
+            message = self._events.recv()
+            kind = message[0]
+            if kind == "partial" or kind == "final":
+                if message[4] != self.generation:
+                    self.stats['stale'] += 1
+                    continue
+                self.stats[kind + 's'] += 1
+                yield message[:4]
+            elif kind == "swapped":
+                self.stats['last_swap_ms'] = message[1]
+            elif kind == "health":
+                self.last_health = message[1]
+            elif kind == "error":
+                print(f"❌ Proceso de reconocimiento: {message[1]}")
+
+    def close(self, timeout=2.0):
+        """Para el proceso y devuelve sus métricas finales"""
+        if self.process.is_alive():
+            try:
+                self._send("stop")
+                deadline = time.perf_counter() + timeout
+                while self.process.is_alive() and self._events.poll(max(0.0, deadline - time.perf_counter())):
+                    for _ in self.results():
+                        pass
+            except (EOFError, BrokenPipeError, OSError):
+                pass
+            self.process.join(timeout)
+            if self.process.is_alive():
+                self.process.terminate()
+        self.ring.close()
+        return self.last_health
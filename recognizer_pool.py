@@ -0,0 +1,177 @@
+import threading
+import time
+
+import vosk
+
+
+def lean_recognizer(recognizer):
+    """Sin tiempos por palabra: el tracker solo usa el texto"""
+    recognizer.SetWords(False)
+    recognizer.SetPartialWords(False)
+
+
+class RecognizerPool:
+    """
+    Mantiene un KaldiRecognizer de repuesto, limpio y listo, en un hilo de fondo.
+
+    En un cambio de slide el loop principal llama a acquire(usado): recibe el
+    repuesto en tiempo constante y el usado se recicla en el fondo con Reset()
+    (o se construye uno nuevo si Reset() no está disponible o falla).
+    Así el hilo de audio nunca espera a vosk.KaldiRecognizer(...).
+
+    Con gramática (modo grammar) el repuesto se prepara con self.grammar:
+    set_grammar() cambia la gramática objetivo y el hilo de fondo la aplica
+    (SetGrammar() si la versión de Vosk lo trae, si no reconstruye).
+
+    factory reemplaza a vosk.KaldiRecognizer (benchmarks con recognizers falsos).
+    """
+
+    def __init__(self, model, sample_rate=16000, configure=None, grammar=None, factory=None):
+        self.model = model
+        self._factory = factory or vosk.KaldiRecognizer
+        self.sample_rate = sample_rate
+        self.grammar = grammar
+        self._configure = configure
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._spare = None          # (recognizer, gramática)
+        self._recycle = []          # [(recognizer usado, gramática)]
+        self._active_grammar = None
+        self._running = True
+        self.stats = {
+            'swaps': 0,
+            'misses': 0,            # no había repuesto → construcción síncrona
+            'built': 0,
+            'resets': 0,
+            'reset_failures': 0,
+            'grammar_swaps': 0,
+            'last_swap_ms': 0.0,
+            'max_swap_ms': 0.0,
+            'total_swap_ms': 0.0,
+            'last_build_ms': 0.0,
+        }
+        self._thread = threading.Thread(target=self._worker, name="recognizer-pool", daemon=True)
+        self._thread.start()
+        self._wakeup.set()
+
+    def _build(self, grammar=None):
+        start = time.perf_counter()
+        if grammar is None:
+            recognizer = self._factory(self.model, self.sample_rate)
+        else:
+            recognizer = self._factory(self.model, self.sample_rate, grammar)
+        if self._configure:
+            self._configure(recognizer)
+        self.stats['built'] += 1
+        self.stats['last_build_ms'] = (time.perf_counter() - start) * 1000
+        return recognizer
+
+    def _worker(self):
+        while self._running:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            if not self._running:
+                break
+
+            with self._lock:
+                grammar = self.grammar
+                if self._spare is not None:
+                    if self._spare[1] == grammar:
+                        self._recycle.clear()
+                        continue
+                    # Repuesto con gramática vieja: se recicla con la nueva
+                    self._recycle.append(self._spare)
+                    self._spare = None
+                used = self._recycle.pop() if self._recycle else None
+                self._recycle.clear()
+
+            recognizer = None
+            if used is not None:
+                recognizer = self._recycle_recognizer(used[0], used[1], grammar)
+            if recognizer is None:
+                try:
+                    recognizer = self._build(grammar)
+                except Exception as e:
+                    print(f"⚠️ RecognizerPool: no se pudo crear recognizer: {e}")
+                    continue
+
+            with self._lock:
+                if self._spare is None:
+                    self._spare = (recognizer, grammar)
+                if self.grammar != grammar:
+                    self._wakeup.set()
+
+    def _recycle_recognizer(self, recognizer, old_grammar, grammar):
+        """Reset() (+ SetGrammar() si cambió la gramática); None si hay que reconstruir"""
+        try:
+            recognizer.Reset()
+            if old_grammar != grammar:
+                if grammar is None:
+                    return None     # volver a vocabulario abierto exige uno nuevo
+                recognizer.SetGrammar(grammar)
+                self.stats['grammar_swaps'] += 1
+            self.stats['resets'] += 1
+            return recognizer
+        except Exception:
+            self.stats['reset_failures'] += 1
+            return None
+
+    @property
+    def spare_ready(self):
+        return self._spare is not None
+
+    @property
+    def active_grammar(self):
+        return self._active_grammar
+
+    def set_grammar(self, grammar):
+        """Gramática con la que preparar el próximo repuesto (en segundo plano)"""
+        with self._lock:
+            if grammar == self.grammar:
+                return
+            self.grammar = grammar
+        self._wakeup.set()
+
+    def acquire(self, used=None, grammar=None):
+        """
+        Entrega un recognizer limpio (O(1) si el repuesto está listo y tiene
+        la gramática pedida; grammar=None → la gramática objetivo del pool).
+        """
+        start = time.perf_counter()
+        with self._lock:
+            wanted = grammar if grammar is not None else self.grammar
+            spare, self._spare = self._spare, None
+            if used is not None:
+                self._recycle.append((used, self._active_grammar))
+            if spare is not None and spare[1] != wanted:
+                self._recycle.append(spare)
+                spare = None
+
+        if spare is None:
+            # El repuesto todavía no estaba: no queda otra que construirlo aquí
+            self.stats['misses'] += 1
+            recognizer = self._build(wanted)
+        else:
+            recognizer = spare[0]
+        self._active_grammar = wanted
+        self._wakeup.set()
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.stats['swaps'] += 1
+        self.stats['last_swap_ms'] = elapsed_ms
+        self.stats['total_swap_ms'] += elapsed_ms
+        self.stats['max_swap_ms'] = max(self.stats['max_swap_ms'], elapsed_ms)
+        return recognizer
+
+    def health(self):
+        """Resumen para métricas: repuesto listo, fallos y latencia de swap"""
+        swaps = self.stats['swaps']
+        return dict(
+            self.stats,
+            spare_ready=self.spare_ready,
+            avg_swap_ms=self.stats['total_swap_ms'] / swaps if swaps else 0.0,
+        )
+
+    def close(self):
+        self._running = False
+        self._wakeup.set()
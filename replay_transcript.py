@@ -0,0 +1,335 @@
+"""
+Repite transcripciones de Vosk en LyricTracker con tiempo virtual.
+
+Una transcripción es JSON Lines con los resultados parciales y finales que
+vio el loop principal, con su instante en segundos desde el inicio:
+
+    {"t":0.0,"event":"session","song":"lyrics_data.json","slide":2}
+    {"t":3.42,"event":"partial","text":"cuan grande"}
+    {"t":4.10,"event":"final","text":"cuan grande es el"}
+    {"t":9.00,"event":"vad","speech":false}
+    {"t":12.0,"event":"sync","source":"powerpoint","slide":5}
+    {"t":12.1,"event":"reset"}
+
+(vad = silencio/voz, pausa los timers; reset = recognizer reiniciado;
+sync = el slide cambió sin que lo decidiera el tracker, según source:
+powerpoint/resync = cambio a mano o comando fallido, early = detección
+temprana, voice = comando de voz, f8/f9 = teclas; early y voice = las
+palabras de la última parcial/final se las llevó el comando, no el
+tracker; los demás eventos se ignoran)
+
+Cada evento adelanta un VirtualClock hasta su instante y pasa por la misma
+cadena que en vivo (HypothesisDiff → process_recognized_text → siguiente
+slide / GotoSlide), sin Vosk, sin audio y sin esperar: el anti-stuck y los
+timers de coro ven el tiempo grabado. Las palabras de una parcial/final
+se aplican al llegar el evento siguiente (si era un comando de voz o la
+detección temprana, no llegan al tracker). Las decisiones salen en JSON Lines:
+
+    {"t":4.1,"decision":"next","from":2,"slide":3}
+    {"t":30.2,"decision":"goto","from":4,"slide":6,"position":3}
+    {"t":61.0,"decision":"end","from":8}
+
+y se comparan con un archivo golden (diff unificado si cambiaron). Los
+comandos de voz y la detección temprana de balanced_main no se vuelven a
+detectar: se aplican desde la grabación (eventos sync) y se evalúa el tracker.
+
+    python replay_transcript.py sesion.jsonl --song lyrics_data.json
+    python replay_transcript.py corpus/*.jsonl --golden-dir golden [--update]
+    python replay_transcript.py --sing lyrics_data.json --wpm 110 --out corpus/sintetica.jsonl
+"""
+import argparse
+import contextlib
+import difflib
+import gzip
+import io
+import json
+import os
+import random
+import sys
+import time
+
+from clock import VirtualClock
+from event_log import setup_logging
+from hypothesis_diff import HypothesisDiff
+from lyric_tracker import LyricTracker, load_lyrics_data
+
+
+def read_transcript(path):
+    """Eventos de una transcripción (.jsonl o .jsonl.gz); las líneas rotas se saltean"""
+    opener = gzip.open if path.endswith('.gz') else open
+    events = []
+    with opener(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue    # última línea cortada (sesión interrumpida)
+            if isinstance(event, dict) and 'event' in event:
+                events.append(event)
+    return events
+
+
+def dump_line(decision):
+    return json.dumps(decision, ensure_ascii=False, separators=(',', ':'))
+
+
+class TranscriptReplay:
+    """Una transcripción → lista de decisiones, con el tracker en tiempo virtual"""
+
+    # Eventos que se llevan las palabras de la parcial/final anterior (no pasan por el tracker)
+    CONSUMING = ("early", "voice")
+
+    def __init__(self, lyrics_data, start_slide=None, start=0.0):
+        # El tracker nace en el instante del evento session (una parte rotada arranca en t >> 0)
+        self.clock = VirtualClock(start)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.tracker = LyricTracker(lyrics_data, start_slide=start_slide, clock=self.clock)
+        self.hypothesis = HypothesisDiff()
+        self.decisions = []
+        self.words = 0
+        self.song_finished = False
+        self._pending = None    # (t, palabras nuevas) de la última parcial/final
+
+    def _decide(self, decision, **fields):
+        entry = {'t': round(self.clock.now(), 3), 'decision': decision, 'from': self.tracker.current_slide}
+        entry.update(fields)
+        self.decisions.append(entry)
+
+    def _advance(self, new_words):
+        if not new_words:
+            return
+        tracker = self.tracker
+        self.words += len(new_words)
+        result = tracker.process_recognized_text(' '.join(new_words))
+        if result == "CHANGE_SLIDE":
+            if not tracker.has_slide(tracker.current_slide + 1):
+                if not self.song_finished:
+                    self._decide("end")
+                    self.song_finished = True
+                return
+            self._decide("next", slide=tracker.current_slide + 1)
+            tracker.next_slide()
+            self.hypothesis.reset()         # en vivo el recognizer se reinicia con el cambio
+        elif result == "GOTO_SLIDE" and tracker.last_relocation is not None:
+            relocation = tracker.last_relocation
+            self._decide("goto", slide=relocation.slide, position=relocation.position)
+            tracker.jump_to(relocation.slide, relocation.position)
+            self.song_finished = False
+
+    def _flush(self):
+        """Las palabras pendientes van al tracker, en el instante en que llegaron"""
+        if self._pending is None:
+            return
+        t, new_words = self._pending
+        self._pending = None
+        self.clock.set(t)
+        self._advance(new_words)
+
+    def _sync(self, event):
+        """Lo mismo que hizo balanced_main con el tracker (ver source en session_recorder)"""
+        tracker = self.tracker
+        slide = event['slide']
+        source = event.get('source', 'powerpoint')
+        if source == "voice" and event.get('command') == "previous":
+            tracker.previous_slide()
+        elif source == "voice":
+            tracker.current_slide = slide
+            tracker.current_word_index = 0
+        elif source == "f9":
+            tracker.resetear_a_inicio()
+        elif not tracker.has_slide(slide):
+            return
+        elif source in ("early", "f8"):
+            tracker.jump_to(slide)      # mismo estado que next_slide()
+        else:
+            tracker.sync_to(slide)
+
+    def feed(self, event):
+        kind = event['event']
+        t = event.get('t', 0.0)
+        if kind in self.CONSUMING or (kind == "sync" and event.get('source') in self.CONSUMING):
+            self._pending = None
+        else:
+            self._flush()
+        self.clock.set(t)
+        if kind == "partial":
+            text = event.get('text', '').strip()
+            new_words = self.hypothesis.feed_partial(text)
+            if text and new_words:
+                self._pending = (t, new_words)
+        elif kind == "final":
+            new_words = self.hypothesis.feed_final(event.get('text', '').strip())
+            if new_words:
+                self._pending = (t, new_words)
+        elif kind == "vad":
+            if event.get('speech', True):
+                self.tracker.resume_timers()
+            else:
+                self.tracker.pause_timers()
+        elif kind == "sync":
+            self._sync(event)
+        elif kind == "early" and not self.tracker.has_slide(self.tracker.current_slide + 1):
+            self.song_finished = True   # balanced_main ya fue al fondo negro: un CHANGE_SLIDE después no es el final
+        elif kind == "reset":
+            self.hypothesis.reset()
+
+    def run(self, events):
+        for event in events:
+            self.feed(event)
+        self._flush()
+        return self.decisions
+
+
+def diff_decisions(expected, actual, name):
+    """Diff unificado entre dos listas de líneas de decisión (vacío si son iguales)"""
+    return list(difflib.unified_diff(expected, actual, f"{name} (golden)", f"{name} (repetición)", lineterm=""))
+
+
+def sing_transcript(lyrics_data, wpm=110, seed=0, pause=2.0):
+    """
+    Transcripción sintética de la canción cantada completa: una parcial que
+    crece palabra por palabra, un final por slide y una pausa entre slides.
+    """
+    rng = random.Random(seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        tracker = LyricTracker(lyrics_data)
+    slides = sorted(tracker.song_plan.slides)
+    events = [{'t': 0.0, 'event': 'session', 'slide': slides[0]}]
+    t = 0.0
+    for number in slides:
+        words = list(tracker.song_plan.get(number).words)
+        for i in range(len(words)):
+            t += 60.0 / wpm * rng.uniform(0.7, 1.3)
+            events.append({'t': round(t, 3), 'event': 'partial', 'text': ' '.join(words[:i + 1])})
+        if words:
+            t += 0.3
+            events.append({'t': round(t, 3), 'event': 'final', 'text': ' '.join(words)})
+        t += pause
+    return events
+
+
+class SongCache:
+    """Letras cargadas una sola vez aunque muchas transcripciones usen la misma canción"""
+
+    def __init__(self, override=None):
+        self.override = override
+        self._songs = {}
+
+    def resolve(self, transcript_path, header):
+        song = self.override or header.get('song')
+        if song is None:
+            raise ValueError(f"{transcript_path}: sin canción (usá --song o un evento session con \"song\")")
+        if not os.path.exists(song):
+            beside = os.path.join(os.path.dirname(transcript_path), song)
+            if os.path.exists(beside):
+                song = beside
+        if song not in self._songs:
+            with contextlib.redirect_stdout(io.StringIO()):
+                self._songs[song] = load_lyrics_data(song)
+        if not self._songs[song]:
+            raise ValueError(f"{transcript_path}: no se pudo cargar {song}")
+        return self._songs[song]
+
+
+def replay_file(path, songs):
+    """(líneas de decisión, segundos grabados, palabras) de una transcripción"""
+    events = read_transcript(path)
+    header = next((event for event in events if event['event'] == 'session'), {})
+    replay = TranscriptReplay(songs.resolve(path, header), start_slide=header.get('slide'),
+                              start=header.get('t', 0.0))
+    decisions = replay.run(events)
+    duration = events[-1].get('t', 0.0) - events[0].get('t', 0.0) if events else 0.0
+    return [dump_line(decision) for decision in decisions], duration, replay.words
+
+
+def golden_path(golden_dir, transcript_path):
+    name = os.path.basename(transcript_path)
+    for suffix in ('.gz', '.jsonl'):
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+    return os.path.join(golden_dir, name + '.decisions.jsonl')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("transcripts", nargs="*", help="Transcripciones .jsonl / .jsonl.gz")
+    parser.add_argument("--song", help="Letra para todas las transcripciones (por defecto, la del evento session)")
+    parser.add_argument("--golden-dir", help="Comparar cada repetición con <dir>/<nombre>.decisions.jsonl")
+    parser.add_argument("--update", action="store_true", help="Reescribir los golden con las decisiones actuales")
+    parser.add_argument("--out", help="Guardar las decisiones (una sola transcripción) o la transcripción de --sing")
+    parser.add_argument("--sing", metavar="LETRA", help="Generar una transcripción sintética de la canción")
+    parser.add_argument("--wpm", type=float, default=110, help="Palabras por minuto de --sing")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true", help="Mostrar los eventos del tracker")
+    args = parser.parse_args()
+
+    setup_logging({"level": "DEBUG" if args.verbose else "WARNING"}, asynchronous=False)
+
+    if args.sing:
+        with contextlib.redirect_stdout(io.StringIO()):
+            lyrics_data = load_lyrics_data(args.sing)
+        events = sing_transcript(lyrics_data, wpm=args.wpm, seed=args.seed)
+        events[0]['song'] = args.sing
+        lines = [dump_line(event) for event in events]
+        if args.out:
+            with open(args.out, 'w', encoding='utf-8') as f:
+                f.write("\n".join(lines) + "\n")
+            print(f"🎤 {len(events)} eventos ({events[-1]['t']:.0f}s cantados) → {args.out}")
+        else:
+            print("\n".join(lines))
+        return 0
+
+    if not args.transcripts:
+        parser.error("faltan transcripciones (o --sing)")
+    if args.out and len(args.transcripts) > 1:
+        parser.error("--out es para una sola transcripción")
+
+    songs = SongCache(args.song)
+    failed = 0
+    total_decisions = total_words = 0
+    recorded = 0.0
+    started = time.perf_counter()
+    for path in args.transcripts:
+        lines, duration, words = replay_file(path, songs)
+        recorded += duration
+        total_decisions += len(lines)
+        total_words += words
+
+        if args.out:
+            with open(args.out, 'w', encoding='utf-8') as f:
+                f.write("".join(line + "\n" for line in lines))
+        elif not args.golden_dir and len(args.transcripts) == 1:
+            print("\n".join(lines))
+
+        if args.golden_dir:
+            golden = golden_path(args.golden_dir, path)
+            if args.update:
+                os.makedirs(args.golden_dir, exist_ok=True)
+                with open(golden, 'w', encoding='utf-8') as f:
+                    f.write("".join(line + "\n" for line in lines))
+            elif not os.path.exists(golden):
+                failed += 1
+                print(f"❓ {path}: falta {golden} (usá --update)")
+            else:
+                with open(golden, 'r', encoding='utf-8') as f:
+                    expected = f.read().splitlines()
+                diff = diff_decisions(expected, lines, os.path.basename(path))
+                if diff:
+                    failed += 1
+                    print("\n".join(diff))
+    elapsed = time.perf_counter() - started
+
+    speed = f", {recorded / elapsed:.0f}× tiempo real" if elapsed > 0 and recorded else ""
+    print(f"⏱️ {len(args.transcripts)} transcripciones, {total_words} palabras, {total_decisions} decisiones "
+          f"en {elapsed:.2f}s ({recorded:.0f}s grabados{speed})", file=sys.stderr)
+    if args.golden_dir and not args.update:
+        print(f"{'❌' if failed else '✅'} {len(args.transcripts) - failed}/{len(args.transcripts)} iguales al golden",
+              file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
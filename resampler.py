@@ -0,0 +1,111 @@
+from math import gcd
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import firwin
+
+
+def design_filter(up, down, half_len=10, beta=5.0):
+    """FIR anti-aliasing con el mismo diseño que usa scipy.signal.resample_poly"""
+    max_rate = max(up, down)
+    taps = 2 * half_len * max_rate + 1
+    return firwin(taps, 1.0 / max_rate, window=('kaiser', beta)) * up
+
+
+class StreamingResampler:
+    """
+    Resampler polifásico con estado para audio en bloques (callback de sounddevice).
+
+    El FIR se diseña una sola vez y las últimas muestras de cada bloque quedan
+    como historia para el siguiente: no hay discontinuidades en los bordes
+    como con resample_poly bloque por bloque. Retardo fijo de ~half_len
+    muestras de entrada (menos de 1 ms a 48 kHz).
+    """
+
+    def __init__(self, orig_sr=48000, target_sr=16000, half_len=10, dtype=np.float32):
+        g = gcd(orig_sr, target_sr)
+        self.orig_sr = orig_sr
+        self.target_sr = target_sr
+        self.up = target_sr // g
+        self.down = orig_sr // g
+        self.dtype = dtype
+
+        h = design_filter(self.up, self.down, half_len)
+        self.taps = -(-len(h) // self.up)          # coeficientes por fase
+        padded = np.zeros(self.taps * self.up)
+        padded[:len(h)] = h
+        # phases[p, j] = h[p + j*up], invertido para multiplicar ventanas en orden natural
+        self.phases = np.ascontiguousarray(padded.reshape(self.taps, self.up).T[:, ::-1], dtype=dtype)
+
+        self._history = np.zeros(self.taps - 1, dtype=dtype)
+        self._work = np.zeros(0, dtype=dtype)
+        self._out = np.zeros(0, dtype=dtype)
+        self._consumed = 0      # muestras de entrada recibidas
+        self._produced = 0      # muestras de salida entregadas
+        self.reset()
+
+    def reset(self):
+        self._history.fill(0.0)
+        self._consumed = 0
+        self._produced = 0
+
+    def max_output(self, block_size):
+        """Muestras de salida como máximo para un bloque de block_size muestras"""
+        return -(-block_size * self.up // self.down) + 1
+
+    def _reserve(self, block_size):
+        history = self.taps - 1
+        if len(self._work) < history + block_size:
+            self._work = np.zeros(history + block_size, dtype=self.dtype)
+            self._out = np.zeros(self.max_output(block_size), dtype=self.dtype)
+
+    def process(self, block):
+        """
+        Resamplea un bloque y devuelve una vista del buffer interno de salida
+        (válida hasta la siguiente llamada; copiarla si hay que guardarla).
+        """
+        n_in = len(block)
+        history = self.taps - 1
+        self._reserve(n_in)
+        work = self._work[:history + n_in]
+        work[:history] = self._history
+        work[history:] = block
+
+        start = self._consumed
+        total = start + n_in
+        first = self._produced
+        end = (total * self.up + self.down - 1) // self.down
+        n_out = end - first
+        out = self._out[:n_out]
+
+        if n_out > 0:
+            windows = sliding_window_view(work, self.taps)
+            # Salida m usa la entrada i = m*down // up (posición local i - start)
+            if self.up == 1:
+                offset = first * self.down - start
+                np.matmul(windows[offset:offset + n_out * self.down:self.down], self.phases[0], out=out)
+            else:
+                m = np.arange(first, end)
+                positions = (m * self.down) // self.up - start
+                phase = (m * self.down) % self.up
+                np.einsum('ij,ij->i', windows[positions], self.phases[phase], out=out)
+
+        self._history[:] = work[n_in:]
+        self._consumed = total
+        self._produced = end
+        return out
+
+
+def negotiate_capture_rate(target_sr=16000, fallback_sr=48000, channels=1, dtype='int16', device=None):
+    """
+    Prueba si el micrófono captura nativo a target_sr (sin resampler).
+    Devuelve la tasa de captura a usar.
+    """
+    import sounddevice as sd
+
+    try:
+        sd.check_input_settings(device=device, samplerate=target_sr, channels=channels, dtype=dtype)
+        return target_sr
+    except Exception:
+        sd.check_input_settings(device=device, samplerate=fallback_sr, channels=channels, dtype=dtype)
+        return fallback_sr
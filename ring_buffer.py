@@ -0,0 +1,240 @@
+import queue
+from multiprocessing import shared_memory
+
+import numpy as np
+
+FRAME_MS = 10   # Vosk/Kaldi trabaja en frames de 10 ms
+
+
+def frame_aligned_bytes(batch_ms, sample_rate=16000, sample_width=2, frame_ms=FRAME_MS):
+    """Tamaño en bytes de un lote de batch_ms redondeado a frames completos de 10 ms"""
+    frames = max(1, round(batch_ms / frame_ms))
+    return frames * (sample_rate * frame_ms // 1000) * sample_width
+
+
+class AudioRing:
+    """
+    Ring buffer de audio sobre un bytearray preasignado, "espejado":
+    cada byte se escribe en i y en i + capacity, así cualquier lectura de
+    hasta capacity bytes es un memoryview contiguo, sin copias ni uniones.
+
+    Un solo consumidor: el memoryview que devuelve read() es válido hasta
+    que la escritura vuelva a pasar por esa zona (capacity bytes después).
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._buffer = bytearray(2 * capacity)
+        self._view = memoryview(self._buffer)
+        self._read = 0      # bytes leídos (absoluto)
+        self._write = 0     # bytes escritos (absoluto)
+        self.overflow_bytes = 0
+
+    @property
+    def available(self):
+        return self._write - self._read
+
+    @property
+    def written(self):
+        """Posición absoluta del próximo byte a escribir"""
+        return self._write
+
+    @property
+    def position(self):
+        """Posición absoluta del próximo byte a leer"""
+        return self._read
+
+    def clear(self):
+        self._read = self._write
+
+    def write(self, data):
+        """Copia data al ring; si no entra, se descarta lo más viejo"""
+        data = memoryview(data).cast('B') if not isinstance(data, (bytes, bytearray)) else data
+        size = len(data)
+        if size > self.capacity:
+            self.overflow_bytes += size - self.capacity
+            self._write += size - self.capacity
+            data = data[size - self.capacity:]
+            size = self.capacity
+
+        overflow = self.available + size - self.capacity
+        if overflow > 0:
+            self.overflow_bytes += overflow
+            self._read += overflow
+
+        capacity = self.capacity
+        pos = self._write % capacity
+        first = min(size, capacity - pos)
+        view = self._view
+        view[pos:pos + first] = data[:first]
+        view[pos + capacity:pos + capacity + first] = data[:first]
+        rest = size - first
+        if rest:
+            view[:rest] = data[first:]
+            view[capacity:capacity + rest] = data[first:]
+        self._write += size
+
+    def read(self, size):
+        """memoryview contiguo con los próximos size bytes (sin copiar)"""
+        size = min(size, self.available)
+        pos = self._read % self.capacity
+        self._read += size
+        return self._view[pos:pos + size]
+
+
+class SharedAudioRing:
+    """
+    AudioRing espejado sobre multiprocessing.shared_memory, para pasar audio
+    entre el proceso de captura+DSP (productor) y el de reconocimiento
+    (consumidor) sin copias por pipe.
+
+    La cabecera guarda tres contadores absolutos de bytes, cada uno con un
+    solo dueño: write y discard los mueve el productor, read el consumidor.
+    El consumidor lee en dos pasos: peek() da la vista sin mover read y
+    commit() la libera cuando Vosk terminó con ella. El espacio libre del
+    productor sale solo de read, así que si el consumidor se atrasa más de
+    capacity bytes se descarta lo nuevo (no se puede pisar lo que el otro
+    proceso puede estar leyendo). clear() desde el productor marca todo lo
+    escrito como descartable; el consumidor lo salta en su próximo peek().
+    doorbell (multiprocessing.Event) despierta al consumidor en cada write().
+    """
+
+    HEADER = 64
+    _WRITE, _READ, _DISCARD = 0, 1, 2
+
+    def __init__(self, capacity, name=None, doorbell=None):
+        self.capacity = capacity
+        self.doorbell = doorbell
+        self.owner = name is None
+        if self.owner:
+            self._shm = shared_memory.SharedMemory(create=True, size=self.HEADER + 2 * capacity)
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+        self.name = self._shm.name
+        self._counters = np.ndarray((3,), dtype=np.uint64, buffer=self._shm.buf[:24])
+        if self.owner:
+            self._counters[:] = 0
+        self._view = self._shm.buf[self.HEADER:self.HEADER + 2 * capacity]
+        self.overflow_bytes = 0
+
+    @property
+    def written(self):
+        return int(self._counters[self._WRITE])
+
+    @property
+    def available(self):
+        """Productor: bytes ocupados (lo descartado ocupa hasta que el consumidor lo salte)"""
+        return self.written - int(self._counters[self._READ])
+
+    def clear(self):
+        """Productor: todo lo escrito hasta ahora se descarta (el consumidor lo salta)"""
+        self._counters[self._DISCARD] = self._counters[self._WRITE]
+
+    def write(self, data):
+        """Productor: copia data al ring; si no entra entero, se descarta"""
+        data = memoryview(data).cast('B') if not isinstance(data, (bytes, bytearray)) else data
+        size = len(data)
+        if self.available + size > self.capacity:
+            self.overflow_bytes += size
+            return
+
+        capacity = self.capacity
+        written = self.written
+        pos = written % capacity
+        first = min(size, capacity - pos)
+        view = self._view
+        view[pos:pos + first] = data[:first]
+        view[pos + capacity:pos + capacity + first] = data[:first]
+        rest = size - first
+        if rest:
+            view[:rest] = data[first:]
+            view[capacity:capacity + rest] = data[first:]
+        # El contador se publica después de los datos
+        self._counters[self._WRITE] = written + size
+        if self.doorbell is not None:
+            self.doorbell.set()
+
+    def _skip_discarded(self):
+        """Consumidor, sin vistas vivas: adopta el descarte del productor"""
+        read = max(int(self._counters[self._READ]), int(self._counters[self._DISCARD]))
+        self._counters[self._READ] = read
+        return read
+
+    def peek(self, size, limit=None):
+        """
+        Consumidor: (posición, memoryview contiguo) con los próximos size bytes
+        (sin copiar), sin pasar de la posición absoluta limit si se indica.
+        La zona sigue reservada hasta commit(); no se llama a peek() de nuevo
+        antes de eso.
+        """
+        read = self._skip_discarded()
+        end = self.written if limit is None else min(limit, self.written)
+        size = max(0, min(size, end - read))
+        pos = read % self.capacity
+        return read, self._view[pos:pos + size]
+
+    def commit(self, position):
+        """Consumidor: libera hasta la posición absoluta position (fin de la vista de peek())"""
+        self._counters[self._READ] = position
+
+    @property
+    def position(self):
+        """Consumidor: posición absoluta del próximo byte a leer"""
+        return max(int(self._counters[self._READ]), int(self._counters[self._DISCARD]))
+
+    def wait(self, timeout):
+        """Consumidor: bloquea hasta el próximo write() (o timeout)"""
+        self._skip_discarded()     # entre lotes no hay vistas vivas
+        if self.doorbell is None:
+            return False
+        woke = self.doorbell.wait(timeout)
+        self.doorbell.clear()
+        return woke
+
+    def close(self):
+        self._view.release()
+        del self._counters
+        try:
+            self._shm.close()
+        except BufferError:
+            pass    # quedan vistas vivas de read(); se libera al salir del proceso
+        if self.owner:
+            self._shm.unlink()
+
+
+def drain_queue(audio_queue, sink, timeout):
+    """
+    Espera (bloqueando hasta timeout) el primer bloque de audio y pasa a
+    sink(bloque) (ring.write o el pipeline DSP) todo lo que haya en la cola.
+    Devuelve cuántos bloques llegaron (0 = timeout).
+    """
+    try:
+        sink(audio_queue.get(timeout=timeout))
+    except queue.Empty:
+        return 0
+    count = 1
+    while True:
+        try:
+            sink(audio_queue.get_nowait())
+        except queue.Empty:
+            return count
+        count += 1
+
+
+class WaveformFeeder:
+    """
+    Pasa memoryviews a AcceptWaveform sin copiar. Si el binding de Vosk
+    no los acepta (TypeError), cambia a bytes() una sola vez y lo avisa.
+    """
+
+    def __init__(self):
+        self.zero_copy = True
+
+    def accept(self, recognizer, view):
+        if self.zero_copy:
+            try:
+                return recognizer.AcceptWaveform(view)
+            except TypeError:
+                self.zero_copy = False
+                print("ℹ️ AcceptWaveform no acepta memoryview → usando bytes")
+        return recognizer.AcceptWaveform(bytes(view))
@@ -0,0 +1,178 @@
+"""
+Grabación de la sesión en vivo, en el mismo formato que lee replay_transcript.py.
+
+Todo lo que ve el loop principal (parciales y finales de Vosk, VAD, reinicios
+del recognizer, resultados del tracker, comandos a PowerPoint, saltos hechos
+a mano en PowerPoint) se anota como un evento JSON por línea:
+
+    {"t":0.0,"event":"session","song":"lyrics_data.json","slide":2,"part":0,"started":"2026-10-19T10:02:11"}
+    {"t":3.42,"event":"partial","text":"cuan grande"}
+    {"t":3.42,"event":"tracker","result":"PROGRESS","slide":2,"index":2}
+    {"t":9.87,"event":"command","command":"next","slide":3}
+    {"t":12.0,"event":"sync","source":"powerpoint","slide":5}
+
+Los cambios de slide que no decide el tracker (PowerPoint a mano, comando
+fallido, detección temprana, comando de voz, F8/F9) van como sync con su
+source, para que replay_transcript.py los aplique igual que en vivo.
+
+record() solo toma el instante y encola (nunca bloquea; con la cola llena el
+evento se descarta y se cuenta). Un hilo de fondo serializa y escribe; al
+pasar max_bytes el archivo se cierra, se comprime (.jsonl.gz) y sigue en una
+parte nueva que empieza con su propio evento session (con el slide de ese
+momento), así cada parte se puede repetir sola.
+
+    "recording": {"enabled": true, "dir": "sesiones", "max_bytes": 5000000, "compress": true, "queue_size": 20000}
+"""
+import gzip
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+from datetime import datetime
+
+
+class SessionRecorder:
+    """Eventos de la sesión → JSON Lines rotados por tamaño, escritos en un hilo de fondo"""
+
+    def __init__(self, directory, header=None, max_bytes=5_000_000, compress=True,
+                 queue_size=20000, prefix="sesion", clock=None):
+        self.directory = directory
+        self.header = dict(header or {})
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.base = os.path.join(directory, f"{prefix}-{datetime.now():%Y%m%d-%H%M%S}")
+        self.events = 0
+        self.dropped = 0
+        self.errors = 0
+        self.bytes = 0
+        self.paths = []
+        self._part = 0
+        self._file = None
+        self._file_bytes = 0
+        # Mismo reloj que el tracker (clock.py): al repetir un WAV, t = segundos de audio
+        self._now = clock.now if clock is not None else time.perf_counter
+        self._started = self._now()
+        self._thread = None
+
+    @classmethod
+    def from_config(cls, config, header=None, clock=None):
+        """Sección "recording" de config.json (None si está desactivada)"""
+        if not config.get("enabled", True):
+            return None
+        return cls(
+            config.get("dir", "sesiones"),
+            header=header,
+            max_bytes=config.get("max_bytes", 5_000_000),
+            compress=config.get("compress", True),
+            queue_size=config.get("queue_size", 20000),
+            clock=clock,
+        )
+
+    @property
+    def path(self):
+        """Archivo que se está escribiendo (o el último)"""
+        return self.paths[-1] if self.paths else None
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._started = self._now()
+        self._thread = threading.Thread(target=self._run, name="session-recorder", daemon=True)
+        self._thread.start()
+        return self
+
+    def record(self, event, **fields):
+        """Camino caliente: instante + encolar (la serialización la hace el hilo de fondo)"""
+        try:
+            self.queue.put_nowait((self._now(), event, fields))
+        except queue.Full:
+            self.dropped += 1
+
+    # ---- hilo escritor ----
+
+    def _open_part(self, now):
+        path = f"{self.base}-{self._part:03d}.jsonl"
+        self._file = open(path, 'w', encoding='utf-8')
+        self._file_bytes = 0
+        self.paths.append(path)
+        header = dict(self.header, part=self._part, started=f"{datetime.now():%Y-%m-%dT%H:%M:%S}")
+        self._write(now, "session", header)
+
+    def _close_part(self):
+        self._file.close()
+        self._file = None
+        if not self.compress:
+            return
+        path = self.paths[-1]
+        with open(path, 'rb') as source, gzip.open(path + '.gz', 'wb') as target:
+            shutil.copyfileobj(source, target)
+        os.remove(path)
+        self.paths[-1] = path + '.gz'
+
+    def _write(self, at, event, fields):
+        entry = {'t': round(at - self._started, 3), 'event': event}
+        entry.update(fields)
+        line = json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + "\n"
+        self._file.write(line)
+        size = len(line.encode('utf-8'))
+        self._file_bytes += size
+        self.bytes += size
+        if 'slide' in fields and event != "session":
+            self.header['slide'] = fields['slide']     # la parte siguiente arranca en este slide
+
+    def _run(self):
+        try:
+            self._open_part(self._now())
+        except OSError as e:
+            self.errors += 1
+            print(f"⚠️ No se pudo crear la grabación de la sesión en {self.directory}: {e}")
+            return
+        while True:
+            item = self.queue.get()
+            batch = [item]
+            while len(batch) < 256:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = False
+            try:
+                for entry in batch:
+                    if entry is None:
+                        stop = True
+                        break
+                    self._write(*entry)
+                    self.events += 1
+                    if self._file_bytes >= self.max_bytes:
+                        self._close_part()
+                        self._part += 1
+                        self._open_part(entry[0])
+                self._file.flush()
+            except OSError:
+                self.errors += 1
+            if stop:
+                break
+        try:
+            self._close_part()
+        except OSError:
+            self.errors += 1
+
+    def close(self, timeout=5.0):
+        """Escribe lo pendiente, comprime la última parte y devuelve el resumen"""
+        if self._thread is not None and self._thread.is_alive():
+            try:
+                self.queue.put(None, timeout=timeout)
+            except queue.Full:
+                pass
+            self._thread.join(timeout)
+        self._thread = None
+        return {
+            'events': self.events,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'bytes': self.bytes,
+            'files': len(self.paths),
+            'path': self.path,
+        }
@@ -0,0 +1,446 @@
+"""
+Control de PowerPoint fuera del hilo de audio.
+
+SlideController recibe comandos (next, previous, goto, black) por una cola y
+los ejecuta en su propio hilo contra un backend:
+
+  - ComBackend: PowerPoint por COM, Dispatch una sola vez por hilo (el objeto
+    View queda cacheado; si un comando falla se vuelve a pedir una vez)
+  - KeyboardBackend: teclas con pyautogui (goto = número + Enter, el salto
+    directo del modo presentación)
+  - FakePresentation: presentación en memoria con latencia configurable,
+    para correr y medir todo el pipeline en Linux
+
+Con un backend de respaldo (fallback), un comando que falla en el principal
+se repite en el de respaldo (COM → teclas, como el backup anterior).
+
+PowerPointWatcher consulta en otro hilo en qué slide está PowerPoint y
+publica un SlideSnapshot: el loop de reconocimiento lo lee sin tocar COM.
+
+    "powerpoint": {"backend": "com", "fallback": "keys", "fake_latency_ms": 30, ...}
+"""
+import queue
+import threading
+import time
+from collections import deque, namedtuple
+
+from event_log import get_log
+from metrics import REGISTRY
+
+log = get_log("slides")
+
+
+class SlideBackend:
+    """
+    Interfaz de los backends. open()/close() corren en el hilo que los usa
+    (COM exige inicializar su apartment en ese hilo).
+    """
+
+    name = "base"
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def next(self):
+        raise NotImplementedError
+
+    def previous(self):
+        raise NotImplementedError
+
+    def goto(self, number):
+        raise NotImplementedError
+
+    def black(self):
+        raise NotImplementedError
+
+    def current(self):
+        """Slide que muestra PowerPoint, o None si el backend no lo sabe"""
+        return None
+
+
+class ComBackend(SlideBackend):
+    """PowerPoint por COM (win32com, solo Windows)"""
+
+    name = "com"
+
+    def __init__(self):
+        self._app = None
+        self._presentation = None
+        self._view = None
+        self._initialized = False
+
+    def open(self):
+        import pythoncom
+        pythoncom.CoInitialize()
+        self._initialized = True
+
+    def close(self):
+        self._app = self._presentation = self._view = None
+        if self._initialized:
+            import pythoncom
+            pythoncom.CoUninitialize()
+            self._initialized = False
+
+    def _get_view(self):
+        if self._view is None:
+            import win32com.client
+            self._app = win32com.client.Dispatch("PowerPoint.Application")
+            self._presentation = self._app.ActivePresentation
+            self._view = self._presentation.SlideShowWindow.View
+        return self._view
+
+    def _call(self, action):
+        # La presentación se cerró o el slideshow se reinició: el View cacheado ya no sirve
+        try:
+            return action(self._get_view())
+        except Exception:
+            self._presentation = self._view = None
+            return action(self._get_view())
+
+    def next(self):
+        self._call(lambda view: view.Next())
+
+    def previous(self):
+        self._call(lambda view: view.Previous())
+
+    def goto(self, number):
+        self._call(lambda view: view.GotoSlide(number))
+
+    def black(self):
+        # El último slide de la presentación es el fondo negro
+        self._call(lambda view: view.GotoSlide(self._presentation.Slides.Count))
+
+    def current(self):
+        try:
+            return self._call(lambda view: view.Slide.SlideIndex)
+        except Exception:
+            if self._app is None:
+                raise
+            # Sin modo presentación: el slide seleccionado en la vista normal
+            return self._app.ActiveWindow.Selection.SlideRange.SlideIndex
+
+
+class KeyboardBackend(SlideBackend):
+    """Teclas a la ventana activa (pyautogui); no sabe en qué slide está PowerPoint"""
+
+    name = "keys"
+
+    def __init__(self, advance_key="pagedown", back_key="pageup"):
+        self.advance_key = advance_key
+        self.back_key = back_key
+        self._keys = None
+
+    def open(self):
+        import pyautogui
+        self._keys = pyautogui
+
+    def next(self):
+        self._keys.press(self.advance_key)
+
+    def previous(self):
+        self._keys.press(self.back_key)
+
+    def goto(self, number):
+        # En modo presentación, número + Enter salta directo (no una tecla por slide)
+        self._keys.write(str(number))
+        self._keys.press('enter')
+
+    def black(self):
+        self._keys.press('b')
+
+
+class FakePresentation(SlideBackend):
+    """
+    Presentación en memoria: cada comando tarda latency segundos y queda en
+    history. move() imita al operador cambiando de slide a mano. Avisa los
+    cambios a quien se suscriba (subscribe), como los eventos de PowerPoint.
+    """
+
+    name = "fake"
+
+    def __init__(self, slides=100, start=1, latency=0.0):
+        self.slides = slides
+        self.latency = latency
+        self.slide = start
+        self.black_screen = False
+        self.history = deque(maxlen=1000)     # (instante, comando, slide resultante)
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    def _apply(self, command, slide):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.slide = max(1, min(self.slides, slide))
+            self.black_screen = command == "black"
+            self.history.append((time.perf_counter(), command, self.slide))
+            slide = self.slide
+        for listener in self._listeners:
+            listener(command, slide)
+
+    def next(self):
+        self._apply("next", self.slide + 1)
+
+    def previous(self):
+        self._apply("previous", self.slide - 1)
+
+    def goto(self, number):
+        self._apply("goto", number)
+
+    def black(self):
+        self._apply("black", self.slides)
+
+    def move(self, number):
+        self._apply("manual", number)
+
+    def current(self):
+        with self._lock:
+            return self.slide
+
+    def subscribe(self, listener):
+        """listener(comando, slide) después de cada cambio (en el hilo que lo hizo)"""
+        self._listeners.append(listener)
+
+
+def make_backend(name, section=None):
+    """Backend por nombre ("com", "keys", "fake") con las opciones de la sección "powerpoint" """
+    section = section or {}
+    if name == "com":
+        return ComBackend()
+    if name == "keys":
+        return KeyboardBackend(section.get("advance_key", "pagedown"), section.get("back_key", "pageup"))
+    if name == "fake":
+        return FakePresentation(section.get("fake_slides", 100), latency=section.get("fake_latency_ms", 0) / 1000)
+    raise ValueError(f"Backend de slides desconocido: {name}")
+
+
+class SlideController:
+    """
+    Cola de comandos → hilo "slides" → backend. Los métodos no bloquean:
+    devuelven False si la cola está llena (el comando se descarta).
+    on_done(segundos_desde_el_pedido, ok) corre en el hilo de slides.
+    """
+
+    def __init__(self, backend, fallback=None, max_pending=32, registry=REGISTRY):
+        self.backend = backend
+        self.fallback = fallback
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, name="slides", daemon=True)
+        self.command_seconds = registry.histogram("slide_command_seconds", "Ejecución de un comando de slide",
+                                                  {"backend": backend.name})
+        self.stats = {'commands': 0, 'failed': 0, 'fallbacks': 0, 'dropped': 0}
+
+    @classmethod
+    def from_config(cls, config, registry=REGISTRY):
+        section = config.get("powerpoint", {})
+        backend = make_backend(section.get("backend", "com"), section)
+        fallback = make_backend(section["fallback"], section) if section.get("fallback") else None
+        return cls(backend, fallback, registry=registry)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def submit(self, command, *args, on_done=None):
+        try:
+            self._queue.put_nowait((command, args, on_done, time.perf_counter()))
+            return True
+        except queue.Full:
+            self.stats['dropped'] += 1
+            log.warning("slide_descartado", "⚠️ Cola de slides llena → comando {command} descartado", command=command)
+            return False
+
+    def next(self, on_done=None):
+        return self.submit("next", on_done=on_done)
+
+    def previous(self, on_done=None):
+        return self.submit("previous", on_done=on_done)
+
+    def goto(self, number, on_done=None):
+        return self.submit("goto", number, on_done=on_done)
+
+    def black(self, on_done=None):
+        return self.submit("black", on_done=on_done)
+
+    @property
+    def pending(self):
+        return self._queue.unfinished_tasks
+
+    def wait_idle(self, timeout=1.0):
+        """Espera a que se ejecuten los comandos encolados; True si terminaron"""
+        deadline = time.perf_counter() + timeout
+        while self._queue.unfinished_tasks and time.perf_counter() < deadline:
+            time.sleep(0.001)
+        return not self._queue.unfinished_tasks
+
+    def _open(self):
+        for backend in (self.backend, self.fallback):
+            if backend is None:
+                continue
+            try:
+                backend.open()
+            except Exception as e:
+                log.error("backend_fallido", "❌ No se pudo abrir el backend {backend}: {error}",
+                          backend=backend.name, error=str(e))
+
+    def _run(self):
+        self._open()
+        try:
+            while True:
+                item = self._queue.get()
+                try:
+                    if item is None:
+                        return
+                    command, args, on_done, requested_at = item
+                    ok = self._execute(command, args)
+                    if on_done is not None:
+                        on_done(time.perf_counter() - requested_at, ok)
+                except Exception as e:
+                    log.error("slide_callback", "❌ Error después del comando de slide: {error}", error=str(e))
+                finally:
+                    self._queue.task_done()
+        finally:
+            for backend in (self.backend, self.fallback):
+                if backend is not None:
+                    try:
+                        backend.close()
+                    except Exception:
+                        pass
+
+    def _execute(self, command, args):
+        start = time.perf_counter()
+        self.stats['commands'] += 1
+        try:
+            getattr(self.backend, command)(*args)
+            return True
+        except Exception as e:
+            self.stats['failed'] += 1
+            if self.fallback is None:
+                log.error("slide_fallido", "No se pudo ejecutar {command} con {backend}: {error}",
+                          command=command, backend=self.backend.name, error=str(e))
+                return False
+            try:
+                getattr(self.fallback, command)(*args)
+            except Exception as backup_e:
+                log.error("slide_fallido", "No se pudo ejecutar {command} (ni {backend} ni {fallback}): {error}",
+                          command=command, backend=self.backend.name, fallback=self.fallback.name,
+                          error=str(backup_e))
+                return False
+            self.stats['fallbacks'] += 1
+            log.warning("slide_respaldo", "Backup: {command} con {fallback} ({error})",
+                        command=command, fallback=self.fallback.name, error=str(e))
+            return True
+        finally:
+            self.command_seconds.record(time.perf_counter() - start)
+
+    def close(self, timeout=2.0):
+        """Ejecuta lo pendiente y para el hilo"""
+        if self._thread.is_alive():
+            try:
+                self._queue.put(None, timeout=timeout)
+            except queue.Full:
+                pass
+            self._thread.join(timeout)
+        return dict(self.stats, command_ms_p95=self.command_seconds.percentile(0.95) * 1000)
+
+
+# Estado publicado por PowerPointWatcher (inmutable: se reemplaza entero)
+SlideSnapshot = namedtuple("SlideSnapshot", "slide version changed_at polled_at polls failures consecutive_failures")
+
+
+class PowerPointWatcher:
+    """
+    Hilo que consulta backend.current() cada interval segundos y publica un
+    SlideSnapshot nuevo en self.snapshot (una asignación: quien lo lee ve
+    siempre un estado completo, sin lock). version sube con cada cambio de
+    slide. Si el backend avisa los cambios (subscribe) se consulta en el acto.
+    Con fallas seguidas el intervalo se duplica hasta max_interval.
+    """
+
+    def __init__(self, backend, interval=0.25, max_interval=5.0):
+        self.backend = backend
+        self.interval = interval
+        self.max_interval = max_interval
+        self.snapshot = SlideSnapshot(None, 0, None, None, 0, 0, 0)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="powerpoint-watcher", daemon=True)
+        if hasattr(backend, "subscribe"):
+            backend.subscribe(lambda command, slide: self._wake.set())
+
+    @classmethod
+    def for_controller(cls, controller, config):
+        """La FakePresentation se comparte con el controller; con COM el watcher abre la suya (su hilo, su apartment)"""
+        section = config.get("powerpoint", {})
+        backend = controller.backend if isinstance(controller.backend, FakePresentation) else ComBackend()
+        return cls(backend, section.get("watch_interval", section.get("poll_interval", 0.25)),
+                   section.get("watch_max_interval", 5.0))
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def wait_ready(self, timeout=1.0):
+        """Espera la primera consulta (exitosa o no); devuelve el snapshot"""
+        self._ready.wait(timeout)
+        return self.snapshot
+
+    @property
+    def slide(self):
+        return self.snapshot.slide
+
+    def _poll(self):
+        previous = self.snapshot
+        now = time.perf_counter()
+        try:
+            slide = self.backend.current()
+        except Exception as e:
+            if not previous.consecutive_failures:
+                log.warning("powerpoint_sin_respuesta", "⚠️ PowerPoint no responde: {error}", error=str(e))
+            self.snapshot = previous._replace(polled_at=now, polls=previous.polls + 1,
+                                              failures=previous.failures + 1,
+                                              consecutive_failures=previous.consecutive_failures + 1)
+            return
+        if previous.consecutive_failures:
+            log.info("powerpoint_reconectado", "✅ PowerPoint responde de nuevo (slide {slide})", slide=slide)
+        changed = slide != previous.slide
+        self.snapshot = previous._replace(
+            slide=slide,
+            version=previous.version + 1 if changed else previous.version,
+            changed_at=now if changed else previous.changed_at,
+            polled_at=now,
+            polls=previous.polls + 1,
+            consecutive_failures=0,
+        )
+
+    def _run(self):
+        try:
+            self.backend.open()
+        except Exception as e:
+            log.error("backend_fallido", "❌ No se pudo abrir el backend {backend}: {error}",
+                      backend=self.backend.name, error=str(e))
+        try:
+            while not self._stop.is_set():
+                self._wake.clear()
+                self._poll()
+                self._ready.set()
+                backoff = 2 ** min(self.snapshot.consecutive_failures, 10)
+                self._wake.wait(min(self.interval * backoff, self.max_interval))
+        finally:
+            if not isinstance(self.backend, FakePresentation):
+                try:
+                    self.backend.close()
+                except Exception:
+                    pass
+
+    def close(self, timeout=2.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+        snapshot = self.snapshot
+        return {'polls': snapshot.polls, 'failures': snapshot.failures, 'slide': snapshot.slide}
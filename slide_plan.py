@@ -0,0 +1,190 @@
+import re
+from array import array
+from dataclasses import dataclass
+
+import jellyfish
+
+from fuzzy_index import DeletionIndex
+from vocabulary import Vocabulary
+
+# Umbrales que hoy aplica LyricTracker (se precalculan una sola vez por slide)
+SHORT_SLIDE_WORDS = 10
+PROGRESS_THRESHOLD_SHORT = 0.75
+PROGRESS_THRESHOLD_LONG = 0.85
+CHORUS_CROSS_RATIO = 0.65       # % de la primera mitad para cruzar al 2do coro
+CHORUS_CHANGE_RATIO = 0.70      # % del slide completo para cambiar en fase 2
+EARLY_TRANSITION_RATIO = 0.75   # usado por _detect_early_transition
+TAIL_WORDS = 2                  # "más estable que 4"
+
+_ACCENTS = str.maketrans('áéíóúüñ', 'aeiouun')
+_NON_LETTERS = re.compile(r'[^a-z]')
+_NON_LETTERS_OR_SPACE = re.compile(r'[^a-z\s]')
+
+
+def normalize_word(word):
+    """Normaliza una palabra de la letra: minúsculas, sin acentos, solo a-z"""
+    return _NON_LETTERS.sub('', word.lower().translate(_ACCENTS))
+
+
+def normalize_text(text):
+    """Normaliza texto reconocido por Vosk y lo separa en palabras"""
+    text = text.lower().strip().translate(_ACCENTS)
+    return _NON_LETTERS_OR_SPACE.sub(' ', text).split()
+
+
+def is_metadata_word(word):
+    """Marcadores generados por extract_lyrics.py (no se cantan)"""
+    return isinstance(word, str) and (
+        word.startswith("DUPLICADO") or
+        word.startswith("MITAD") or
+        "MITAD1" in word
+    )
+
+
+def slide_number(slide_key):
+    """'slide_4' → 4 (None si la clave no es un slide)"""
+    if not slide_key.startswith("slide_"):
+        return None
+    try:
+        return int(slide_key[len("slide_"):])
+    except ValueError:
+        return None
+
+
+@dataclass(frozen=True)
+class SlidePlan:
+    """
+    Plan de matching inmutable de un slide, compilado al cargar la canción.
+    ids / phonetic_ids son vistas (memoryview int32) del buffer único de la canción.
+    """
+    number: int
+    start: int
+    words: tuple
+    ids: memoryview
+    phonetic_ids: memoryview
+    metadata: tuple
+    tail_words: frozenset
+    duplicated: bool
+    half_point: int
+    progress_threshold: float
+    chorus_cross_index: int
+    chorus_change_index: int
+    early_transition_at: float
+
+    def __len__(self):
+        return len(self.words)
+
+
+_EMPTY_IDS = memoryview(array('i')).toreadonly()
+
+EMPTY_PLAN = SlidePlan(
+    number=0, start=0, words=(), ids=_EMPTY_IDS, phonetic_ids=_EMPTY_IDS,
+    metadata=(), tail_words=frozenset(),
+    duplicated=False, half_point=0, progress_threshold=PROGRESS_THRESHOLD_SHORT,
+    chorus_cross_index=0, chorus_change_index=0, early_transition_at=0.0,
+)
+
+
+def _split_slide(raw_words):
+    """Separa marcadores de metadatos y palabras normalizadas de un slide"""
+    metadata = []
+    words = []
+    for word in raw_words:
+        if is_metadata_word(word):
+            metadata.append(word)
+        else:
+            cleaned = normalize_word(word)
+            if cleaned:
+                words.append(cleaned)
+    return words, metadata
+
+
+def _build_plan(number, start, words, metadata, ids, phonetic_ids, structure=None):
+    total = len(words)
+    duplicated = structure is not None
+    half_point = structure['half_point'] if duplicated else total // 2
+
+    return SlidePlan(
+        number=number,
+        start=start,
+        words=tuple(words),
+        ids=ids,
+        phonetic_ids=phonetic_ids,
+        metadata=tuple(metadata),
+        tail_words=frozenset(words[-TAIL_WORDS:]),
+        duplicated=duplicated,
+        half_point=half_point,
+        progress_threshold=(
+            PROGRESS_THRESHOLD_SHORT if total <= SHORT_SLIDE_WORDS else PROGRESS_THRESHOLD_LONG
+        ),
+        chorus_cross_index=int(half_point * CHORUS_CROSS_RATIO),
+        chorus_change_index=int(total * CHORUS_CHANGE_RATIO),
+        early_transition_at=total * EARLY_TRANSITION_RATIO,
+    )
+
+
+class SongPlan:
+    """
+    Todos los SlidePlan de una canción, indexados por número de slide (entero).
+
+    Las palabras de TODA la canción viven en un único buffer contiguo de ids
+    int32 (word_ids) y cada slide es un tramo [start, start + len) de ese buffer.
+    vocab y phonetics se pueden compartir entre canciones (setlist/biblioteca).
+    """
+
+    def __init__(self, slides, vocab, phonetics, word_ids, phonetic_ids, fuzzy=None):
+        self.slides = slides
+        self.numbers = tuple(sorted(slides))
+        self.vocab = vocab
+        self.phonetics = phonetics
+        self.word_ids = word_ids
+        self.phonetic_ids = phonetic_ids
+        # Índice de borrados (SymSpell) del vocabulario: lo comparten todos los matchers
+        self.fuzzy = fuzzy or DeletionIndex(w for plan in slides.values() for w in plan.words)
+
+    def get(self, number):
+        return self.slides.get(number, EMPTY_PLAN)
+
+    def __contains__(self, number):
+        return number in self.slides
+
+    def __len__(self):
+        return len(self.slides)
+
+
+def compile_song(lyrics_data, structures=None, vocab=None, phonetics=None):
+    """
+    Compila una canción en formato universal ({"slide_N": [palabras]})
+    a un SongPlan. Se ejecuta una sola vez por canción.
+    Pasar vocab/phonetics compartidos para cargar un setlist completo.
+    """
+    structures = structures or {}
+    vocab = vocab if vocab is not None else Vocabulary()
+    phonetics = phonetics if phonetics is not None else Vocabulary()
+
+    split = {}
+    for slide_key, raw_words in lyrics_data.items():
+        number = slide_number(slide_key)
+        if number is not None:
+            split[number] = (slide_key, _split_slide(raw_words))
+
+    # Un solo buffer contiguo para toda la canción, en orden de slide
+    word_ids = array('i')
+    phonetic_ids = array('i')
+    ranges = {}
+    for number in sorted(split):
+        words = split[number][1][0]
+        ranges[number] = (len(word_ids), len(word_ids) + len(words))
+        word_ids.extend(vocab.intern(w) for w in words)
+        phonetic_ids.extend(phonetics.intern(jellyfish.soundex(w)) for w in words)
+
+    ids_view = memoryview(word_ids).toreadonly()
+    phonetic_view = memoryview(phonetic_ids).toreadonly()
+    slides = {}
+    for number, (slide_key, (words, metadata)) in split.items():
+        start, end = ranges[number]
+        slides[number] = _build_plan(
+            number, start, [vocab.word(i) for i in word_ids[start:end]], metadata,
+            ids_view[start:end], phonetic_view[start:end], structures.get(slide_key),
+        )
+    return SongPlan(slides, vocab, phonetics, word_ids, phonetic_ids)
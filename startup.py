@@ -0,0 +1,130 @@
+import os
+import threading
+import time
+
+PREFETCH_BLOCK = 1 << 20   # 1 MB por lectura al precalentar el modelo
+
+
+class StartupTask:
+    """Una tarea de arranque en su propio hilo, con su tiempo medido"""
+
+    def __init__(self, name, target, args=(), kwargs=None):
+        self.name = name
+        self._target = target
+        self._args = args
+        self._kwargs = kwargs or {}
+        self._done = threading.Event()
+        self.value = None
+        self.error = None
+        self.started_at = None
+        self.elapsed = None
+        self._thread = threading.Thread(target=self._run, name=f"startup-{name}", daemon=True)
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            self.value = self._target(*self._args, **self._kwargs)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.elapsed = time.perf_counter() - self.started_at
+            self._done.set()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def result(self, timeout=None):
+        """Espera la tarea; relanza la excepción si falló"""
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"La tarea de arranque '{self.name}' no terminó a tiempo")
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+class StartupTasks:
+    """
+    Arranque concurrente: cada paso lento (modelo, letras, PowerPoint, audio)
+    corre en paralelo y se espera solo cuando hace falta su resultado.
+    Con todo en paralelo, el tiempo hasta escuchar queda acotado por la carga del modelo.
+    """
+
+    def __init__(self):
+        self.created_at = time.perf_counter()
+        self.tasks = {}
+
+    def start(self, name, target, *args, **kwargs):
+        task = StartupTask(name, target, args, kwargs).start()
+        self.tasks[name] = task
+        return task
+
+    def result(self, name, timeout=None):
+        return self.tasks[name].result(timeout)
+
+    def report(self):
+        """Imprime el tiempo de cada tarea y el total hasta ahora"""
+        total = time.perf_counter() - self.created_at
+        print("⏱️ TIEMPOS DE ARRANQUE:")
+        for name, task in self.tasks.items():
+            if not task.done:
+                status = "en curso"
+            elif task.error is not None:
+                status = f"{task.elapsed:.2f}s ❌ {task.error}"
+            else:
+                status = f"{task.elapsed:.2f}s"
+            print(f"   {name:<12} {status}")
+        print(f"   {'total':<12} {total:.2f}s")
+        return total
+
+
+def prefetch_directory(path):
+    """
+    Lee todos los archivos del directorio para dejarlos en el page cache del SO.
+    Con el modelo grande la lectura del disco es gran parte de vosk.Model().
+    """
+    total = 0
+    buffer = bytearray(PREFETCH_BLOCK)
+    for root, _dirs, files in os.walk(path):
+        for name in files:
+            try:
+                with open(os.path.join(root, name), 'rb', buffering=0) as f:
+                    while True:
+                        read = f.readinto(buffer)
+                        if not read:
+                            break
+                        total += read
+            except OSError:
+                continue
+    return total
+
+
+def load_model(model_path, prefetch=False):
+    """vosk.Model (opcionalmente precalentando el directorio del modelo)"""
+    import vosk
+
+    if prefetch:
+        start = time.perf_counter()
+        read = prefetch_directory(model_path)
+        print(f"📦 Modelo precargado en caché: {read / 1e6:.0f} MB en {time.perf_counter() - start:.1f}s")
+    return vosk.Model(model_path)
+
+
+def probe_audio_input(target_sr=16000, fallback_sr=48000, channels=1, dtype='int16'):
+    """
+    Carga PortAudio, negocia la tasa de captura igual que el procesador
+    (nativo a 16 kHz o 48 kHz) y abre el micrófono una vez.
+    Devuelve (nombre del dispositivo, tasa).
+    """
+    import sounddevice as sd
+    from resampler import negotiate_capture_rate
+
+    device = sd.query_devices(kind='input')
+    samplerate = negotiate_capture_rate(target_sr, fallback_sr, channels=channels, dtype=dtype)
+    with sd.InputStream(samplerate=samplerate, channels=channels, dtype=dtype):
+        pass
+    return device['name'], samplerate
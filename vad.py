@@ -0,0 +1,96 @@
+from collections import deque
+
+import webrtcvad
+
+VAD_FRAME_MS = (30, 20, 10)    # tamaños de frame que acepta webrtcvad
+
+
+class VoiceGate:
+    """
+    Compuerta de voz (webrtcvad) delante del recognizer.
+
+    Abre cuando al menos start_ratio de los frames de la ventana de pre-roll
+    tienen voz y entrega también ese pre-roll (el ataque de la frase no se
+    pierde). Cierra después de hangover_ms seguidos sin voz. Mientras está
+    cerrada, Vosk no decodifica nada (breaks instrumentales, oración, batería).
+    """
+
+    def __init__(self, aggressiveness=2, frame_ms=30, sample_rate=16000,
+                 hangover_ms=300, preroll_ms=300, start_ratio=0.6):
+        self.vad = webrtcvad.Vad(aggressiveness)
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.frame_bytes = sample_rate * frame_ms // 1000 * 2
+        self.hangover_frames = max(1, hangover_ms // frame_ms)
+        self.preroll = deque(maxlen=max(1, preroll_ms // frame_ms))
+        self.start_frames = max(1, round(self.preroll.maxlen * start_ratio))
+        self.active = False
+        self._silent_frames = 0
+        self._zero_copy = True
+        self.stats = {
+            'frames': 0,
+            'frames_passed': 0,
+            'openings': 0,
+        }
+
+    def _is_speech(self, frame):
+        if self._zero_copy:
+            try:
+                return self.vad.is_speech(frame, self.sample_rate)
+            except TypeError:
+                # webrtcvad solo acepta buffers de solo lectura
+                self._zero_copy = False
+        return self.vad.is_speech(bytes(frame), self.sample_rate)
+
+    def reset(self):
+        self.active = False
+        self._silent_frames = 0
+        self.preroll.clear()
+
+    def filter(self, view):
+        """
+        Recibe un lote alineado a frames y devuelve (trozos_para_el_recognizer, cerró).
+        Los trozos de frames seguidos con voz son vistas del lote (sin copia);
+        el pre-roll son copias. cerró = la voz terminó dentro de este lote.
+        """
+        chunks = []
+        closed = False
+        run_start = None
+        frame_bytes = self.frame_bytes
+        for offset in range(0, len(view) - frame_bytes + 1, frame_bytes):
+            frame = view[offset:offset + frame_bytes]
+            speech = self._is_speech(frame)
+            self.stats['frames'] += 1
+
+            if not self.active:
+                self.preroll.append((bytes(frame), speech))
+                if sum(voiced for _, voiced in self.preroll) >= self.start_frames:
+                    self.active = True
+                    self._silent_frames = 0
+                    self.stats['openings'] += 1
+                    chunks.append(b''.join(chunk for chunk, _ in self.preroll))
+                    self.stats['frames_passed'] += len(self.preroll)
+                    self.preroll.clear()
+                continue
+
+            self._silent_frames = 0 if speech else self._silent_frames + 1
+            if self._silent_frames >= self.hangover_frames:
+                if run_start is not None:
+                    chunks.append(view[run_start:offset])
+                    run_start = None
+                self.active = False
+                closed = True
+                continue
+
+            self.stats['frames_passed'] += 1
+            if run_start is None:
+                run_start = offset
+
+        if run_start is not None:
+            chunks.append(view[run_start:len(view) - len(view) % frame_bytes])
+        return chunks, closed
+
+    @property
+    def skipped_fraction(self):
+        frames = self.stats['frames']
+        return 1.0 - self.stats['frames_passed'] / frames if frames else 0.0
@@ -0,0 +1,39 @@
+import sys
+
+UNKNOWN = -1   # id de una palabra que no está en ninguna letra
+
+
+class Vocabulary:
+    """
+    Internado de palabras → id entero.
+
+    Se puede compartir entre todas las canciones de un setlist o biblioteca:
+    cada palabra distinta se guarda una sola vez y los slides son arreglos de ids.
+    """
+
+    def __init__(self):
+        self.ids = {}
+        self.words = []
+
+    def __len__(self):
+        return len(self.words)
+
+    def __contains__(self, word):
+        return word in self.ids
+
+    def intern(self, word):
+        """Id de la palabra (la agrega si es nueva)"""
+        word_id = self.ids.get(word)
+        if word_id is None:
+            word = sys.intern(word)
+            word_id = len(self.words)
+            self.ids[word] = word_id
+            self.words.append(word)
+        return word_id
+
+    def get(self, word, default=UNKNOWN):
+        """Id de una palabra reconocida (UNKNOWN si no está en la letra)"""
+        return self.ids.get(word, default)
+
+    def word(self, word_id):
+        return self.words[word_id]